@@ -5,7 +5,7 @@ import os
 from flask import Flask
 from flasgger import Swagger
 
-def create_app():
+def create_app(config: dict = None):
     # Определяем базовую директорию (корень проекта)
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     template_dir = os.path.join(base_dir, 'templates')
@@ -16,6 +16,94 @@ def create_app():
                 static_folder=static_dir)
     app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
     
+    # Хранилище истории проверок
+    app.config['DATA_DIR'] = os.environ.get('SECCHECK_DATA_DIR', os.path.join(base_dir, 'data'))
+    
+    # Непрерывный мониторинг (включается переменной окружения SECCHECK_MONITORING=1)
+    app.config['MONITORING_ENABLED'] = os.environ.get('SECCHECK_MONITORING') == '1'
+    app.config['MONITORING_MAX_CONCURRENCY'] = 4
+    app.config['MONITORING_JITTER'] = 0.1
+    app.config['MONITORING_MIN_INTERVAL'] = 60
+    app.config['MONITORING_CERT_THRESHOLD_DAYS'] = 14
+    app.config['MONITORING_CERT_RESCAN_INTERVAL'] = 6 * 3600
+    
+    # Число процессов для режима execution=process (None - по числу ядер)
+    app.config['SCAN_PROCESSES'] = None
+    
+    # Очередь задач для распределенных воркеров (python -m app.worker)
+    app.config['TASK_QUEUE_URL'] = os.environ.get('SECCHECK_TASK_QUEUE')
+    app.config['TASK_MAX_ATTEMPTS'] = 3
+    
+    # Circuit breaker для недоступных хостов и кэш ответов 403/5xx
+    app.config['CIRCUIT_FAILURE_THRESHOLD'] = 3
+    app.config['CIRCUIT_BASE_COOLDOWN'] = 30
+    app.config['CIRCUIT_MAX_COOLDOWN'] = 900
+    app.config['BLOCKED_CACHE_TTL'] = 120
+    
+    # Адаптивные таймауты по хостам: границы в секундах
+    app.config['TIMEOUT_CONNECT_FLOOR'] = 1.0
+    app.config['TIMEOUT_CONNECT_CEILING'] = 10.0
+    app.config['TIMEOUT_READ_FLOOR'] = 2.0
+    app.config['TIMEOUT_READ_CEILING'] = 20.0
+    
+    # HTTP/2 для запросов проверок (SECCHECK_HTTP2=1, нужен пакет httpx[http2])
+    app.config['HTTP2_ENABLED'] = os.environ.get('SECCHECK_HTTP2') == '1'
+    
+    # Лимиты сетевых ресурсов одной проверки (0 - без ограничения)
+    app.config['SCAN_MAX_BYTES'] = int(os.environ.get('SECCHECK_SCAN_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['SCAN_MAX_DECODED_BYTES'] = int(os.environ.get('SECCHECK_SCAN_MAX_DECODED_BYTES', 50 * 1024 * 1024))
+    app.config['SCAN_MAX_CONNECTIONS'] = int(os.environ.get('SECCHECK_SCAN_MAX_CONNECTIONS', 10))
+    app.config['SCAN_MAX_REQUESTS'] = int(os.environ.get('SECCHECK_SCAN_MAX_REQUESTS', 20))
+    app.config['SCAN_MAX_REDIRECTS'] = int(os.environ.get('SECCHECK_SCAN_MAX_REDIRECTS', 10))
+    
+    # Время жизни стабильных редиректов в карте (0 - цепочка проходится в каждой проверке)
+    app.config['REDIRECT_CACHE_TTL'] = 3600
+    
+    # Обход сайта (/api/crawl, python -m app.cli crawl): лимиты одного обхода и кэш robots.txt
+    app.config['CRAWL_MAX_PAGES'] = 20
+    app.config['CRAWL_MAX_DEPTH'] = 2
+    app.config['CRAWL_CONCURRENCY'] = 4
+    app.config['CRAWL_MAX_SECONDS'] = 60.0
+    app.config['ROBOTS_CACHE_TTL'] = 3600
+    
+    # Контроль допуска проверок API: лимиты параллельности и очередь ожидания
+    app.config['ADMISSION_MAX_CONCURRENT'] = 8
+    app.config['ADMISSION_PER_CLIENT'] = 4
+    app.config['ADMISSION_MAX_QUEUE'] = 32
+    app.config['ADMISSION_MAX_WAIT'] = 15.0
+    
+    # Профилирование проверок по запросу (заголовок X-Profile: 1 или ?profile=1)
+    app.config['PROFILING_ENABLED'] = os.environ.get('SECCHECK_PROFILING') == '1'
+    app.config['PROFILING_DIR'] = None  # По умолчанию DATA_DIR/profiles
+    app.config['PROFILING_SAMPLE_INTERVAL'] = 0.005
+    app.config['PROFILING_MAX_ARTIFACTS'] = 50
+    # Токен для /api/admin/* и /api/certificates/refresh (заголовок X-Admin-Token); без токена они закрыты
+    app.config['ADMIN_TOKEN'] = os.environ.get('SECCHECK_ADMIN_TOKEN')
+    
+    # Сборка статических файлов интерфейса (минификация, хэш в имени, gzip/br); SECCHECK_ASSETS=0 - отдавать static/ как есть
+    app.config['ASSETS_ENABLED'] = os.environ.get('SECCHECK_ASSETS', '1') != '0'
+    app.config['ASSETS_DIR'] = None  # По умолчанию DATA_DIR/assets
+    # False - использовать сборку python -m app.cli assets, выполненную при развертывании
+    app.config['ASSETS_BUILD_ON_STARTUP'] = True
+    
+    # Доставка отчетов на callback_url: пакеты, подпись HMAC (секрет SECCHECK_WEBHOOK_SECRET), повторы
+    app.config['WEBHOOK_SECRET'] = os.environ.get('SECCHECK_WEBHOOK_SECRET')
+    app.config['WEBHOOK_BATCH_SIZE'] = 100
+    app.config['WEBHOOK_BATCH_WAIT'] = 1.0
+    app.config['WEBHOOK_MAX_ATTEMPTS'] = 8
+    app.config['WEBHOOK_MAX_BACKOFF'] = 600.0
+    app.config['WEBHOOK_OUTBOX_MAX_EVENTS'] = 10000
+    app.config['WEBHOOK_OUTBOX_MAX_FAILED'] = 1000
+    
+    # Сохранение сырых ответов проверок для повторной оценки (SECCHECK_CAPTURE=1)
+    app.config['CAPTURE_ENABLED'] = os.environ.get('SECCHECK_CAPTURE') == '1'
+    
+    if config:
+        app.config.update(config)
+    
+    if not app.config['TASK_QUEUE_URL']:
+        app.config['TASK_QUEUE_URL'] = 'sqlite:///' + os.path.join(app.config['DATA_DIR'], 'tasks.sqlite3')
+    
     # Настройка Swagger
     swagger_config = {
         "headers": [],
@@ -49,6 +137,10 @@ def create_app():
                 "name": "Security",
                 "description": "Проверка безопасности сайтов"
             },
+            {
+                "name": "Monitoring",
+                "description": "Непрерывный мониторинг и история проверок"
+            },
             {
                 "name": "System",
                 "description": "Системные endpoints"
@@ -58,6 +150,129 @@ def create_app():
     
     swagger = Swagger(app, config=swagger_config, template=swagger_template)
     
+    from app.services.host_health import host_health
+    host_health.configure(
+        app.config['CIRCUIT_FAILURE_THRESHOLD'],
+        app.config['CIRCUIT_BASE_COOLDOWN'],
+        app.config['CIRCUIT_MAX_COOLDOWN'],
+        app.config['BLOCKED_CACHE_TTL']
+    )
+    
+    # Хранилище отчетов и планировщик мониторинга
+    from app.services.report_store import ReportStore
+    from app.services.monitoring_scheduler import MonitoringScheduler
+    from app.services.task_queue import open_task_queue
+    
+    from app.services.webhooks import WebhookDispatcher, WebhookOutbox
+    
+    # Исходящая очередь webhooks: недоставленные после перезапуска события отправляются сразу
+    webhooks = WebhookDispatcher(
+        WebhookOutbox(os.path.join(app.config['DATA_DIR'], 'webhooks.sqlite3'),
+                      max_events=app.config['WEBHOOK_OUTBOX_MAX_EVENTS'],
+                      max_failed=app.config['WEBHOOK_OUTBOX_MAX_FAILED']),
+        secret=app.config['WEBHOOK_SECRET'],
+        batch_size=app.config['WEBHOOK_BATCH_SIZE'],
+        batch_wait=app.config['WEBHOOK_BATCH_WAIT'],
+        max_attempts=app.config['WEBHOOK_MAX_ATTEMPTS'],
+        max_backoff=app.config['WEBHOOK_MAX_BACKOFF']
+    )
+    if webhooks.outbox.next_due() is not None:
+        webhooks.start()
+    app.extensions['webhooks'] = webhooks
+    
+    store = ReportStore(os.path.join(app.config['DATA_DIR'], 'reports.sqlite3'))
+    scheduler = MonitoringScheduler(
+        store,
+        max_concurrency=app.config['MONITORING_MAX_CONCURRENCY'],
+        jitter=app.config['MONITORING_JITTER'],
+        min_interval=app.config['MONITORING_MIN_INTERVAL'],
+        cert_threshold_days=app.config['MONITORING_CERT_THRESHOLD_DAYS'],
+        cert_rescan_interval=app.config['MONITORING_CERT_RESCAN_INTERVAL'],
+        webhooks=webhooks
+    )
+    app.extensions['report_store'] = store
+    
+    from app.services.adaptive_timeouts import adaptive_timeouts
+    adaptive_timeouts.configure(
+        app.config['TIMEOUT_CONNECT_FLOOR'],
+        app.config['TIMEOUT_CONNECT_CEILING'],
+        app.config['TIMEOUT_READ_FLOOR'],
+        app.config['TIMEOUT_READ_CEILING']
+    )
+    adaptive_timeouts.attach_store(store)
+    
+    from app.services.resource_budget import default_budget
+    default_budget.configure(
+        max_bytes=app.config['SCAN_MAX_BYTES'],
+        max_decoded_bytes=app.config['SCAN_MAX_DECODED_BYTES'],
+        max_connections=app.config['SCAN_MAX_CONNECTIONS'],
+        max_requests=app.config['SCAN_MAX_REQUESTS'],
+        max_redirects=app.config['SCAN_MAX_REDIRECTS']
+    )
+    
+    from app.services.site_crawler import default_crawl_limits, robots_cache
+    default_crawl_limits.configure(
+        max_pages=app.config['CRAWL_MAX_PAGES'],
+        max_depth=app.config['CRAWL_MAX_DEPTH'],
+        concurrency=app.config['CRAWL_CONCURRENCY'],
+        max_seconds=app.config['CRAWL_MAX_SECONDS']
+    )
+    robots_cache.configure(ttl=app.config['ROBOTS_CACHE_TTL'])
+    
+    from app.services.redirect_map import redirect_map
+    redirect_map.configure(ttl=app.config['REDIRECT_CACHE_TTL'])
+    
+    if app.config['HTTP2_ENABLED']:
+        from app.services.http2_fetch import Http2Fetcher
+        from app.services.http_fetch import set_http2_fetcher
+        set_http2_fetcher(Http2Fetcher())
+    
+    if app.config['PROFILING_ENABLED']:
+        from app.services.scan_profiler import ScanProfiler
+        app.extensions['scan_profiler'] = ScanProfiler(
+            app.config['PROFILING_DIR'] or os.path.join(app.config['DATA_DIR'], 'profiles'),
+            sample_interval=app.config['PROFILING_SAMPLE_INTERVAL'],
+            max_artifacts=app.config['PROFILING_MAX_ARTIFACTS']
+        )
+    
+    if app.config['ASSETS_ENABLED']:
+        from app.services.asset_pipeline import AssetPipeline
+        pipeline = AssetPipeline(static_dir, app.config['ASSETS_DIR'] or os.path.join(app.config['DATA_DIR'], 'assets'))
+        if app.config['ASSETS_BUILD_ON_STARTUP']:
+            pipeline.build()
+        else:
+            pipeline.load()
+        app.extensions['assets'] = pipeline
+    
+    # Индекс сроков сертификатов: обновляется каждой проверкой
+    from app.services.cert_index import CertificateIndex, set_default_cert_index
+    cert_index = CertificateIndex(os.path.join(app.config['DATA_DIR'], 'certificates.sqlite3'))
+    set_default_cert_index(cert_index)
+    app.extensions['cert_index'] = cert_index
+    
+    if app.config['CAPTURE_ENABLED']:
+        from app.services.capture_store import CaptureStore, set_default_capture_store
+        capture_store = CaptureStore(os.path.join(app.config['DATA_DIR'], 'captures.sqlite3'))
+        set_default_capture_store(capture_store)
+        app.extensions['capture_store'] = capture_store
+    
+    app.extensions['monitoring_scheduler'] = scheduler
+    
+    from app.services.admission import AdmissionController
+    app.extensions['admission'] = AdmissionController(
+        max_concurrent=app.config['ADMISSION_MAX_CONCURRENT'],
+        per_client=app.config['ADMISSION_PER_CLIENT'],
+        max_queue=app.config['ADMISSION_MAX_QUEUE'],
+        max_wait=app.config['ADMISSION_MAX_WAIT']
+    )
+    app.extensions['task_queue'] = open_task_queue(
+        app.config['TASK_QUEUE_URL'],
+        max_attempts=app.config['TASK_MAX_ATTEMPTS']
+    )
+    
+    if app.config['MONITORING_ENABLED']:
+        scheduler.start()
+    
     # Регистрация роутов
     from app.routes import main_bp
     app.register_blueprint(main_bp)
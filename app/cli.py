@@ -0,0 +1,447 @@
+"""
+Командная строка анализатора
+
+Примеры:
+    python -m app.cli scan github.com google.com
+    python -m app.cli scan --input urls.txt --processes 8 > results.jsonl
+    python -m app.cli scan --input urls.txt --capture data/captures.sqlite3
+    python -m app.cli scan --input urls.txt --http2
+    python -m app.cli scan --input urls.txt --processes 8 --summary --sketch shard1.json > results.jsonl
+    python -m app.cli crawl github.com --max-pages 50 --max-depth 3
+    python -m app.cli ingest --input urls.txt --unique-only > unique.txt
+    python -m app.cli certs --within 30
+    python -m app.cli certs --within 14 --refresh
+    python -m app.cli rescore --captures data/captures.sqlite3 --latest > rescored.jsonl
+    python -m app.cli stats --group-by tld
+    python -m app.cli stats --input results.jsonl
+    python -m app.cli summary --merge shard1.json shard2.json
+    python -m app.cli assets --vendor
+    python -m app.cli webhook-sink --port 9000 --secret s3cret
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Iterator
+from app.services.url_ingest import IngestEntry, SqliteKeyIndex, ingest_urls, read_url_lines
+from app.utils.time_parse import parse_iso_time
+
+
+def _read_urls(args) -> Iterator[str]:
+    """URL из аргументов и файла (по одному в строке)"""
+    yield from args.urls
+    if args.input:
+        yield from read_url_lines(args.input)
+
+
+def _ingest(args) -> Iterator[IngestEntry]:
+    """Входные URL после канонизации и дедупликации (уже встреченные ключи - на диске)"""
+    index = SqliteKeyIndex()
+    try:
+        yield from ingest_urls(_read_urls(args), index=index)
+    finally:
+        index.close()
+
+
+def _default_data_path(name: str) -> str:
+    """Путь к файлу в каталоге данных (SECCHECK_DATA_DIR или data/ в корне проекта)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(os.environ.get('SECCHECK_DATA_DIR', os.path.join(base_dir, 'data')), name)
+
+
+def _print_json(data: dict):
+    sys.stdout.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def _write_summary(summary, args):
+    """Сохраняет состояние сводки (--sketch) для последующего объединения"""
+    if args.sketch:
+        with open(args.sketch, 'w', encoding='utf-8') as f:
+            json.dump(summary.to_dict(), f, separators=(',', ':'))
+
+
+def cmd_scan(args) -> int:
+    """Проверка списка URL, результаты в формате JSON Lines"""
+    summary = None
+    if args.summary or args.sketch:
+        from app.services.stream_sketches import StreamingSummary
+        summary = StreamingSummary()
+    last_summary = time.monotonic()
+
+    def emit(result: dict):
+        nonlocal last_summary
+        _print_json(result)
+        if summary is None:
+            return
+        if result.get('success'):
+            summary.add(result)
+        else:
+            summary.add_error()
+        # Текущая сводка - в stderr, чтобы не смешиваться с результатами
+        if args.summary and time.monotonic() - last_summary >= args.summary_interval:
+            last_summary = time.monotonic()
+            sys.stderr.write(json.dumps(summary.summary(), ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def valid_urls():
+        for entry in _ingest(args):
+            if entry.status == 'new':
+                yield entry.key
+            elif entry.status == 'rejected':
+                emit({'url': entry.input, 'line': entry.line, 'success': False, 'error': entry.reason})
+            elif args.duplicates:
+                _print_json({'url': entry.key, 'input': entry.input, 'line': entry.line,
+                             'duplicate_of': entry.first_line})
+
+    if args.http2:
+        # Включается до создания пула: процессы получают настройку и создают свои соединения
+        from app.services.http2_fetch import Http2Fetcher
+        from app.services.http_fetch import set_http2_fetcher
+        set_http2_fetcher(Http2Fetcher())
+
+    if args.cert_index:
+        # Сертификаты, полученные проверками, попадают в индекс сроков (процессы пула получают путь к индексу)
+        from app.services.cert_index import CertificateIndex, set_default_cert_index
+        set_default_cert_index(CertificateIndex(args.cert_index))
+
+    if args.capture and not args.processes:
+        from app.services.capture_store import CaptureStore, set_default_capture_store
+        set_default_capture_store(CaptureStore(args.capture))
+
+    if args.processes:
+        from app.services.process_pool import ProcessScanPool
+        pool = ProcessScanPool(args.processes, capture_path=args.capture)
+        try:
+            for url, report_data, error in pool.scan_many(valid_urls()):
+                if error:
+                    emit({'url': url, 'success': False, 'error': error})
+                else:
+                    emit(dict(report_data, success=True))
+        finally:
+            pool.shutdown()
+    else:
+        from app.services.security_service import SecurityService
+        for url in valid_urls():
+            try:
+                emit(dict(SecurityService(url).run_all_checks().to_dict(), success=True))
+            except Exception as e:
+                emit({'url': url, 'success': False, 'error': str(e)[:100]})
+
+    if summary is not None:
+        if args.summary:
+            sys.stderr.write(json.dumps(summary.summary(), ensure_ascii=False, indent=2) + '\n')
+        _write_summary(summary, args)
+
+    return 0
+
+
+def cmd_crawl(args) -> int:
+    """Обход сайта: строка JSON на каждую страницу по мере готовности, в конце - сводка"""
+    from app.services.site_crawler import CrawlLimits, SiteCrawler
+    from app.utils.url_normalizer import canonicalize_url
+
+    url, reason = canonicalize_url(args.url)
+    if url is None:
+        sys.stderr.write(f'Некорректный URL: {reason}\n')
+        return 2
+
+    if args.http2:
+        from app.services.http2_fetch import Http2Fetcher
+        from app.services.http_fetch import set_http2_fetcher
+        set_http2_fetcher(Http2Fetcher())
+
+    limits = CrawlLimits(max_pages=args.max_pages, max_depth=args.max_depth,
+                         concurrency=args.concurrency, max_seconds=args.max_seconds)
+    for kind, value in SiteCrawler(url, limits).iter_results():
+        _print_json(dict(value, event=kind))
+    return 0
+
+
+def cmd_ingest(args) -> int:
+    """Канонизация и дедупликация списка URL без проверки: строка JSON на каждый вход"""
+    for entry in _ingest(args):
+        if args.unique_only:
+            if entry.status == 'new':
+                sys.stdout.write(entry.key + '\n')
+        else:
+            _print_json(entry.to_dict())
+    return 0
+
+
+def cmd_certs(args) -> int:
+    """Сертификаты из индекса сроков, самые срочные первыми; --refresh обновляет истекающие"""
+    from app.services.cert_index import CertificateIndex
+
+    if not os.path.exists(args.index):
+        sys.stderr.write(f'Индекс сертификатов не найден: {args.index}\n')
+        return 1
+    index = CertificateIndex(args.index)
+
+    if args.refresh:
+        if args.within is None:
+            sys.stderr.write('Для --refresh укажите --within\n')
+            return 2
+        summary = index.refresh(args.within, concurrency=args.concurrency)
+        sys.stderr.write(f'Проверено: {summary["checked"]}, продлено: {summary["renewed"]}, '
+                         f'без изменений: {summary["unchanged"]}, ошибок: {summary["errors"]}\n')
+
+    start = end = None
+    if args.within is not None:
+        end = time.time() + args.within * 86400
+        if args.exclude_expired:
+            start = time.time()
+    if args.date_from:
+        start = parse_iso_time(args.date_from)
+    if args.date_to:
+        end = parse_iso_time(args.date_to)
+
+    cursor = None
+    while True:
+        page = index.expiring(start, end, limit=1000, cursor=cursor)
+        for item in page:
+            cursor = tuple(item.pop('cursor'))
+            _print_json(item)
+        if len(page) < 1000:
+            return 0
+
+
+def cmd_rescore(args) -> int:
+    """Повторная оценка сохраненных захватов по текущим правилам (без сети)"""
+    from app.services.capture_store import CaptureStore
+    from app.services.security_service import rescore_capture
+
+    if not os.path.exists(args.captures):
+        sys.stderr.write(f'Файл захватов не найден: {args.captures}\n')
+        return 1
+
+    store = CaptureStore(args.captures)
+    for capture in store.iter_captures(url=args.url, latest_only=args.latest):
+        try:
+            _print_json(dict(rescore_capture(capture).to_dict(), success=True))
+        except Exception as e:
+            _print_json({'url': capture.url, 'timestamp': capture.timestamp,
+                         'success': False, 'error': str(e)[:100]})
+
+    return 0
+
+
+def cmd_stats(args) -> int:
+    """Сводная статистика по сохраненным отчетам или по результатам scan/rescore"""
+    from app.services.fleet_analytics import fleet_summary, group_by, load_frame
+    from app.services.report_store import ReportStore
+
+    if args.input:
+        def reports():
+            stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+            try:
+                for line in stream:
+                    line = line.strip()
+                    if line:
+                        report = json.loads(line)
+                        if report.get('success', True) and 'checks' in report:
+                            yield report
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+        source = reports()
+    else:
+        if not os.path.exists(args.reports):
+            sys.stderr.write(f'Файл отчетов не найден: {args.reports}\n')
+            return 1
+        source = ReportStore(args.reports).iter_reports()
+
+    frame = load_frame(source, latest_only=not args.all)
+    result = fleet_summary(frame)
+    if args.group_by:
+        result['groups'] = group_by(frame, args.group_by)
+
+    sys.stdout.write(json.dumps(result, ensure_ascii=False, indent=2) + '\n')
+    return 0
+
+
+def cmd_summary(args) -> int:
+    """Сводка с постоянным расходом памяти: по результатам scan/rescore и сохраненным сводкам (--sketch)"""
+    from app.services.stream_sketches import StreamingSummary
+
+    summary = StreamingSummary()
+    for path in args.merge:
+        with open(path, encoding='utf-8') as f:
+            summary.merge(StreamingSummary.from_dict(json.load(f)))
+
+    if args.input:
+        stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+        try:
+            summary.extend(json.loads(line) for line in stream if line.strip())
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    _write_summary(summary, args)
+    sys.stdout.write(json.dumps(summary.summary(args.percentiles), ensure_ascii=False, indent=2) + '\n')
+    return 0
+
+
+def cmd_assets(args) -> int:
+    """Сборка статических файлов интерфейса; --vendor сначала скачивает библиотеки CDN в static/vendor"""
+    from app.services.asset_pipeline import AssetPipeline, vendor_assets
+
+    static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    if args.vendor:
+        for name in vendor_assets(static_dir, force=args.force):
+            sys.stderr.write(f'Скачан {name}\n')
+
+    pipeline = AssetPipeline(static_dir, args.output)
+    for asset in pipeline.build().values():
+        _print_json(dict(asset.to_dict(), name=asset.name))
+    return 0
+
+
+def cmd_webhook_sink(args) -> int:
+    """Локальный приемник webhooks для проверки доставки: строка JSON на каждый принятый пакет"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from app.services.webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, verify_signature
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            verified = None
+            if args.secret:
+                verified = verify_signature(args.secret, self.headers.get(TIMESTAMP_HEADER, ''), body,
+                                            self.headers.get(SIGNATURE_HEADER, ''))
+            status = args.status if verified is not False else 401
+            self.send_response(status)
+            self.end_headers()
+
+            batch = json.loads(body or b'{}')
+            _print_json({
+                'path': self.path,
+                'status': status,
+                'verified': verified,
+                'count': batch.get('count'),
+                'events': [
+                    {key: event.get(key) for key in ('id', 'event', 'source', 'url')}
+                    for event in batch.get('events', [])
+                ]
+            })
+            sys.stdout.flush()
+
+        def log_message(self, format, *log_args):
+            pass
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    sys.stderr.write(f'Прием webhooks на http://{args.host}:{server.server_port}/\n')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m app.cli',
+                                     description='Анализатор безопасности веб-сайтов')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan = subparsers.add_parser('scan', help='Проверить сайты')
+    scan.add_argument('urls', nargs='*', help='URL для проверки')
+    scan.add_argument('--input', '-i', help='Файл со списком URL (по одному в строке, "-" - stdin)')
+    scan.add_argument('--processes', '-p', type=int, default=0,
+                      help='Выполнять проверки в пуле из N процессов (0 - в текущем процессе)')
+    scan.add_argument('--capture', help='Сохранять сырые ответы в файл захватов (SQLite)')
+    scan.add_argument('--http2', action='store_true',
+                      help='Запросы по HTTP/2 с общим соединением на источник (нужен httpx[http2])')
+    scan.add_argument('--cert-index',
+                      help='Записывать сертификаты в индекс сроков (например, data/certificates.sqlite3)')
+    scan.add_argument('--summary', action='store_true',
+                      help='Выводить текущую сводку (квантили оценок, уровни, серверы) в stderr')
+    scan.add_argument('--summary-interval', type=float, default=10.0,
+                      help='Интервал вывода сводки в секундах')
+    scan.add_argument('--sketch', help='Сохранить сводку в файл для объединения (python -m app.cli summary --merge)')
+    scan.add_argument('--duplicates', action='store_true',
+                      help='Выводить повторы со ссылкой на строку первого вхождения')
+    scan.set_defaults(func=cmd_scan)
+
+    crawl = subparsers.add_parser('crawl', help='Обойти страницы сайта и сравнить их политики (JSON Lines)')
+    crawl.add_argument('url', help='Стартовая страница')
+    crawl.add_argument('--max-pages', type=int, default=20, help='Максимум страниц')
+    crawl.add_argument('--max-depth', type=int, default=2, help='Глубина переходов по ссылкам')
+    crawl.add_argument('--concurrency', type=int, default=4, help='Одновременных запросов к сайту')
+    crawl.add_argument('--max-seconds', type=float, default=60.0,
+                       help='Время обхода: по истечении новые страницы не запрашиваются')
+    crawl.add_argument('--http2', action='store_true',
+                       help='Запросы по HTTP/2 с общим соединением (нужен httpx[http2])')
+    crawl.set_defaults(func=cmd_crawl)
+
+    ingest = subparsers.add_parser('ingest', help='Канонизировать и дедуплицировать список URL без проверки')
+    ingest.add_argument('urls', nargs='*', help='URL')
+    ingest.add_argument('--input', '-i', help='Файл со списком URL (по одному в строке, "-" - stdin)')
+    ingest.add_argument('--unique-only', action='store_true',
+                        help='Выводить только уникальные канонические URL (по одному в строке)')
+    ingest.set_defaults(func=cmd_ingest)
+
+    certs = subparsers.add_parser('certs', help='Сертификаты по сроку истечения (JSON Lines)')
+    certs.add_argument('--index', default=_default_data_path('certificates.sqlite3'),
+                       help='Индекс сроков сертификатов, по умолчанию data/certificates.sqlite3')
+    certs.add_argument('--within', type=float, help='Истекают в ближайшие N дней (включая истекшие)')
+    certs.add_argument('--exclude-expired', action='store_true', help='С --within: без уже истекших')
+    certs.add_argument('--from', dest='date_from', help='Начало диапазона (ISO 8601)')
+    certs.add_argument('--to', dest='date_to', help='Конец диапазона (ISO 8601)')
+    certs.add_argument('--refresh', action='store_true',
+                       help='Сначала заново получить сертификаты, истекающие в ближайшие --within дней')
+    certs.add_argument('--concurrency', type=int, default=8, help='Одновременных TLS соединений при --refresh')
+    certs.set_defaults(func=cmd_certs)
+
+    rescore = subparsers.add_parser('rescore', help='Повторно оценить сохраненные захваты без сети')
+    rescore.add_argument('--captures', required=True, help='Файл захватов (SQLite)')
+    rescore.add_argument('--url', help='Только захваты этого URL')
+    rescore.add_argument('--latest', action='store_true', help='Только последний захват каждого URL')
+    rescore.set_defaults(func=cmd_rescore)
+
+    from app.services.fleet_analytics import GROUP_KEYS
+    stats = subparsers.add_parser('stats', help='Сводная статистика по результатам проверок')
+    stats.add_argument('--reports', default=_default_data_path('reports.sqlite3'),
+                       help='Хранилище отчетов (SQLite), по умолчанию data/reports.sqlite3')
+    stats.add_argument('--input', '-i', help='Результаты scan/rescore в формате JSON Lines ("-" - stdin)')
+    stats.add_argument('--group-by', choices=GROUP_KEYS, help='Сгруппировать оценки')
+    stats.add_argument('--all', action='store_true',
+                       help='Учитывать все отчеты (по умолчанию - последний отчет каждого URL)')
+    stats.set_defaults(func=cmd_stats)
+
+    from app.services.stream_sketches import DEFAULT_PERCENTILES
+    summary = subparsers.add_parser('summary', help='Сводка по потоку результатов без хранения отчетов (скетчи)')
+    summary.add_argument('--input', '-i', help='Результаты scan/rescore в формате JSON Lines ("-" - stdin)')
+    summary.add_argument('--merge', nargs='+', default=[], metavar='SKETCH',
+                         help='Объединить сводки, сохраненные scan --sketch')
+    summary.add_argument('--sketch', help='Сохранить объединенную сводку в файл')
+    summary.add_argument('--percentiles', type=float, nargs='+', default=DEFAULT_PERCENTILES,
+                         help='Процентили оценок')
+    summary.set_defaults(func=cmd_summary)
+
+    assets = subparsers.add_parser('assets', help='Собрать статические файлы интерфейса (минификация, хэш, gzip/br)')
+    assets.add_argument('--output', default=_default_data_path('assets'),
+                        help='Каталог сборки, по умолчанию data/assets (ASSETS_DIR приложения)')
+    assets.add_argument('--vendor', action='store_true',
+                        help='Скачать Bootstrap, Bootstrap Icons и Chart.js в static/vendor (нужна сеть)')
+    assets.add_argument('--force', action='store_true', help='С --vendor: скачать заново уже скачанные файлы')
+    assets.set_defaults(func=cmd_assets)
+
+    sink = subparsers.add_parser('webhook-sink', help='Локальный приемник webhooks (JSON Lines по пакетам)')
+    sink.add_argument('--host', default='127.0.0.1', help='Адрес для приема')
+    sink.add_argument('--port', type=int, default=9000, help='Порт для приема')
+    sink.add_argument('--secret', help='Секрет подписи: пакеты с неверной подписью получают 401')
+    sink.add_argument('--status', type=int, default=200,
+                      help='Код ответа на принятые пакеты (например 503 для проверки повторов)')
+    sink.set_defaults(func=cmd_webhook_sink)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
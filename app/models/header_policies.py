@@ -0,0 +1,155 @@
+"""
+Модели разобранных заголовков безопасности: CSP, HSTS и Set-Cookie
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Срок HSTS, начиная с которого политика считается надежной (180 дней) и допустимой для preload (1 год)
+HSTS_MIN_MAX_AGE = 15552000
+HSTS_PRELOAD_MAX_AGE = 31536000
+
+# Директивы CSP, которые при отсутствии берут источники из default-src
+CSP_FETCH_DIRECTIVES = (
+    'script-src', 'style-src', 'img-src', 'connect-src', 'font-src', 'object-src',
+    'media-src', 'frame-src', 'child-src', 'worker-src', 'manifest-src'
+)
+
+# Источники, разрешающие загрузку скриптов практически отовсюду
+CSP_PERMISSIVE_SOURCES = ('*', 'http:', 'https:', 'data:', 'blob:')
+
+
+@dataclass(frozen=True)
+class CspPolicy:
+    """
+    Одна политика Content-Security-Policy
+
+    Экземпляры кэшируются и разделяются между проверками - не изменять.
+    """
+    directives: Dict[str, Tuple[str, ...]] = field(default_factory=dict)  # Имя директивы -> источники
+    unknown: Tuple[str, ...] = ()                                         # Нераспознанные директивы
+
+    def sources(self, directive: str) -> Optional[Tuple[str, ...]]:
+        """Действующие источники директивы с учетом default-src (None - ограничения нет)"""
+        if directive in self.directives:
+            return self.directives[directive]
+        if directive in CSP_FETCH_DIRECTIVES:
+            return self.directives.get('default-src')
+        return None
+
+    def script_issues(self) -> List[str]:
+        """Недостатки защиты от внедрения скриптов"""
+        sources = self.sources('script-src')
+        if sources is None:
+            return ['нет script-src и default-src']
+
+        issues = []
+        lowered = [source.lower() for source in sources]
+        # Nonce, хэш или strict-dynamic отменяют действие 'unsafe-inline' в современных браузерах
+        has_nonce = any(source.startswith(("'nonce-", "'sha256-", "'sha384-", "'sha512-")) for source in lowered)
+        if "'unsafe-inline'" in lowered and not has_nonce and "'strict-dynamic'" not in lowered:
+            issues.append("'unsafe-inline' в script-src")
+        if "'unsafe-eval'" in lowered:
+            issues.append("'unsafe-eval' в script-src")
+        permissive = [source for source in lowered if source in CSP_PERMISSIVE_SOURCES]
+        if permissive and "'strict-dynamic'" not in lowered:
+            issues.append(f'слишком широкие источники: {" ".join(permissive)}')
+        return issues
+
+    @property
+    def frame_ancestors(self) -> Optional[Tuple[str, ...]]:
+        return self.directives.get('frame-ancestors')
+
+    def to_dict(self):
+        return {
+            'directives': {name: list(sources) for name, sources in self.directives.items()},
+            'unknown': list(self.unknown)
+        }
+
+
+@dataclass(frozen=True)
+class HstsPolicy:
+    """Разобранный заголовок Strict-Transport-Security"""
+    max_age: Optional[int] = None
+    include_subdomains: bool = False
+    preload: bool = False
+    error: Optional[str] = None  # Почему браузер проигнорирует заголовок
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None and self.max_age is not None
+
+    def issues(self) -> List[str]:
+        """Недостатки политики"""
+        if not self.valid:
+            return [self.error or 'не указан max-age']
+        if self.max_age == 0:
+            return ['max-age=0 отключает HSTS']
+
+        issues = []
+        if self.max_age < HSTS_MIN_MAX_AGE:
+            issues.append(f'max-age меньше 180 дней ({self.max_age} с)')
+        if self.preload and (not self.include_subdomains or self.max_age < HSTS_PRELOAD_MAX_AGE):
+            issues.append('preload требует includeSubDomains и max-age не меньше года')
+        return issues
+
+    def to_dict(self):
+        return {
+            'max_age': self.max_age,
+            'include_subdomains': self.include_subdomains,
+            'preload': self.preload,
+            'error': self.error
+        }
+
+
+@dataclass(frozen=True)
+class CookieAttributes:
+    """
+    Атрибуты Set-Cookie (часть заголовка после имени и значения)
+
+    Разбираются отдельно от значения: значение cookie уникально для каждого
+    ответа, а набор атрибутов обычно одинаков у всех сайтов одной платформы.
+    """
+    secure: bool = False
+    httponly: bool = False
+    samesite: Optional[str] = None  # 'Strict', 'Lax', 'None' или исходное некорректное значение
+    domain: Optional[str] = None
+    path: Optional[str] = None
+    max_age: Optional[int] = None
+    expires: Optional[str] = None
+
+    @property
+    def samesite_valid(self) -> bool:
+        """SameSite задан корректно (SameSite=None браузеры принимают только вместе с Secure)"""
+        if self.samesite in ('Strict', 'Lax'):
+            return True
+        return self.samesite == 'None' and self.secure
+
+
+@dataclass(frozen=True)
+class CookieRecord:
+    """Один разобранный заголовок Set-Cookie"""
+    name: str
+    attributes: CookieAttributes
+
+    def issues(self) -> List[str]:
+        """Нарушения требований префиксов __Secure- и __Host-"""
+        attributes = self.attributes
+        issues = []
+        if self.name.startswith(('__Secure-', '__Host-')) and not attributes.secure:
+            issues.append(f'{self.name}: префикс требует Secure')
+        if self.name.startswith('__Host-') and (attributes.domain is not None or attributes.path != '/'):
+            issues.append(f'{self.name}: префикс __Host- требует Path=/ без Domain')
+        return issues
+
+    def to_dict(self):
+        attributes = self.attributes
+        return {
+            'name': self.name,
+            'secure': attributes.secure,
+            'httponly': attributes.httponly,
+            'samesite': attributes.samesite,
+            'domain': attributes.domain,
+            'path': attributes.path,
+            'max_age': attributes.max_age,
+            'expires': attributes.expires
+        }
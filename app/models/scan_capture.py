@@ -0,0 +1,210 @@
+"""
+Модель сырых данных проверки (захват ответов для повторной оценки без сети)
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+
+@dataclass
+class HttpHop:
+    """Один ответ в цепочке редиректов"""
+    url: str
+    status_code: int
+    headers: List[Tuple[str, str]] = field(default_factory=list)  # В исходном порядке, с повторами
+    elapsed_ms: float = 0.0
+    http_version: Optional[str] = None  # 'HTTP/1.1', 'HTTP/2'
+    alpn: Optional[str] = None          # Протокол, согласованный в TLS (ALPN): 'h2', 'http/1.1'
+    cached: bool = False                # Редирект взят из карты редиректов, а не запрошен
+
+    @property
+    def is_redirect(self) -> bool:
+        return 300 <= self.status_code < 400 and any(key.lower() == 'location' for key, _ in self.headers)
+
+    @property
+    def location(self) -> Optional[str]:
+        """Абсолютный адрес перехода (None, если ответ не редирект)"""
+        if not self.is_redirect:
+            return None
+        return urljoin(self.url, self.get_all('location')[0].strip())
+
+    @property
+    def secure(self) -> bool:
+        """Ответ получен по HTTPS"""
+        return self.url.lower().startswith('https://')
+
+    def get_all(self, name: str) -> List[str]:
+        """Все значения заголовка (например, несколько Set-Cookie)"""
+        name = name.lower()
+        return [value for key, value in self.headers if key.lower() == name]
+
+    def header_dict(self) -> Dict[str, str]:
+        """Заголовки в виде словаря с ключами в нижнем регистре"""
+        result = {}
+        for key, value in self.headers:
+            key = key.lower()
+            result[key] = f'{result[key]}, {value}' if key in result else value
+        return result
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'status_code': self.status_code,
+            'headers': [list(pair) for pair in self.headers],
+            'elapsed_ms': self.elapsed_ms,
+            'http_version': self.http_version,
+            'alpn': self.alpn,
+            'cached': self.cached
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HttpHop':
+        return cls(
+            url=data['url'],
+            status_code=data['status_code'],
+            headers=[tuple(pair) for pair in data.get('headers', [])],
+            elapsed_ms=data.get('elapsed_ms', 0.0),
+            http_version=data.get('http_version'),
+            alpn=data.get('alpn'),
+            cached=data.get('cached', False)
+        )
+
+
+@dataclass
+class FetchResult:
+    """Результат HTTP запроса со всей цепочкой редиректов"""
+    url: str
+    hops: List[HttpHop] = field(default_factory=list)
+    error: Optional[str] = None
+    # 'connect_timeout', 'read_timeout', 'connection', 'too_many_redirects', 'request', 'budget', 'unexpected'
+    error_kind: Optional[str] = None
+    # Тело финального ответа: нужно обходу сайта и разбору robots.txt, в захват не сохраняется
+    body: Optional[bytes] = field(default=None, repr=False, compare=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.hops)
+
+    @property
+    def final(self) -> Optional[HttpHop]:
+        """Финальный ответ"""
+        return self.hops[-1] if self.hops else None
+
+    @property
+    def history(self) -> List[HttpHop]:
+        """Промежуточные ответы (редиректы)"""
+        return self.hops[:-1]
+
+    def merged_headers(self) -> Dict[str, str]:
+        """
+        Заголовки всей цепочки: из редиректов берется первое значение,
+        заголовки финального ответа имеют приоритет
+        """
+        headers = {}
+        for hop in self.history:
+            for key, value in hop.header_dict().items():
+                headers.setdefault(key, value)
+        if self.final is not None:
+            headers.update(self.final.header_dict())
+        return headers
+
+    def set_cookies(self) -> List[str]:
+        """Все Set-Cookie заголовки цепочки"""
+        return [value for hop in self.hops for value in hop.get_all('set-cookie')]
+
+    def hop_cookies(self) -> List[Tuple[HttpHop, str]]:
+        """Set-Cookie заголовки цепочки вместе с ответом, который их установил"""
+        return [(hop, value) for hop in self.hops for value in hop.get_all('set-cookie')]
+
+    def text(self) -> str:
+        """Тело финального ответа как текст (кодировка из Content-Type, по умолчанию UTF-8)"""
+        if not self.body:
+            return ''
+        content_type = self.final.header_dict().get('content-type', '') if self.final else ''
+        charset = 'utf-8'
+        for param in content_type.split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'charset' and value:
+                charset = value.strip('"\' ')
+        try:
+            return self.body.decode(charset, errors='replace')
+        except LookupError:
+            return self.body.decode('utf-8', errors='replace')
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'hops': [hop.to_dict() for hop in self.hops],
+            'error': self.error,
+            'error_kind': self.error_kind
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FetchResult':
+        return cls(
+            url=data['url'],
+            hops=[HttpHop.from_dict(hop) for hop in data.get('hops', [])],
+            error=data.get('error'),
+            error_kind=data.get('error_kind')
+        )
+
+
+@dataclass
+class CertificateInfo:
+    """Поля сертификата, полученные при TLS соединении"""
+    hostname: str
+    port: int
+    fields: Dict = field(default_factory=dict)  # Результат getpeercert()
+    connect_ms: float = 0.0
+    error: Optional[str] = None
+    alpn: Optional[str] = None  # Протокол, выбранный сервером из предложенных h2 и http/1.1
+
+    def to_dict(self):
+        return {
+            'hostname': self.hostname,
+            'port': self.port,
+            'fields': self.fields,
+            'connect_ms': self.connect_ms,
+            'error': self.error,
+            'alpn': self.alpn
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CertificateInfo':
+        return cls(
+            hostname=data['hostname'],
+            port=data['port'],
+            fields=data.get('fields') or {},
+            connect_ms=data.get('connect_ms', 0.0),
+            error=data.get('error'),
+            alpn=data.get('alpn')
+        )
+
+
+@dataclass
+class ScanCapture:
+    """Все сетевые данные одной проверки"""
+    url: str
+    timestamp: str
+    page: Optional[FetchResult] = None
+    robots: Optional[FetchResult] = None
+    certificate: Optional[CertificateInfo] = None
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'timestamp': self.timestamp,
+            'page': self.page.to_dict() if self.page else None,
+            'robots': self.robots.to_dict() if self.robots else None,
+            'certificate': self.certificate.to_dict() if self.certificate else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ScanCapture':
+        return cls(
+            url=data['url'],
+            timestamp=data['timestamp'],
+            page=FetchResult.from_dict(data['page']) if data.get('page') else None,
+            robots=FetchResult.from_dict(data['robots']) if data.get('robots') else None,
+            certificate=CertificateInfo.from_dict(data['certificate']) if data.get('certificate') else None
+        )
@@ -16,6 +16,18 @@ class CheckResult:
     message: str
     details: Dict = field(default_factory=dict)
     category: str = 'general'  # 'connection', 'headers', 'cookies', 'server', 'content'
+    
+    def to_dict(self):
+        """Преобразование в словарь для JSON"""
+        return {
+            'name': self.name,
+            'status': self.status,
+            'score': self.score,
+            'max_score': self.max_score,
+            'message': self.message,
+            'details': self.details,
+            'category': self.category
+        }
 
 
 @dataclass
@@ -30,6 +42,8 @@ class SecurityReport:
     checks: List[CheckResult] = field(default_factory=list)
     recommendations: List[str] = field(default_factory=list)
     categories: Dict[str, float] = field(default_factory=dict)  # Оценки по категориям
+    resources: Dict = field(default_factory=dict)  # Сетевые ресурсы проверки: usage, limits, exceeded
+    extra: Dict = field(default_factory=dict)  # Дополнительные данные (протокол соединения и т.п.)
     
     def to_dict(self):
         """Преобразование в словарь для JSON"""
@@ -40,20 +54,11 @@ class SecurityReport:
             'max_score': round(self.max_score, 1),
             'percentage': round(self.percentage, 1),
             'level': self.level,
-            'checks': [
-                {
-                    'name': check.name,
-                    'status': check.status,
-                    'score': check.score,
-                    'max_score': check.max_score,
-                    'message': check.message,
-                    'details': check.details,
-                    'category': check.category
-                }
-                for check in self.checks
-            ],
+            'checks': [check.to_dict() for check in self.checks],
             'recommendations': self.recommendations,
-            'categories': {k: round(v, 1) for k, v in self.categories.items()}
+            'categories': {k: round(v, 1) for k, v in self.categories.items()},
+            'resources': self.resources,
+            'extra': self.extra
         }
 
 
@@ -1,14 +1,44 @@
 """
 Роуты Flask приложения
 """
-from flask import Blueprint, render_template, request, jsonify
+import hmac
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from contextlib import nullcontext
+from flask import (Blueprint, Response, abort, render_template, request, jsonify, current_app,
+                   send_file, url_for)
 from flasgger import swag_from
 from app.services.security_service import SecurityService
+from app.services.url_ingest import ingest_urls
 from app.utils.url_normalizer import normalize_url, is_valid_url
 from app.utils.score_calculator import calculate_level
+from app.utils.header_parser import header_cache_info
+from app.services.asset_pipeline import IMMUTABLE_MAX_AGE, VENDOR_FILES
+from app.utils.http_caching import PreparedJson, apply_caching, content_etag, not_modified
+from app.utils.event_stream import event_stream_response
+from app.utils.time_parse import parse_iso_time
+from app.services.host_health import host_health
+from app.services.happy_eyeballs import connection_races
+from app.services.webhooks import scan_event, validate_callback_url
+from app.services.report_diff import DIRECTIONS
+from app.services.resource_budget import resource_totals
+from app.services.admission import PRIORITY_BATCH, PRIORITY_INTERACTIVE, AdmissionRejected
 
 main_bp = Blueprint('main', __name__)
 
+# Текущее состояние процесса: ответы не кэшируются и не сверяются по ETag
+_LIVE_PATHS = ('/api/health', '/api/admin/')
+
+
+@main_bp.after_request
+def caching_headers(response):
+    """Заголовки кэширования для ответов API (см. app/utils/http_caching.py)"""
+    if request.path.startswith(_LIVE_PATHS) and 'Cache-Control' not in response.headers:
+        response.cache_control.no_store = True
+    return apply_caching(response)
+
 
 @main_bp.route('/')
 def index():
@@ -16,6 +46,47 @@ def index():
     return render_template('index.html')
 
 
+@main_bp.route('/assets/<path:filename>')
+def asset(filename):
+    """Собранный статический файл с хэшем содержимого в имени"""
+    pipeline = current_app.extensions.get('assets')
+    built = pipeline.get(filename) if pipeline else None
+    if built is None:
+        abort(404)
+    
+    encoding = built.choose(request.accept_encodings)
+    response = Response(built.variants[encoding], mimetype=built.content_type)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f'{built.digest}-{encoding}')
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@main_bp.app_template_global()
+def asset_url(filename: str) -> str:
+    """Адрес собранного файла static/ (без сборки - исходный файл)"""
+    pipeline = current_app.extensions.get('assets')
+    built = pipeline.url_name(filename) if pipeline else None
+    if built is None:
+        return url_for('static', filename=filename)
+    return url_for('main.asset', filename=built)
+
+
+@main_bp.app_template_global()
+def vendor_url(name: str) -> str:
+    """Локальная копия библиотеки из static/vendor, если она скачана, иначе адрес CDN"""
+    pipeline = current_app.extensions.get('assets')
+    if pipeline is None:
+        local = os.path.join(current_app.static_folder, 'vendor', *name.split('/'))
+        return url_for('static', filename=f'vendor/{name}') if os.path.exists(local) else VENDOR_FILES[name]
+    built = pipeline.url_name(f'vendor/{name}')
+    return url_for('main.asset', filename=built) if built else VENDOR_FILES[name]
+
+
 @main_bp.route('/api/check', methods=['POST'])
 def check_security():
     """
@@ -43,6 +114,10 @@ def check_security():
               type: string
               example: "github.com"
               description: URL сайта для проверки (можно без протокола)
+            callback_url:
+              type: string
+              example: "https://example.com/hooks/seccheck"
+              description: Адрес, на который будет доставлен отчет (webhook)
     responses:
       200:
         description: Успешная проверка
@@ -104,6 +179,10 @@ def check_security():
               example: "Сайт недоступен: Страница не найдена (404)"
             url:
               type: string
+      429:
+        description: Слишком много одновременных проверок от клиента (заголовок Retry-After)
+      503:
+        description: Сервер перегружен, очередь заполнена (заголовок Retry-After)
       500:
         description: Внутренняя ошибка сервера
     """
@@ -126,41 +205,26 @@ def check_security():
                 'error': 'Некорректный URL'
             }), 400
         
-        # Запускаем проверку
-        service = SecurityService(normalized_url)
-        report = service.run_all_checks()
-        
-        # Преобразуем в словарь для JSON
-        result = report.to_dict()
+        callback_url, error = _callback_url(data)
+        if error:
+            return error
         
-        # Проверяем, есть ли ошибка доступности
-        has_access_error = any(
-            check.get('name') == 'Доступность сайта' and 
-            check.get('status') == 'danger' 
-            for check in result.get('checks', [])
-        )
-        
-        if has_access_error:
-            # Если сайт недоступен, возвращаем ошибку
-            error_check = next(
-                (check for check in result['checks'] if check.get('name') == 'Доступность сайта'),
-                None
-            )
-            error_message = error_check.get('message', 'Сайт недоступен') if error_check else 'Сайт недоступен'
-            
-            return jsonify({
-                'success': False,
-                'error': error_message,
-                'url': normalized_url
-            }), 404
+        # Ждем допуска: при перегрузке сразу отвечаем 429/503
+        try:
+            ticket = _admit(PRIORITY_INTERACTIVE)
+        except AdmissionRejected as e:
+            return _admission_rejected(e)
         
-        # Добавляем дополнительную информацию
-        level, color_class = calculate_level(report.percentage)
-        result['level'] = level
-        result['color_class'] = color_class
-        result['success'] = True
+        # Запускаем проверку
+        with ticket, _profile_if_requested(normalized_url) as trace:
+            service = SecurityService(normalized_url)
+            report = service.run_all_checks()
         
-        return jsonify(result)
+        _deliver(callback_url, [report.to_dict()], 'check')
+        result, status_code = _report_response(report, normalized_url)
+        if trace is not None:
+            result['profile'] = trace.artifact
+        return jsonify(result), status_code
         
     except Exception as e:
         return jsonify({
@@ -169,6 +233,333 @@ def check_security():
         }), 500
 
 
+def _profile_if_requested(label: str):
+    """
+    Профилировщик проверки, если профилирование включено в конфигурации
+    и запрошено заголовком X-Profile: 1 или параметром profile=1
+    """
+    profiler = current_app.extensions.get('scan_profiler')
+    requested = (
+        request.headers.get('X-Profile', '').lower() in ('1', 'true')
+        or request.args.get('profile', '').lower() in ('1', 'true')
+        or (request.get_json(silent=True) or {}).get('profile') is True
+    )
+    if profiler is None or not requested:
+        return nullcontext()
+    return profiler.profile(label)
+
+
+def _admit(priority: int):
+    """Допуск проверки от текущего клиента (см. AdmissionController.acquire)"""
+    return current_app.extensions['admission'].acquire(request.remote_addr or 'unknown', priority)
+
+
+def _admission_rejected(error: AdmissionRejected):
+    """Ответ на недопущенную проверку с рекомендуемой паузой"""
+    response = jsonify({
+        'success': False,
+        'error': error.message,
+        'retry_after': error.retry_after
+    })
+    response.status_code = error.status_code
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def _callback_url(data: dict) -> tuple:
+    """
+    Адрес обратного вызова из тела запроса
+    
+    Returns:
+        Кортеж (адрес или None, ответ с ошибкой или None)
+    """
+    callback_url = data.get('callback_url')
+    if callback_url is None:
+        return None, None
+    reason = validate_callback_url(callback_url)
+    if reason:
+        return None, (jsonify({'success': False, 'error': reason}), 400)
+    return callback_url.strip(), None
+
+
+def _deliver(callback_url, reports: list, source: str):
+    """Ставит отчеты в очередь доставки на адрес обратного вызова (одним пакетом)"""
+    if callback_url and reports:
+        current_app.extensions['webhooks'].submit(callback_url, [scan_event(report, source) for report in reports])
+
+
+def _report_response(report, normalized_url: str) -> tuple:
+    """
+    Ответ API по отчету о проверке
+    
+    Returns:
+        Кортеж (тело ответа, HTTP статус): 404, если сайт недоступен
+    """
+    # Преобразуем в словарь для JSON
+    result = report.to_dict()
+    
+    # Проверяем, есть ли ошибка доступности
+    error_check = next(
+        (check for check in result['checks']
+         if check.get('name') == 'Доступность сайта' and check.get('status') == 'danger'),
+        None
+    )
+    
+    if error_check:
+        # Если сайт недоступен, возвращаем ошибку
+        return {
+            'success': False,
+            'error': error_check.get('message', 'Сайт недоступен'),
+            'url': normalized_url
+        }, 404
+    
+    # Добавляем дополнительную информацию
+    level, color_class = calculate_level(report.percentage)
+    result['level'] = level
+    result['color_class'] = color_class
+    result['success'] = True
+    
+    return result, 200
+
+
+@main_bp.route('/api/check/stream', methods=['POST'])
+def check_security_stream():
+    """
+    Потоковая проверка безопасности одного сайта
+    ---
+    tags:
+      - Security
+    summary: Проверка с выдачей результатов по мере готовности
+    description: |
+      Результат каждой проверки отправляется сразу после завершения ее проверщика,
+      в конце - итоговый отчет (как в /api/check). По умолчанию формат NDJSON
+      (одно JSON событие в строке); с заголовком Accept text/event-stream - Server-Sent Events.
+      События - start, check, report (или error, если сайт недоступен).
+    consumes:
+      - application/json
+    produces:
+      - application/x-ndjson
+      - text/event-stream
+    parameters:
+      - in: body
+        name: body
+        description: URL для проверки
+        required: true
+        schema:
+          type: object
+          required:
+            - url
+          properties:
+            url:
+              type: string
+              example: "github.com"
+            callback_url:
+              type: string
+              example: "https://example.com/hooks/seccheck"
+              description: Адрес, на который будет доставлен отчет (webhook)
+    responses:
+      200:
+        description: Поток событий проверки
+      400:
+        description: Некорректный запрос
+      429:
+        description: Слишком много одновременных проверок от клиента (заголовок Retry-After)
+      503:
+        description: Сервер перегружен (заголовок Retry-After)
+    """
+    data = request.get_json(silent=True) or {}
+    url = (data.get('url') or '').strip()
+    
+    if not url:
+        return jsonify({
+            'success': False,
+            'error': 'URL не указан'
+        }), 400
+    
+    normalized_url = normalize_url(url)
+    
+    if not is_valid_url(normalized_url):
+        return jsonify({
+            'success': False,
+            'error': 'Некорректный URL'
+        }), 400
+    
+    callback_url, error = _callback_url(data)
+    if error:
+        return error
+    
+    try:
+        ticket = _admit(PRIORITY_INTERACTIVE)
+    except AdmissionRejected as e:
+        return _admission_rejected(e)
+    
+    profile = _profile_if_requested(normalized_url)
+    
+    def generate():
+        service = SecurityService(normalized_url)
+        yield 'start', {'url': normalized_url, 'checkers_total': len(service.checkers)}
+        
+        try:
+            with profile as trace:
+                for kind, value in service.iter_results():
+                    if kind == 'check':
+                        yield 'check', {'check': value.to_dict()}
+                    else:
+                        _deliver(callback_url, [value.to_dict()], 'check')
+                        result, status_code = _report_response(value, normalized_url)
+                        if trace is not None:
+                            result['profile'] = trace.artifact
+                        yield 'report' if status_code == 200 else 'error', dict(result, status_code=status_code)
+        except Exception as e:
+            yield 'error', {
+                'success': False,
+                'error': f'Ошибка при проверке: {str(e)}',
+                'status_code': 500
+            }
+    
+    # Место освобождается, когда поток отправлен или клиент отключился
+    return event_stream_response(generate(), on_close=ticket.release)
+
+
+@main_bp.route('/api/crawl', methods=['POST'])
+def crawl_site():
+    """
+    Обход сайта с проверкой нескольких страниц
+    ---
+    tags:
+      - Security
+    summary: Проверка заголовков, cookies и контента на страницах одного сайта
+    description: |
+      Начиная с указанной страницы, переходит по ссылкам на тот же источник (схема, хост, порт)
+      до глубины max_depth, соблюдая robots.txt (запрашивается один раз и кэшируется).
+      Одновременно к сайту выполняется не больше concurrency запросов. Результаты отдаются
+      потоком по мере готовности: события start, page для каждой страницы и summary со сводкой
+      согласованности политик между страницами. Обход останавливается досрочно при исчерпании
+      лимита страниц или времени (поле stopped в summary). Формат NDJSON, с заголовком
+      Accept text/event-stream - Server-Sent Events.
+    consumes:
+      - application/json
+    produces:
+      - application/x-ndjson
+      - text/event-stream
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - url
+          properties:
+            url:
+              type: string
+              example: "github.com"
+            max_pages:
+              type: integer
+              description: Максимум страниц (не больше CRAWL_MAX_PAGES)
+            max_depth:
+              type: integer
+              description: Глубина переходов по ссылкам (не больше CRAWL_MAX_DEPTH)
+    responses:
+      200:
+        description: Поток событий обхода
+      400:
+        description: Некорректный запрос
+      429:
+        description: Слишком много одновременных проверок от клиента (заголовок Retry-After)
+      503:
+        description: Сервер перегружен (заголовок Retry-After)
+    """
+    from app.services.site_crawler import CrawlLimits, SiteCrawler, default_crawl_limits
+    
+    data = request.get_json(silent=True) or {}
+    url = (data.get('url') or '').strip()
+    
+    if not url:
+        return jsonify({
+            'success': False,
+            'error': 'URL не указан'
+        }), 400
+    
+    normalized_url = normalize_url(url)
+    
+    if not is_valid_url(normalized_url):
+        return jsonify({
+            'success': False,
+            'error': 'Некорректный URL'
+        }), 400
+    
+    # Параметры запроса могут только уменьшить лимиты сервера
+    limits = CrawlLimits(**default_crawl_limits.to_dict())
+    try:
+        for name in ('max_pages', 'max_depth'):
+            if data.get(name) is not None:
+                setattr(limits, name, max(0, min(int(data[name]), getattr(limits, name))))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'max_pages и max_depth должны быть целыми числами'
+        }), 400
+    limits.max_pages = max(1, limits.max_pages)
+    
+    try:
+        ticket = _admit(PRIORITY_INTERACTIVE)
+    except AdmissionRejected as e:
+        return _admission_rejected(e)
+    
+    def generate():
+        yield 'start', {'url': normalized_url, 'limits': limits.to_dict()}
+        try:
+            for kind, value in SiteCrawler(normalized_url, limits).iter_results():
+                yield kind, value
+        except Exception as e:
+            yield 'error', {
+                'success': False,
+                'error': f'Ошибка при обходе: {str(e)}',
+                'status_code': 500
+            }
+    
+    return event_stream_response(generate(), on_close=ticket.release)
+
+
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """
+    Возвращает пул процессов приложения (создается при первом обращении)
+
+    Пул запускает процессы через forkserver/spawn и останавливается при выходе
+    из интерпретатора (см. ProcessScanPool).
+    """
+    with _process_pool_lock:
+        pool = current_app.extensions.get('process_pool')
+        if pool is None:
+            from app.services.process_pool import ProcessScanPool
+            capture_store = current_app.extensions.get('capture_store')
+            pool = ProcessScanPool(
+                current_app.config['SCAN_PROCESSES'],
+                capture_path=capture_store.path if capture_store else None
+            )
+            current_app.extensions['process_pool'] = pool
+    return pool
+
+
+def _batch_item(url: str, score: float, max_score: float, percentage: float) -> dict:
+    """Краткий результат проверки для массового ответа"""
+    level, color_class = calculate_level(percentage)
+    
+    return {
+        'url': url,
+        'success': True,
+        'score': score,
+        'max_score': max_score,
+        'percentage': percentage,
+        'level': level,
+        'color_class': color_class
+    }
+
+
 @main_bp.route('/api/check/batch', methods=['POST'])
 def check_security_batch():
     """
@@ -198,6 +589,15 @@ def check_security_batch():
                 type: string
               example: ["github.com", "google.com", "apple.com"]
               description: Массив URL для проверки
+            execution:
+              type: string
+              enum: ["inline", "process"]
+              example: "inline"
+              description: Режим выполнения (process - пул процессов по числу ядер)
+            callback_url:
+              type: string
+              example: "https://example.com/hooks/seccheck"
+              description: Адрес, на который отчеты будут доставлены одним пакетом (webhook)
     responses:
       200:
         description: Результаты проверки
@@ -210,6 +610,10 @@ def check_security_batch():
             total:
               type: integer
               example: 3
+            unique:
+              type: integer
+              example: 3
+              description: Число уникальных проверенных URL
             results:
               type: array
               items:
@@ -217,6 +621,13 @@ def check_security_batch():
                 properties:
                   url:
                     type: string
+                    description: Канонический URL
+                  input:
+                    type: string
+                    description: URL в том виде, в каком он передан
+                  duplicate_of:
+                    type: integer
+                    description: Индекс первого вхождения того же URL (для повторов)
                   success:
                     type: boolean
                   score:
@@ -227,6 +638,10 @@ def check_security_batch():
                     type: string
       400:
         description: Некорректный запрос
+      429:
+        description: Слишком много одновременных проверок от клиента (заголовок Retry-After)
+      503:
+        description: Сервер перегружен (заголовок Retry-After)
     """
     try:
         data = request.get_json()
@@ -244,43 +659,77 @@ def check_security_batch():
                 'error': 'Максимум 10 URL за один запрос'
             }), 400
         
+        execution = data.get('execution', 'inline')
+        if execution not in ('inline', 'process'):
+            return jsonify({
+                'success': False,
+                'error': 'Неизвестный режим выполнения'
+            }), 400
+        
+        callback_url, error = _callback_url(data)
+        if error:
+            return error
+        
+        # Канонизация и дедупликация: каждый уникальный ключ проверяется один раз
+        entries = list(ingest_urls(str(url) for url in urls))
+        scan_urls = [entry.key for entry in entries if entry.status == 'new']
+        
+        # Массовая проверка занимает одно место и пропускает вперед интерактивные
+        try:
+            ticket = _admit(PRIORITY_BATCH)
+        except AdmissionRejected as e:
+            return _admission_rejected(e)
+        
+        completed = {}
+        reports = []
+        with ticket:
+            if execution == 'process':
+                # Результаты приходят в порядке завершения
+                for url, report_data, error in _get_process_pool().scan_many(scan_urls):
+                    if error:
+                        completed[url] = {'url': url, 'success': False, 'error': error}
+                    else:
+                        completed[url] = _batch_item(
+                            url, report_data['score'], report_data['max_score'], report_data['percentage']
+                        )
+                        if callback_url:
+                            reports.append(report_data)
+            else:
+                for url in scan_urls:
+                    try:
+                        service = SecurityService(url)
+                        report = service.run_all_checks()
+                        completed[url] = _batch_item(
+                            url, report.total_score, report.max_score, report.percentage
+                        )
+                        if callback_url:
+                            reports.append(report.to_dict())
+                    except Exception as e:
+                        completed[url] = {
+                            'url': url,
+                            'success': False,
+                            'error': str(e)[:100]
+                        }
+        
+        # Все отчеты массовой проверки доставляются одним пакетом
+        _deliver(callback_url, reports, 'batch')
+        
+        # Возвращаем результаты в порядке запроса, повторы получают результат первого вхождения
         results = []
-        for url in urls:
-            try:
-                normalized_url = normalize_url(url.strip())
-                
-                if not is_valid_url(normalized_url):
-                    results.append({
-                        'url': normalized_url,
-                        'success': False,
-                        'error': 'Некорректный URL'
-                    })
-                    continue
-                
-                service = SecurityService(normalized_url)
-                report = service.run_all_checks()
-                
-                level, color_class = calculate_level(report.percentage)
-                
-                results.append({
-                    'url': normalized_url,
-                    'success': True,
-                    'score': report.total_score,
-                    'max_score': report.max_score,
-                    'percentage': report.percentage,
-                    'level': level,
-                    'color_class': color_class
-                })
-            except Exception as e:
-                results.append({
-                    'url': url,
-                    'success': False,
-                    'error': str(e)[:100]
-                })
+        for entry in entries:
+            if entry.status == 'rejected':
+                item = {'url': entry.input, 'success': False, 'error': entry.reason}
+            else:
+                item = dict(completed[entry.key])
+                if entry.first_line is not None:
+                    item['duplicate_of'] = entry.first_line - 1
+            item['input'] = entry.input
+            results.append(item)
         
         return jsonify({
             'success': True,
             'total': len(results),
+            'unique': len(scan_urls),
             'results': results
         })
         
@@ -291,220 +740,911 @@ def check_security_batch():
         }), 500
 
 
-@main_bp.route('/api/checks', methods=['GET'])
-def get_available_checks():
+@main_bp.route('/api/tasks', methods=['POST'])
+def enqueue_tasks():
     """
-    Список всех доступных проверок безопасности
+    Постановка проверок в очередь для распределенных воркеров
     ---
     tags:
       - Security
-    summary: Получить список всех проверок
-    description: Возвращает информацию о всех доступных проверках безопасности
+    summary: Добавить задачи в очередь
+    description: Ставит URL в общую очередь. Задачи выполняют воркеры, запущенные командой python -m app.worker
+    consumes:
+      - application/json
     produces:
       - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - urls
+          properties:
+            urls:
+              type: array
+              items:
+                type: string
+              example: ["github.com", "google.com"]
     responses:
-      200:
-        description: Список проверок
+      202:
+        description: Задачи поставлены в очередь
         schema:
           type: object
           properties:
             success:
               type: boolean
               example: true
-            checks:
+            tasks:
               type: array
               items:
                 type: object
                 properties:
-                  name:
-                    type: string
-                    example: "Защищенное соединение (HTTPS)"
-                  category:
+                  id:
                     type: string
-                    example: "connection"
-                  max_score:
-                    type: number
-                    example: 15.0
-                  description:
+                  url:
                     type: string
+      400:
+        description: Некорректный запрос
     """
-    checks_info = [
-        {
-            'name': 'Защищенное соединение (HTTPS)',
-            'category': 'connection',
-            'max_score': 15.0,
-            'description': 'Проверка использования HTTPS протокола'
-        },
-        {
-            'name': 'SSL сертификат',
-            'category': 'connection',
-            'max_score': 10.0,
-            'description': 'Проверка валидности и срока действия SSL сертификата'
-        },
-        {
-            'name': 'Принудительное использование HTTPS (HSTS)',
-            'category': 'headers',
-            'max_score': 12.0,
-            'description': 'Проверка наличия заголовка Strict-Transport-Security'
-        },
-        {
-            'name': 'Защита от встраивания (X-Frame-Options)',
-            'category': 'headers',
-            'max_score': 8.0,
-            'description': 'Проверка защиты от clickjacking атак'
-        },
-        {
-            'name': 'Защита от подмены типа файлов',
-            'category': 'headers',
-            'max_score': 8.0,
-            'description': 'Проверка заголовка X-Content-Type-Options'
-        },
-        {
-            'name': 'Политика безопасности контента (CSP)',
-            'category': 'headers',
-            'max_score': 12.0,
-            'description': 'Проверка Content-Security-Policy заголовка'
-        },
-        {
-            'name': 'Защита от XSS',
-            'category': 'headers',
-            'max_score': 5.0,
-            'description': 'Проверка заголовка X-XSS-Protection'
-        },
-        {
-            'name': 'Политика Referrer',
-            'category': 'headers',
-            'max_score': 5.0,
-            'description': 'Проверка заголовка Referrer-Policy'
-        },
-        {
-            'name': 'Политика доступа (Permissions-Policy)',
-            'category': 'headers',
-            'max_score': 5.0,
-            'description': 'Проверка заголовка Permissions-Policy'
-        },
-        {
-            'name': 'Скрытие информации о сервере',
-            'category': 'server',
-            'max_score': 10.0,
-            'description': 'Проверка отсутствия заголовков Server и X-Powered-By'
-        },
-        {
-            'name': 'Secure флаг в cookies',
-            'category': 'cookies',
-            'max_score': 3.0,
-            'description': 'Проверка использования Secure флага в cookies'
-        },
-        {
-            'name': 'HttpOnly флаг в cookies',
-            'category': 'cookies',
-            'max_score': 3.0,
-            'description': 'Проверка использования HttpOnly флага в cookies'
-        },
-        {
-            'name': 'SameSite атрибут в cookies',
-            'category': 'cookies',
-            'max_score': 2.0,
-            'description': 'Проверка использования SameSite атрибута в cookies'
-        },
-        {
-            'name': 'Наличие robots.txt',
-            'category': 'content',
-            'max_score': 2.0,
-            'description': 'Проверка наличия файла robots.txt'
-        },
-        {
-            'name': 'Защита от смешанного контента',
-            'category': 'content',
-            'max_score': 3.0,
-            'description': 'Проверка отсутствия смешанного HTTP/HTTPS контента'
-        },
-        {
-            'name': 'Скорость ответа сервера',
-            'category': 'content',
-            'max_score': 3.0,
-            'description': 'Проверка времени ответа сервера'
-        }
-    ]
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls', [])
+    
+    if not urls or not isinstance(urls, list):
+        return jsonify({
+            'success': False,
+            'error': 'URLs не указаны или не являются массивом'
+        }), 400
+    
+    queue = current_app.extensions['task_queue']
+    tasks = []
+    rejected = []
+    for url in urls:
+        normalized_url = normalize_url(str(url))
+        if not is_valid_url(normalized_url):
+            rejected.append({'url': url, 'error': 'Некорректный URL'})
+            continue
+        tasks.append({'id': queue.enqueue(normalized_url), 'url': normalized_url})
     
     return jsonify({
         'success': True,
-        'total': len(checks_info),
-        'checks': checks_info
-    })
+        'total': len(tasks),
+        'tasks': tasks,
+        'rejected': rejected
+    }), 202
 
 
-@main_bp.route('/api/info', methods=['GET'])
-def api_info():
+@main_bp.route('/api/tasks', methods=['GET'])
+def task_queue_stats():
     """
-    Информация об API
+    Состояние очереди задач
     ---
     tags:
       - System
-    summary: Информация об API
-    description: Возвращает информацию о версии API и доступных endpoints
+    summary: Статистика очереди
+    description: Количество задач в очереди по статусам
     produces:
       - application/json
     responses:
       200:
-        description: Информация об API
-        schema:
-          type: object
-          properties:
-            name:
-              type: string
-              example: "Security Checker API"
-            version:
-              type: string
-              example: "1.0.0"
-            description:
-              type: string
-            endpoints:
-              type: array
-              items:
+        description: Статистика очереди
+    """
+    return jsonify({
+        'success': True,
+        'stats': current_app.extensions['task_queue'].stats()
+    })
+
+
+@main_bp.route('/api/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    """
+    Статус и результат задачи
+    ---
+    tags:
+      - Security
+    summary: Получить задачу
+    produces:
+      - application/json
+    parameters:
+      - in: path
+        name: task_id
+        type: string
+        required: true
+    responses:
+      200:
+        description: Задача (поле result содержит отчет, когда status = done)
+      404:
+        description: Задача не найдена
+    """
+    task = current_app.extensions['task_queue'].get(task_id)
+    
+    if task is None:
+        return jsonify({
+            'success': False,
+            'error': 'Задача не найдена'
+        }), 404
+    
+    return jsonify(dict(task.to_dict(), success=True))
+
+
+@main_bp.route('/api/watchlist', methods=['GET'])
+def list_watchlist():
+    """
+    Список сайтов на мониторинге
+    ---
+    tags:
+      - Monitoring
+    summary: Получить список наблюдения
+    description: Возвращает сайты, которые периодически перепроверяются планировщиком
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Список наблюдения
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            enabled:
+              type: boolean
+              example: true
+            watchlist:
+              type: array
+              items:
                 type: object
-            max_score:
+                properties:
+                  url:
+                    type: string
+                    example: "https://github.com"
+                  interval:
+                    type: number
+                    example: 3600
+                  next_run:
+                    type: number
+                  last_run:
+                    type: number
+    """
+    scheduler = current_app.extensions['monitoring_scheduler']
+    
+    return jsonify({
+        'success': True,
+        'enabled': current_app.config['MONITORING_ENABLED'],
+        'watchlist': scheduler.list_entries()
+    })
+
+
+@main_bp.route('/api/watchlist', methods=['POST'])
+def add_to_watchlist():
+    """
+    Добавление сайта на мониторинг
+    ---
+    tags:
+      - Monitoring
+    summary: Добавить сайт в список наблюдения
+    description: Регистрирует URL для периодических проверок. Проверки распределяются равномерно внутри интервала со случайным сдвигом
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - url
+          properties:
+            url:
+              type: string
+              example: "github.com"
+            interval:
               type: number
-              example: 106.0
+              example: 3600
+              description: Интервал перепроверки в секундах (по умолчанию 3600)
+            callback_url:
+              type: string
+              example: "https://example.com/hooks/seccheck"
+              description: Адрес, на который доставляется отчет каждой проверки (webhook)
+    responses:
+      201:
+        description: Сайт добавлен
+      400:
+        description: Некорректный запрос
     """
+    data = request.get_json(silent=True) or {}
+    url = str(data.get('url', '')).strip()
+    
+    if not url:
+        return jsonify({
+            'success': False,
+            'error': 'URL не указан'
+        }), 400
+    
+    normalized_url = normalize_url(url)
+    
+    if not is_valid_url(normalized_url):
+        return jsonify({
+            'success': False,
+            'error': 'Некорректный URL'
+        }), 400
+    
+    callback_url, error = _callback_url(data)
+    if error:
+        return error
+    
+    try:
+        interval = float(data.get('interval', 3600))
+        entry = current_app.extensions['monitoring_scheduler'].register(normalized_url, interval, callback_url)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
     return jsonify({
-        'name': 'Security Checker API',
-        'version': '1.0.0',
-        'description': 'REST API для проверки безопасности веб-сайтов',
-        'max_score': 106.0,
-        'endpoints': [
-            {
-                'path': '/api/check',
-                'method': 'POST',
-                'description': 'Проверка безопасности одного сайта'
-            },
-            {
-                'path': '/api/check/batch',
-                'method': 'POST',
-                'description': 'Массовая проверка нескольких сайтов (до 10)'
-            },
-            {
-                'path': '/api/checks',
-                'method': 'GET',
-                'description': 'Список всех доступных проверок'
-            },
-            {
-                'path': '/api/info',
-                'method': 'GET',
-                'description': 'Информация об API'
-            },
-            {
-                'path': '/api/health',
-                'method': 'GET',
-                'description': 'Проверка работоспособности API'
-            },
-            {
-                'path': '/api/docs',
-                'method': 'GET',
-                'description': 'Swagger документация'
-            }
-        ]
+        'success': True,
+        'url': entry.url,
+        'interval': entry.interval,
+        'next_run': entry.next_run,
+        'callback_url': entry.callback_url
+    }), 201
+
+
+@main_bp.route('/api/watchlist', methods=['DELETE'])
+def remove_from_watchlist():
+    """
+    Удаление сайта из мониторинга
+    ---
+    tags:
+      - Monitoring
+    summary: Удалить сайт из списка наблюдения
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - url
+          properties:
+            url:
+              type: string
+              example: "github.com"
+    responses:
+      200:
+        description: Сайт удален
+      404:
+        description: Сайт не найден в списке наблюдения
+    """
+    data = request.get_json(silent=True) or {}
+    normalized_url = normalize_url(str(data.get('url', '')))
+    
+    if not current_app.extensions['monitoring_scheduler'].unregister(normalized_url):
+        return jsonify({
+            'success': False,
+            'error': 'URL не найден в списке наблюдения'
+        }), 404
+    
+    return jsonify({'success': True, 'url': normalized_url})
+
+
+@main_bp.route('/api/history', methods=['GET'])
+def report_history():
+    """
+    История проверок сайта
+    ---
+    tags:
+      - Monitoring
+    summary: Получить сохраненные отчеты
+    description: Возвращает сохраненные отчеты о проверках URL (новые первыми)
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: url
+        type: string
+        required: true
+        description: URL сайта
+      - in: query
+        name: limit
+        type: integer
+        default: 20
+        description: Максимальное количество отчетов
+    responses:
+      200:
+        description: История проверок
+      400:
+        description: URL не указан
+    """
+    url = request.args.get('url', '').strip()
+    
+    if not url:
+        return jsonify({
+            'success': False,
+            'error': 'URL не указан'
+        }), 400
+    
+    normalized_url = normalize_url(url)
+    limit = min(request.args.get('limit', 20, type=int), 500)
+    store = current_app.extensions['report_store']
+    
+    # Версия истории известна до чтения отчетов: неизменная история отдается ответом 304
+    version = store.history_version(normalized_url)
+    etag = content_etag(f'{normalized_url}|{limit}|{version[0] if version else 0}'.encode('utf-8'))
+    # Время отчетов - локальное время сервера
+    last_modified = datetime.fromisoformat(version[1]).astimezone(timezone.utc) if version else None
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+    
+    reports = store.report_history(normalized_url, limit=limit)
+    response = jsonify({
+        'success': True,
+        'url': normalized_url,
+        'total': len(reports),
+        'reports': reports
     })
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+
+@main_bp.route('/api/changes', methods=['GET'])
+def report_changes():
+    """
+    Лента изменений отчетов
+    ---
+    tags:
+      - Monitoring
+    summary: Получить изменения между последовательными проверками
+    description: |
+      Возвращает только отличия каждого нового отчета от предыдущего отчета того же сайта
+      (ухудшения, улучшения и прочие изменения проверок) в порядке появления.
+      Для получения новых изменений передайте next_cursor из предыдущего ответа в параметре cursor.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: cursor
+        type: integer
+        default: 0
+        description: Идентификатор последнего полученного изменения
+      - in: query
+        name: limit
+        type: integer
+        default: 100
+        description: Максимальное количество изменений (не больше 500)
+      - in: query
+        name: url
+        type: string
+        required: false
+        description: Только изменения этого сайта
+      - in: query
+        name: direction
+        type: string
+        required: false
+        description: Направления через запятую (regression, improvement, mixed, changed)
+    responses:
+      200:
+        description: Изменения и курсор для следующего запроса
+      400:
+        description: Неизвестное направление
+    """
+    cursor = max(request.args.get('cursor', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    url = request.args.get('url', '').strip()
+    directions = [value.strip() for value in request.args.get('direction', '').split(',') if value.strip()]
+    
+    unknown = [value for value in directions if value not in DIRECTIONS]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f'Неизвестное направление: {", ".join(unknown)}'
+        }), 400
+    
+    store = current_app.extensions['report_store']
+    # Запрашиваем на одно изменение больше, чтобы узнать, есть ли продолжение
+    changes = store.changes(after_id=cursor, limit=limit + 1,
+                            url=normalize_url(url) if url else None, directions=directions)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    return jsonify({
+        'success': True,
+        'changes': changes,
+        'next_cursor': changes[-1]['id'] if changes else cursor,
+        'has_more': has_more
+    })
+
+
+@main_bp.route('/api/stats', methods=['GET'])
+def fleet_stats():
+    """
+    Сводная статистика по сохраненным проверкам
+    ---
+    tags:
+      - Monitoring
+    summary: Аналитика по всем сайтам
+    description: Перцентили оценок по категориям, доли статусов проверок, доля сайтов без HSTS/CSP, сроки сертификатов
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: group_by
+        type: string
+        enum: [level, scheme, tld]
+        required: false
+        description: Дополнительно сгруппировать оценки
+      - in: query
+        name: all
+        type: boolean
+        default: false
+        description: Учитывать все отчеты (по умолчанию - только последний отчет каждого URL)
+    responses:
+      200:
+        description: Статистика
+      400:
+        description: Неизвестный ключ группировки
+    """
+    from app.services.fleet_analytics import GROUP_KEYS, FleetAnalytics, fleet_summary, group_by
+    
+    group_key = request.args.get('group_by', '').strip()
+    if group_key and group_key not in GROUP_KEYS:
+        return jsonify({
+            'success': False,
+            'error': f'Неизвестный ключ группировки (допустимо: {", ".join(GROUP_KEYS)})'
+        }), 400
+    
+    latest_only = request.args.get('all', '').lower() not in ('1', 'true', 'yes')
+    analytics = current_app.extensions.setdefault('fleet_analytics', {})
+    if latest_only not in analytics:
+        analytics[latest_only] = FleetAnalytics(current_app.extensions['report_store'], latest_only)
+    frame = analytics[latest_only].frame()
+    
+    result = {'success': True, 'latest_only': latest_only, **fleet_summary(frame)}
+    if group_key:
+        result['groups'] = group_by(frame, group_key)
+    
+    return jsonify(result)
+
+
+@main_bp.route('/api/certificates', methods=['GET'])
+def expiring_certificates():
+    """
+    Сертификаты по сроку истечения
+    ---
+    tags:
+      - Monitoring
+    summary: Сертификаты, истекающие в заданном диапазоне
+    description: |
+      Индекс сроков сертификатов всех проверенных хостов, самые срочные первыми.
+      Диапазон задается within_days (от уже истекших до now + N дней) или from/to.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: within_days
+        type: number
+        required: false
+        description: Истекают в ближайшие N дней
+      - in: query
+        name: from
+        type: string
+        required: false
+        description: Начало диапазона (ISO 8601)
+      - in: query
+        name: to
+        type: string
+        required: false
+        description: Конец диапазона (ISO 8601)
+      - in: query
+        name: include_expired
+        type: boolean
+        default: true
+        description: Для within_days - включать уже истекшие
+      - in: query
+        name: limit
+        type: integer
+        default: 100
+        description: Размер страницы (не больше 1000)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: next_cursor предыдущей страницы
+    responses:
+      200:
+        description: Список сертификатов
+      400:
+        description: Некорректные параметры
+    """
+    index = current_app.extensions['cert_index']
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+        now = time.time()
+        start = end = None
+        if request.args.get('within_days'):
+            end = now + float(request.args['within_days']) * 86400
+            if request.args.get('include_expired', 'true').lower() in ('0', 'false', 'no'):
+                start = now
+        if request.args.get('from'):
+            start = parse_iso_time(request.args['from'])
+        if request.args.get('to'):
+            end = parse_iso_time(request.args['to'])
+        cursor = None
+        if request.args.get('cursor'):
+            not_after, host, port = request.args['cursor'].rsplit('|', 2)
+            cursor = (float(not_after), host, int(port))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Некорректные параметры диапазона'
+        }), 400
+    
+    certificates = index.expiring(start, end, limit=limit, cursor=cursor)
+    next_cursor = None
+    if len(certificates) == limit:
+        next_cursor = '|'.join(str(part) for part in certificates[-1]['cursor'])
+    for item in certificates:
+        del item['cursor']
+    
+    return jsonify({
+        'success': True,
+        'total_indexed': index.count(),
+        'certificates': certificates,
+        'next_cursor': next_cursor
+    })
+
+
+@main_bp.route('/api/certificates/refresh', methods=['POST'])
+def refresh_certificates():
+    """
+    Обновить сертификаты с подходящим к концу сроком
+    ---
+    tags:
+      - Monitoring
+    summary: Повторно получить только сертификаты, истекающие в ближайшие N дней
+    description: TLS соединение без полной проверки сайта; нужен заголовок X-Admin-Token со значением ADMIN_TOKEN
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            within_days:
+              type: number
+              example: 14
+    responses:
+      200:
+        description: Сводка обновления (checked, renewed, unchanged, errors)
+      403:
+        description: Токен администратора не задан или неверен
+    """
+    _require_admin()
+    data = request.get_json(silent=True) or {}
+    try:
+        within_days = float(data.get('within_days', current_app.config['MONITORING_CERT_THRESHOLD_DAYS']))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Некорректное значение within_days'}), 400
+    
+    summary = current_app.extensions['cert_index'].refresh(within_days)
+    return jsonify({'success': True, **summary})
+
+
+# Описание проверок и API не меняется во время работы: сериализуется один раз при запуске
+CHECKS_INFO = [
+    {
+        'name': 'Защищенное соединение (HTTPS)',
+        'category': 'connection',
+        'max_score': 15.0,
+        'description': 'Проверка использования HTTPS протокола'
+    },
+    {
+        'name': 'SSL сертификат',
+        'category': 'connection',
+        'max_score': 10.0,
+        'description': 'Проверка валидности и срока действия SSL сертификата'
+    },
+    {
+        'name': 'Принудительное использование HTTPS (HSTS)',
+        'category': 'headers',
+        'max_score': 12.0,
+        'description': 'Проверка наличия заголовка Strict-Transport-Security'
+    },
+    {
+        'name': 'Защита от встраивания (X-Frame-Options)',
+        'category': 'headers',
+        'max_score': 8.0,
+        'description': 'Проверка защиты от clickjacking атак'
+    },
+    {
+        'name': 'Защита от подмены типа файлов',
+        'category': 'headers',
+        'max_score': 8.0,
+        'description': 'Проверка заголовка X-Content-Type-Options'
+    },
+    {
+        'name': 'Политика безопасности контента (CSP)',
+        'category': 'headers',
+        'max_score': 12.0,
+        'description': 'Проверка Content-Security-Policy заголовка'
+    },
+    {
+        'name': 'Защита от XSS',
+        'category': 'headers',
+        'max_score': 5.0,
+        'description': 'Проверка заголовка X-XSS-Protection'
+    },
+    {
+        'name': 'Политика Referrer',
+        'category': 'headers',
+        'max_score': 5.0,
+        'description': 'Проверка заголовка Referrer-Policy'
+    },
+    {
+        'name': 'Политика доступа (Permissions-Policy)',
+        'category': 'headers',
+        'max_score': 5.0,
+        'description': 'Проверка заголовка Permissions-Policy'
+    },
+    {
+        'name': 'Скрытие информации о сервере',
+        'category': 'server',
+        'max_score': 10.0,
+        'description': 'Проверка отсутствия заголовков Server и X-Powered-By'
+    },
+    {
+        'name': 'Secure флаг в cookies',
+        'category': 'cookies',
+        'max_score': 3.0,
+        'description': 'Проверка использования Secure флага в cookies'
+    },
+    {
+        'name': 'HttpOnly флаг в cookies',
+        'category': 'cookies',
+        'max_score': 3.0,
+        'description': 'Проверка использования HttpOnly флага в cookies'
+    },
+    {
+        'name': 'SameSite атрибут в cookies',
+        'category': 'cookies',
+        'max_score': 2.0,
+        'description': 'Проверка использования SameSite атрибута в cookies'
+    },
+    {
+        'name': 'Наличие robots.txt',
+        'category': 'content',
+        'max_score': 2.0,
+        'description': 'Проверка наличия файла robots.txt'
+    },
+    {
+        'name': 'Защита от смешанного контента',
+        'category': 'content',
+        'max_score': 3.0,
+        'description': 'Проверка отсутствия смешанного HTTP/HTTPS контента'
+    },
+    {
+        'name': 'Скорость ответа сервера',
+        'category': 'content',
+        'max_score': 3.0,
+        'description': 'Проверка времени ответа сервера'
+    }
+]
+
+API_INFO = {
+    'name': 'Security Checker API',
+    'version': '1.0.0',
+    'description': 'REST API для проверки безопасности веб-сайтов',
+    'max_score': 106.0,
+    'endpoints': [
+        {
+            'path': '/api/check',
+            'method': 'POST',
+            'description': 'Проверка безопасности одного сайта'
+        },
+        {
+            'path': '/api/check/stream',
+            'method': 'POST',
+            'description': 'Проверка с выдачей результатов по мере готовности (NDJSON или SSE)'
+        },
+        {
+            'path': '/api/crawl',
+            'method': 'POST',
+            'description': 'Обход страниц сайта и сравнение их политик'
+        },
+        {
+            'path': '/api/check/batch',
+            'method': 'POST',
+            'description': 'Массовая проверка нескольких сайтов (до 10)'
+        },
+        {
+            'path': '/api/tasks',
+            'method': 'GET, POST',
+            'description': 'Очередь задач для распределенных воркеров'
+        },
+        {
+            'path': '/api/tasks/<id>',
+            'method': 'GET',
+            'description': 'Статус и результат задачи'
+        },
+        {
+            'path': '/api/watchlist',
+            'method': 'GET, POST, DELETE',
+            'description': 'Управление списком сайтов на мониторинге'
+        },
+        {
+            'path': '/api/history',
+            'method': 'GET',
+            'description': 'История проверок сайта'
+        },
+        {
+            'path': '/api/changes',
+            'method': 'GET',
+            'description': 'Лента изменений отчетов (ухудшения и улучшения) по курсору'
+        },
+        {
+            'path': '/api/stats',
+            'method': 'GET',
+            'description': 'Сводная статистика по сохраненным проверкам'
+        },
+        {
+            'path': '/api/certificates',
+            'method': 'GET',
+            'description': 'Сертификаты, истекающие в заданном диапазоне'
+        },
+        {
+            'path': '/api/certificates/refresh',
+            'method': 'POST',
+            'description': 'Повторное получение сертификатов, истекающих в ближайшие дни'
+        },
+        {
+            'path': '/api/checks',
+            'method': 'GET',
+            'description': 'Список всех доступных проверок'
+        },
+        {
+            'path': '/api/info',
+            'method': 'GET',
+            'description': 'Информация об API'
+        },
+        {
+            'path': '/api/health',
+            'method': 'GET',
+            'description': 'Проверка работоспособности API'
+        },
+        {
+            'path': '/api/health/hosts',
+            'method': 'GET',
+            'description': 'Состояние недоступных и блокирующих хостов'
+        },
+        {
+            'path': '/api/health/admission',
+            'method': 'GET',
+            'description': 'Выполняемые и ожидающие проверки, отказы'
+        },
+        {
+            'path': '/api/health/resources',
+            'method': 'GET',
+            'description': 'Потребление сетевых ресурсов проверками'
+        },
+        {
+            'path': '/api/health/webhooks',
+            'method': 'GET',
+            'description': 'Исходящая очередь webhooks'
+        },
+        {
+            'path': '/api/health/header-cache',
+            'method': 'GET',
+            'description': 'Кэши разбора заголовков безопасности'
+        },
+        {
+            'path': '/api/admin/profiles',
+            'method': 'GET',
+            'description': 'Артефакты профилирования проверок (требуется токен администратора)'
+        },
+        {
+            'path': '/api/admin/profiles/<name>',
+            'method': 'GET',
+            'description': 'Скачивание артефакта профилирования'
+        },
+        {
+            'path': '/api/docs',
+            'method': 'GET',
+            'description': 'Swagger документация'
+        }
+    ]
+}
+
+_CHECKS_RESPONSE = PreparedJson({'success': True, 'total': len(CHECKS_INFO), 'checks': CHECKS_INFO})
+_INFO_RESPONSE = PreparedJson(API_INFO)
+
+
+@main_bp.route('/api/checks', methods=['GET'])
+def get_available_checks():
+    """
+    Список всех доступных проверок безопасности
+    ---
+    tags:
+      - Security
+    summary: Получить список всех проверок
+    description: Возвращает информацию о всех доступных проверках безопасности
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Список проверок
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            checks:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                    example: "Защищенное соединение (HTTPS)"
+                  category:
+                    type: string
+                    example: "connection"
+                  max_score:
+                    type: number
+                    example: 15.0
+                  description:
+                    type: string
+    """
+    return _CHECKS_RESPONSE.response()
+
+
+@main_bp.route('/api/info', methods=['GET'])
+def api_info():
+    """
+    Информация об API
+    ---
+    tags:
+      - System
+    summary: Информация об API
+    description: Возвращает информацию о версии API и доступных endpoints
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Информация об API
+        schema:
+          type: object
+          properties:
+            name:
+              type: string
+              example: "Security Checker API"
+            version:
+              type: string
+              example: "1.0.0"
+            description:
+              type: string
+            endpoints:
+              type: array
+              items:
+                type: object
+            max_score:
+              type: number
+              example: 106.0
+    """
+    return _INFO_RESPONSE.response()
 
 
 @main_bp.route('/api/health', methods=['GET'])
@@ -529,3 +1669,196 @@ def health():
               example: "ok"
     """
     return jsonify({'status': 'ok'})
+
+
+@main_bp.route('/api/health/hosts', methods=['GET'])
+def hosts_health():
+    """
+    Состояние проверяемых хостов
+    ---
+    tags:
+      - System
+    summary: Хосты с разомкнутой цепью или кэшированным отказом
+    description: |
+      Хосты, которые подряд не отвечали (circuit breaker) или вернули 403/5xx.
+      connections - семейство адресов (ipv4/ipv6), выигравшее при последнем соединении
+      с хостом, адрес, время соединения и число неудачных попыток по семействам.
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Состояние хостов
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            hosts:
+              type: object
+    """
+    return jsonify({
+        'success': True,
+        'hosts': host_health.snapshot(),
+        'connections': connection_races.snapshot()
+    })
+
+
+@main_bp.route('/api/health/admission', methods=['GET'])
+def admission_status():
+    """
+    Загрузка очереди проверок
+    ---
+    tags:
+      - System
+    summary: Выполняемые и ожидающие проверки, отказы
+    description: Состояние контроля допуска - сколько проверок выполняется и ждет, сколько запросов отклонено
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Состояние контроля допуска
+    """
+    return jsonify({
+        'success': True,
+        'admission': current_app.extensions['admission'].snapshot()
+    })
+
+
+@main_bp.route('/api/health/resources', methods=['GET'])
+def resources_status():
+    """
+    Сетевые ресурсы проверок
+    ---
+    tags:
+      - System
+    summary: Суммарное потребление байт, соединений и запросов проверками
+    description: |
+      Суммы, средние и максимумы на проверку, число проверок, прерванных по каждому лимиту, и текущие лимиты.
+      Статистика текущего процесса (проверки в пуле процессов учитываются в процессах пула).
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Потребление ресурсов
+    """
+    return jsonify({
+        'success': True,
+        'resources': resource_totals.snapshot()
+    })
+
+
+@main_bp.route('/api/health/webhooks', methods=['GET'])
+def webhooks_status():
+    """
+    Доставка отчетов на адреса обратного вызова
+    ---
+    tags:
+      - System
+    summary: Исходящая очередь webhooks
+    description: |
+      Число событий в очереди (pending), недоставленных после всех попыток (failed) и удаленных
+      при переполнении очереди (dropped), доставленные события и пакеты, последние ошибки по адресам.
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Состояние доставки
+    """
+    return jsonify({
+        'success': True,
+        'webhooks': current_app.extensions['webhooks'].stats()
+    })
+
+
+@main_bp.route('/api/health/header-cache', methods=['GET'])
+def header_cache_status():
+    """
+    Кэш разбора заголовков
+    ---
+    tags:
+      - System
+    summary: Попадания и промахи кэшей разбора CSP, HSTS и атрибутов cookies
+    description: Статистика текущего процесса (процессы пула ведут собственные кэши)
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Статистика кэшей
+    """
+    return jsonify({
+        'success': True,
+        'caches': header_cache_info()
+    })
+
+
+def _require_admin():
+    """Проверяет токен администратора; без ADMIN_TOKEN административные endpoints закрыты"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token or not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        abort(403)
+
+
+@main_bp.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Сохраненные профили проверок
+    ---
+    tags:
+      - System
+    summary: Список артефактов профилирования
+    description: |
+      Профили проверок, запрошенных с заголовком X-Profile: 1 (или ?profile=1).
+      *.trace.json - Chrome trace-event (chrome://tracing, Perfetto), *.folded - свернутые стеки для flamegraph.
+      Доступно при PROFILING_ENABLED и заданном ADMIN_TOKEN; нужен заголовок X-Admin-Token.
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Список профилей
+      403:
+        description: Токен администратора не задан или неверен
+      404:
+        description: Профилирование выключено
+    """
+    _require_admin()
+    profiler = current_app.extensions.get('scan_profiler')
+    if profiler is None:
+        return jsonify({'success': False, 'error': 'Профилирование выключено'}), 404
+    
+    return jsonify({
+        'success': True,
+        'profiles': profiler.list_artifacts()
+    })
+
+
+@main_bp.route('/api/admin/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """
+    Скачать профиль проверки
+    ---
+    tags:
+      - System
+    summary: Артефакт профилирования
+    parameters:
+      - in: path
+        name: name
+        type: string
+        required: true
+        description: Имя файла из списка /api/admin/profiles
+    responses:
+      200:
+        description: Файл профиля
+      403:
+        description: Токен администратора не задан или неверен
+      404:
+        description: Профиль не найден или профилирование выключено
+    """
+    _require_admin()
+    profiler = current_app.extensions.get('scan_profiler')
+    path = profiler.artifact_path(name) if profiler else None
+    if path is None:
+        return jsonify({'success': False, 'error': 'Профиль не найден'}), 404
+    
+    mimetype = 'application/json' if name.endswith('.json') else 'text/plain'
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=name)
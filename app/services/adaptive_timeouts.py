@@ -0,0 +1,181 @@
+"""
+Адаптивные таймауты по хостам на основе наблюдаемых задержек
+"""
+import atexit
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+
+def host_key(url: str) -> str:
+    """Ключ хоста для статистики (host[:port] в нижнем регистре)"""
+    return urlparse(url).netloc.lower()
+
+
+@dataclass
+class LatencyEstimate:
+    """Сглаженная задержка и ее разброс (как RTO в TCP)"""
+    srtt: float
+    rttvar: float
+    samples: int = 1
+
+    def update(self, sample: float, alpha: float, beta: float):
+        self.rttvar = (1 - beta) * self.rttvar + beta * abs(self.srtt - sample)
+        self.srtt = (1 - alpha) * self.srtt + alpha * sample
+        self.samples += 1
+
+
+class AdaptiveTimeouts:
+    """
+    Таймауты соединения и чтения для каждого хоста
+
+    Таймаут = скользящее среднее + multiplier * разброс задержек хоста,
+    ограниченное снизу и сверху. Быстрые сайты получают короткий бюджет,
+    медленные, но стабильные - больший. Для неизвестных хостов используется
+    таймаут по умолчанию. Таймаут учитывается как наблюдение, равное
+    удвоенному бюджету, поэтому следующий бюджет для хоста растет.
+    """
+
+    def __init__(self, connect_floor: float = 1.0, connect_ceiling: float = 10.0,
+                 read_floor: float = 2.0, read_ceiling: float = 20.0,
+                 multiplier: float = 4.0, alpha: float = 0.125, beta: float = 0.25,
+                 flush_interval: float = 30.0):
+        self._estimates: Dict[Tuple[str, str], LatencyEstimate] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._store = None
+        self._atexit_registered = False
+        self._last_flush = time.time()
+        self.multiplier = multiplier
+        self.alpha = alpha
+        self.beta = beta
+        self.flush_interval = flush_interval
+        self.configure(connect_floor, connect_ceiling, read_floor, read_ceiling)
+
+    def configure(self, connect_floor: float, connect_ceiling: float,
+                  read_floor: float, read_ceiling: float):
+        """Меняет границы таймаутов (используется при создании приложения)"""
+        self.limits = {
+            'connect': (connect_floor, connect_ceiling),
+            'read': (read_floor, read_ceiling)
+        }
+
+    def attach_store(self, store):
+        """
+        Подключает хранилище: загружает сохраненные оценки и сохраняет новые
+
+        Несохраненные оценки уходят в прежнее хранилище до переключения.
+        Сохранение при выходе регистрируется один раз и пишет только
+        в хранилище, подключенное последним.
+        """
+        self._maybe_flush(force=True)
+        with self._lock:
+            self._store = store
+            for row in store.load_latency_estimates():
+                self._estimates[(row['host'], row['kind'])] = LatencyEstimate(
+                    srtt=row['srtt'], rttvar=row['rttvar'], samples=row['samples']
+                )
+            register, self._atexit_registered = not self._atexit_registered, True
+        if register:
+            atexit.register(self._maybe_flush, force=True)
+
+    def timeout(self, host: str, kind: str, default: float) -> float:
+        """
+        Таймаут для хоста
+
+        Args:
+            host: Ключ хоста (см. host_key)
+            kind: 'connect' или 'read'
+            default: Таймаут, если наблюдений по хосту еще нет
+        """
+        floor, ceiling = self.limits[kind]
+        with self._lock:
+            estimate = self._estimates.get((host, kind))
+            if estimate is None:
+                return default
+            value = estimate.srtt + self.multiplier * estimate.rttvar
+        return min(max(value, floor), ceiling)
+
+    def timeouts(self, host: str, default: float = 10.0) -> Tuple[float, float]:
+        """
+        Пара (connect, read) для requests
+
+        Время ответа включает установку соединения, поэтому пока нет
+        собственных наблюдений соединения, используется оценка чтения.
+        """
+        read = self.timeout(host, 'read', default)
+        connect_floor, connect_ceiling = self.limits['connect']
+        connect = self.timeout(host, 'connect', min(max(read, connect_floor), connect_ceiling))
+        return connect, read
+
+    def observe(self, host: str, kind: str, seconds: float):
+        """Добавляет наблюдение задержки"""
+        with self._lock:
+            key = (host, kind)
+            estimate = self._estimates.get(key)
+            if estimate is None:
+                self._estimates[key] = LatencyEstimate(srtt=seconds, rttvar=seconds / 2)
+            else:
+                estimate.update(seconds, self.alpha, self.beta)
+            self._dirty.add(key)
+        self._maybe_flush()
+
+    def observe_timeout(self, host: str, kind: str, budget: float):
+        """Запрос не уложился в бюджет: следующий бюджет должен быть больше"""
+        _, ceiling = self.limits[kind]
+        self.observe(host, kind, min(budget * 2, ceiling))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Текущие оценки по хостам"""
+        result = {}
+        with self._lock:
+            items = list(self._estimates.items())
+        for (host, kind), estimate in items:
+            result.setdefault(host, {})[kind] = {
+                'srtt': round(estimate.srtt, 4),
+                'rttvar': round(estimate.rttvar, 4),
+                'samples': estimate.samples,
+                'timeout': round(self.timeout(host, kind, 0.0), 3)
+            }
+        return result
+
+    def flush(self):
+        """Сохраняет измененные оценки в хранилище"""
+        with self._lock:
+            if self._store is None or not self._dirty:
+                return
+            rows = [
+                (host, kind, self._estimates[(host, kind)].srtt,
+                 self._estimates[(host, kind)].rttvar, self._estimates[(host, kind)].samples)
+                for host, kind in self._dirty
+            ]
+            self._dirty.clear()
+            self._last_flush = time.time()
+            store = self._store
+        store.save_latency_estimates(rows)
+
+    def _maybe_flush(self, force: bool = False):
+        if self._store is None:
+            return
+        if force or time.time() - self._last_flush >= self.flush_interval:
+            try:
+                self.flush()
+            except Exception:
+                # Ошибка хранилища не должна ломать проверку
+                pass
+
+
+# Общий экземпляр процесса
+adaptive_timeouts = AdaptiveTimeouts()
+
+
+def request_timeouts(url: str, default: float) -> Tuple[float, float]:
+    """Пара таймаутов (connect, read) для URL"""
+    return adaptive_timeouts.timeouts(host_key(url), default)
+
+
+def observe_response(url: str, elapsed_seconds: float):
+    """Учитывает время ответа на запрос к URL"""
+    adaptive_timeouts.observe(host_key(url), 'read', elapsed_seconds)
@@ -0,0 +1,193 @@
+"""
+Контроль допуска проверок: ограничение параллельности и очередь с приоритетами
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Приоритеты: меньше - важнее
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+
+class AdmissionRejected(Exception):
+    """Проверка не допущена: 429 (лимит клиента) или 503 (сервер перегружен)"""
+
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    client: str = field(compare=False)
+    state: str = field(default='waiting', compare=False)  # 'waiting', 'admitted', 'rejected'
+
+
+class AdmissionTicket:
+    """Допуск к выполнению проверки; release() можно вызывать повторно"""
+
+    def __init__(self, controller: 'AdmissionController', client: str):
+        self._controller = controller
+        self.client = client
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        self._controller._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    """
+    Допуск проверок к выполнению
+
+    Одновременно выполняется не больше max_concurrent проверок и не больше
+    per_client проверок одного клиента (вместе с ожидающими). Остальные ждут
+    в очереди с приоритетами: интерактивные проверки допускаются раньше
+    массовых, а при заполненной очереди вытесняют из нее массовые.
+    Если очередь заполнена или ожидание превысило max_wait, запрос сразу
+    получает отказ с рекомендуемой паузой (Retry-After): лишняя работа
+    отсекается на входе, и задержка допущенных проверок не растет с нагрузкой.
+    """
+
+    def __init__(self, max_concurrent: int = 8, per_client: int = 4,
+                 max_queue: int = 32, max_wait: float = 15.0):
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._clients: Dict[str, int] = {}  # Выполняемые и ожидающие проверки клиента
+        self._avg_duration = 5.0  # Скользящее среднее длительности проверки, сек
+        self._rejected = {'client_limit': 0, 'queue_full': 0, 'queue_timeout': 0, 'evicted': 0}
+        self.configure(max_concurrent, per_client, max_queue, max_wait)
+
+    def configure(self, max_concurrent: int, per_client: int, max_queue: int, max_wait: float):
+        with self._cond:
+            self.max_concurrent = max(1, max_concurrent)
+            self.per_client = max(1, per_client)
+            self.max_queue = max(0, max_queue)
+            self.max_wait = max_wait
+            self._dispatch()
+
+    def acquire(self, client: str, priority: int = PRIORITY_INTERACTIVE) -> AdmissionTicket:
+        """
+        Ожидает допуска проверки
+
+        Args:
+            client: Идентификатор клиента (например, IP адрес)
+            priority: PRIORITY_INTERACTIVE или PRIORITY_BATCH
+
+        Returns:
+            AdmissionTicket - после завершения проверки нужно вызвать release()
+
+        Raises:
+            AdmissionRejected: Лимит клиента, очередь заполнена или время ожидания истекло
+        """
+        with self._cond:
+            if self._clients.get(client, 0) >= self.per_client:
+                self._rejected['client_limit'] += 1
+                raise AdmissionRejected(
+                    429, 'Слишком много одновременных проверок от одного клиента', self._retry_after(0)
+                )
+
+            if self._running < self.max_concurrent and not self._waiting:
+                self._running += 1
+                self._clients[client] = self._clients.get(client, 0) + 1
+                return AdmissionTicket(self, client)
+
+            if len(self._waiting) >= self.max_queue:
+                worst = max(self._waiting) if self._waiting else None
+                if worst is None or worst.priority <= priority:
+                    self._rejected['queue_full'] += 1
+                    raise AdmissionRejected(503, 'Сервер перегружен, повторите позже', self._retry_after())
+                # Интерактивная проверка вытесняет последнюю массовую
+                self._remove_waiter(worst)
+                worst.state = 'rejected'
+                self._rejected['evicted'] += 1
+                self._cond.notify_all()
+
+            waiter = _Waiter(priority, next(self._seq), client)
+            heapq.heappush(self._waiting, waiter)
+            self._clients[client] = self._clients.get(client, 0) + 1
+
+            deadline = time.monotonic() + self.max_wait
+            while waiter.state == 'waiting':
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove_waiter(waiter)
+                    self._rejected['queue_timeout'] += 1
+                    raise AdmissionRejected(503, 'Сервер перегружен, повторите позже', self._retry_after())
+                self._cond.wait(remaining)
+
+            if waiter.state == 'rejected':
+                raise AdmissionRejected(503, 'Сервер перегружен, повторите позже', self._retry_after())
+            return AdmissionTicket(self, client)
+
+    def _remove_waiter(self, waiter: _Waiter):
+        self._waiting.remove(waiter)
+        heapq.heapify(self._waiting)
+        self._decrement_client(waiter.client)
+
+    def _decrement_client(self, client: str):
+        count = self._clients.get(client, 0) - 1
+        if count > 0:
+            self._clients[client] = count
+        else:
+            self._clients.pop(client, None)
+
+    def _release(self, ticket: AdmissionTicket):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._running -= 1
+            self._decrement_client(ticket.client)
+            duration = time.monotonic() - ticket.started
+            self._avg_duration += 0.2 * (duration - self._avg_duration)
+            self._dispatch()
+
+    def _dispatch(self):
+        """Допускает ожидающие проверки на освободившиеся места (вызывается под блокировкой)"""
+        admitted = False
+        while self._waiting and self._running < self.max_concurrent:
+            waiter = heapq.heappop(self._waiting)
+            waiter.state = 'admitted'
+            self._running += 1
+            admitted = True
+        if admitted:
+            self._cond.notify_all()
+
+    def _retry_after(self, queued: int = None) -> int:
+        """Оценка паузы до повторного запроса, сек"""
+        if queued is None:
+            queued = len(self._waiting)
+        return max(1, math.ceil(self._avg_duration * (queued + 1) / self.max_concurrent))
+
+    def snapshot(self) -> Dict:
+        """Текущая загрузка для мониторинга"""
+        with self._cond:
+            return {
+                'running': self._running,
+                'waiting': len(self._waiting),
+                'waiting_batch': sum(1 for waiter in self._waiting if waiter.priority == PRIORITY_BATCH),
+                'max_concurrent': self.max_concurrent,
+                'per_client': self.per_client,
+                'max_queue': self.max_queue,
+                'max_wait': self.max_wait,
+                'avg_scan_seconds': round(self._avg_duration, 2),
+                'rejected': dict(self._rejected)
+            }
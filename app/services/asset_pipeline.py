@@ -0,0 +1,444 @@
+"""
+Сборка статических файлов интерфейса: минификация, хэш содержимого в имени, сжатие gzip/br
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # br не обязателен: без пакета brotli отдаются gzip и исходный вариант
+    brotli = None
+
+# Имена с хэшем содержимого не меняются, поэтому кэшируются без перепроверки
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+MANIFEST_NAME = 'manifest.json'
+
+# Сжатие имеет смысл только для текстовых форматов (шрифты woff2 и картинки уже сжаты)
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ttf', '.eot')
+SOURCE_EXTENSIONS = ('.css', '.js', '.svg', '.woff', '.woff2', '.ttf', '.eot', '.png', '.jpg', '.gif', '.ico', '.webp')
+# Сжатый вариант хранится, только если он заметно меньше исходного
+MIN_COMPRESSION_RATIO = 0.9
+
+# Локальные копии библиотек CDN (python -m app.cli assets --vendor): путь в static/vendor -> адрес CDN
+VENDOR_FILES = {
+    'bootstrap/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'bootstrap-icons/bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/bootstrap-icons.css',
+    'bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff2',
+    'bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff',
+    'chart.js/chart.umd.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js'
+}
+
+_WORD = re.compile(r'[\w$\\]')
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")\s]+)\1\s*\)')
+_SOURCE_MAP = re.compile(r'/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=.*$', re.MULTILINE)
+# После этих символов и слов "/" начинает регулярное выражение, а не деление
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                   'yield', 'await')
+
+
+def _is_word(char: str) -> bool:
+    return bool(char) and (bool(_WORD.match(char)) or ord(char) > 127)
+
+
+def minify_js(source: str) -> str:
+    """
+    Консервативная минификация JavaScript
+
+    Удаляются комментарии, отступы, пустые строки и лишние пробелы;
+    строки, шаблонные строки и регулярные выражения копируются как есть.
+    Переводы строк сохраняются там, где от них может зависеть
+    автоматическая расстановка точек с запятой.
+    """
+    out: List[str] = []
+    # Вложенность шаблонных строк: глубина фигурных скобок внутри каждого ${...}
+    templates: List[int] = []
+    i, length = 0, len(source)
+
+    def last_char() -> str:
+        return out[-1][-1] if out else ''
+
+    def previous_word() -> str:
+        text = ''.join(out[-12:])
+        match = re.search(r'(?<![\w$])([A-Za-z_$]+)\s*$', text)
+        return match.group(1) if match else ''
+
+    def copy_template(start: int) -> int:
+        # Копирует текст шаблонной строки от ` или } до закрывающей ` или начала ${
+        j = start + 1
+        while j < length:
+            if source[j] == '\\':
+                j += 2
+                continue
+            if source[j] == '`':
+                out.append(source[start:j + 1])
+                templates.pop()
+                return j + 1
+            if source.startswith('${', j):
+                out.append(source[start:j + 2])
+                templates[-1] = 1
+                return j + 2
+            j += 1
+        out.append(source[start:])
+        return length
+
+    while i < length:
+        char = source[i]
+
+        if char in '\'"':
+            j = i + 1
+            while j < length and source[j] != char and source[j] != '\n':
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            continue
+
+        if char == '`':
+            templates.append(0)
+            i = copy_template(i)
+            continue
+
+        if templates and templates[-1] > 0 and char in '{}':
+            templates[-1] += 1 if char == '{' else -1
+            if templates[-1] == 0:
+                # Конец ${...}: продолжается текст шаблонной строки
+                i = copy_template(i)
+                continue
+            out.append(char)
+            i += 1
+            continue
+
+        if source.startswith('//', i):
+            while i < length and source[i] != '\n':
+                i += 1
+            continue
+
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = length if end < 0 else end + 2
+            # Комментарий между словами заменяется пробелом или переводом строки
+            source_comment = source[i:end]
+            i = end
+            if out and (i < length and not source[i].isspace()):
+                out.append('\n' if '\n' in source_comment else ' ')
+            continue
+
+        if char == '/':
+            prev = last_char()
+            if not prev or prev in _REGEX_PRECEDERS or prev == '\n' or previous_word() in _REGEX_KEYWORDS:
+                j = i + 1
+                in_class = False
+                while j < length and source[j] != '\n':
+                    if source[j] == '\\':
+                        j += 2
+                        continue
+                    if source[j] == '[':
+                        in_class = True
+                    elif source[j] == ']':
+                        in_class = False
+                    elif source[j] == '/' and not in_class:
+                        break
+                    j += 1
+                out.append(source[i:j + 1])
+                i = j + 1
+                continue
+
+        if char.isspace():
+            j = i
+            while j < length and source[j].isspace():
+                j += 1
+            newline = '\n' in source[i:j]
+            prev, nxt = last_char(), source[j] if j < length else ''
+            i = j
+            if not out or not nxt or prev == '\n':
+                continue
+            if newline:
+                if prev not in '{;,([' and nxt not in '}])':
+                    out.append('\n')
+            elif (_is_word(prev) and _is_word(nxt)) or (prev in '+-' and nxt in '+-'):
+                out.append(' ')
+            continue
+
+        out.append(char)
+        i += 1
+
+    return ''.join(out).strip()
+
+
+def minify_css(source: str) -> str:
+    """
+    Минификация CSS: комментарии, отступы и пробелы вокруг разделителей
+
+    Строки и url(...) копируются как есть, пробелы внутри calc() и
+    между частями селекторов сохраняются.
+    """
+    out: List[str] = []
+    i, length = 0, len(source)
+
+    def last_char() -> str:
+        return out[-1][-1] if out else ''
+
+    while i < length:
+        char = source[i]
+        if char in '\'"':
+            j = i + 1
+            while j < length and source[j] != char:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+            continue
+        if source.startswith('url(', i) and source[i + 4:i + 5] not in ('"', "'"):
+            end = source.find(')', i)
+            end = length if end < 0 else end + 1
+            out.append(source[i:end])
+            i = end
+            continue
+        if char.isspace():
+            j = i
+            while j < length and source[j].isspace():
+                j += 1
+            nxt = source[j] if j < length else ''
+            i = j
+            if out and nxt and last_char() not in '{};,:>' and nxt not in '{};,>!':
+                out.append(' ')
+            continue
+        if char == '}' and last_char() == ';':
+            out[-1] = out[-1][:-1]
+        out.append(char)
+        i += 1
+    return ''.join(out).strip()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """css/style.css -> css/style.<хэш>.css"""
+    root, ext = posixpath.splitext(name)
+    return f'{root}.{digest}{ext}'
+
+
+@dataclass
+class Asset:
+    """Собранный файл: имя с хэшем и варианты по Content-Encoding"""
+    name: str
+    url_name: str
+    digest: str
+    content_type: str
+    variants: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    def choose(self, accept_encodings) -> str:
+        """Лучший вариант для Accept-Encoding клиента (br, gzip, identity)"""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings.quality(encoding) > 0:
+                return encoding
+        return 'identity'
+
+    def to_dict(self) -> Dict:
+        return {
+            'url_name': self.url_name,
+            'digest': self.digest,
+            'content_type': self.content_type,
+            'size': len(self.variants['identity']),
+            'encodings': {encoding: len(data) for encoding, data in self.variants.items()}
+        }
+
+
+class AssetPipeline:
+    """
+    Сборка файлов из static/ в каталог с именами по хэшу содержимого
+
+    CSS и JS минифицируются (кроме уже минифицированных *.min.*), ссылки
+    url(...) в CSS заменяются на имена с хэшем, текстовые файлы сжимаются
+    gzip и, при установленном brotli, br. Сборка записывается на диск вместе
+    с manifest.json (ее можно выполнить заранее: python -m app.cli assets)
+    и держится в памяти для ответов. Имя меняется вместе с содержимым,
+    поэтому файлы отдаются с Cache-Control: immutable.
+    """
+
+    def __init__(self, static_dir: str, build_dir: str):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self._lock = threading.Lock()
+        self._assets: Dict[str, Asset] = {}
+        self._by_url: Dict[str, Asset] = {}
+
+    def _sources(self) -> List[str]:
+        names = []
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                if filename.lower().endswith(SOURCE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    names.append(os.path.relpath(path, self.static_dir).replace(os.sep, '/'))
+        # CSS последними: к этому моменту известны имена шрифтов и картинок, на которые он ссылается
+        return sorted(names, key=lambda name: (name.endswith('.css'), name))
+
+    def _rewrite_urls(self, name: str, css: str, assets: Dict[str, Asset]) -> str:
+        base = posixpath.dirname(name)
+
+        def replace(match):
+            reference = match.group(2)
+            if reference.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+                return match.group(0)
+            path = posixpath.normpath(posixpath.join(base, reference.split('?', 1)[0].split('#', 1)[0]))
+            asset = assets.get(path)
+            if asset is None:
+                return match.group(0)
+            relative = posixpath.relpath(asset.url_name, base or '.')
+            return f'url("{relative}")'
+
+        return _CSS_URL.sub(replace, css)
+
+    def _process(self, name: str, data: bytes, assets: Dict[str, Asset]) -> bytes:
+        minified = '.min.' in posixpath.basename(name)
+        if name.endswith('.css'):
+            css = self._rewrite_urls(name, data.decode('utf-8'), assets)
+            css = _SOURCE_MAP.sub('', css)
+            return (css if minified else minify_css(css)).encode('utf-8')
+        if name.endswith('.js'):
+            script = _SOURCE_MAP.sub('', data.decode('utf-8'))
+            return (script if minified else minify_js(script)).encode('utf-8')
+        return data
+
+    @staticmethod
+    def _compress(name: str, data: bytes) -> Dict[str, bytes]:
+        variants = {'identity': data}
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return variants
+        compressed = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(data, quality=11)
+        for encoding, body in compressed.items():
+            if len(body) < len(data) * MIN_COMPRESSION_RATIO:
+                variants[encoding] = body
+        return variants
+
+    def _write(self, relative: str, data: bytes):
+        path = os.path.join(self.build_dir, *relative.split('/'))
+        if os.path.exists(path):
+            # Имя содержит хэш: файл с тем же именем уже собран (в том числе другим процессом)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def build(self) -> Dict[str, Asset]:
+        """
+        Собирает все файлы static/ и записывает сборку и manifest.json
+
+        Returns:
+            Собранные файлы по исходным именам
+        """
+        assets: Dict[str, Asset] = {}
+        for name in self._sources():
+            with open(os.path.join(self.static_dir, *name.split('/')), 'rb') as f:
+                data = self._process(name, f.read(), assets)
+            digest = content_hash(data)
+            content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            asset = Asset(name, hashed_name(name, digest), digest, content_type, self._compress(name, data))
+            assets[name] = asset
+            self._write(asset.url_name, data)
+            for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+                if encoding in asset.variants:
+                    self._write(asset.url_name + suffix, asset.variants[encoding])
+
+        manifest = {name: asset.to_dict() for name, asset in assets.items()}
+        os.makedirs(self.build_dir, exist_ok=True)
+        temporary = os.path.join(self.build_dir, f'{MANIFEST_NAME}.{os.getpid()}.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temporary, os.path.join(self.build_dir, MANIFEST_NAME))
+        self._install(assets)
+        return assets
+
+    def load(self) -> Dict[str, Asset]:
+        """
+        Загружает заранее собранные файлы по manifest.json
+
+        Returns:
+            Собранные файлы (пустой словарь, если сборки нет)
+        """
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST_NAME), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        assets: Dict[str, Asset] = {}
+        for name, entry in manifest.items():
+            path = os.path.join(self.build_dir, *entry['url_name'].split('/'))
+            variants = {}
+            try:
+                for encoding in entry['encodings']:
+                    suffix = {'identity': '', 'gzip': '.gz', 'br': '.br'}[encoding]
+                    with open(path + suffix, 'rb') as f:
+                        variants[encoding] = f.read()
+            except (OSError, KeyError):
+                continue
+            assets[name] = Asset(name, entry['url_name'], entry['digest'], entry['content_type'], variants)
+        self._install(assets)
+        return assets
+
+    def _install(self, assets: Dict[str, Asset]):
+        with self._lock:
+            self._assets = assets
+            self._by_url = {asset.url_name: asset for asset in assets.values()}
+
+    def url_name(self, name: str) -> Optional[str]:
+        """Имя с хэшем для исходного имени (None - файл не собран)"""
+        asset = self._assets.get(name)
+        return asset.url_name if asset else None
+
+    def get(self, url_name: str) -> Optional[Asset]:
+        return self._by_url.get(url_name)
+
+    def stats(self) -> Dict:
+        assets = list(self._assets.values())
+        return {
+            'assets': len(assets),
+            'bytes': sum(len(asset.variants['identity']) for asset in assets),
+            'brotli': brotli is not None
+        }
+
+
+def vendor_assets(static_dir: str, session=None, force: bool = False) -> List[str]:
+    """
+    Скачивает библиотеки CDN в static/vendor для работы интерфейса без доступа к CDN
+
+    Returns:
+        Пути скачанных файлов относительно static/
+    """
+    import requests
+
+    session = session or requests.Session()
+    downloaded = []
+    for name, url in VENDOR_FILES.items():
+        path = os.path.join(static_dir, 'vendor', *name.split('/'))
+        if os.path.exists(path) and not force:
+            continue
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        downloaded.append(f'vendor/{name}')
+    return downloaded
@@ -1,66 +1,39 @@
 """
 Базовый класс для проверок безопасности
 """
-import requests
-import warnings
 from typing import List
 from app.models.security_result import CheckResult
-
-# Игнорируем предупреждения о небезопасных SSL запросах
-warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+from app.services.scan_io import ScanIO
 
 
 class BaseChecker:
     """Базовый класс для всех проверок"""
     
-    def __init__(self, url: str):
+    def __init__(self, url: str, io: ScanIO = None):
         self.url = url
-        self.session = None
+        # Сетевые данные проверки (общие для всех проверок одного сайта)
+        self.io = io or ScanIO(url)
+        self.page = None
         self.response = None
         self.headers = {}
         
-    def _make_request(self, timeout: int = 10) -> bool:
+    def _make_request(self) -> bool:
         """
-        Выполняет HTTP запрос
+        Получает ответ страницы (запрос выполняется один раз на проверку сайта)
         
         Returns:
             True если запрос успешен
         """
-        # Заголовки для имитации обычного браузера
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        try:
-            self.session = requests.Session()
-            self.response = self.session.get(
-                self.url,
-                timeout=timeout,
-                verify=False,
-                allow_redirects=True,
-                headers=headers
-            )
-            
-            # Собираем все заголовки из истории редиректов и финального ответа
-            self.headers = {}
-            for hist_response in self.response.history:
-                for k, v in hist_response.headers.items():
-                    k_lower = k.lower()
-                    if k_lower not in self.headers:
-                        self.headers[k_lower] = v
-            
-            # Добавляем заголовки финального ответа (приоритет)
-            for k, v in self.response.headers.items():
-                self.headers[k.lower()] = v
-            
-            return True
-        except Exception as e:
+        self.page = self.io.page()
+        if not self.page.ok:
             return False
+        
+        # Финальный ответ и заголовки всей цепочки редиректов
+        # (из редиректов берется первое значение, финальный ответ имеет приоритет)
+        self.response = self.page.final
+        self.headers = self.page.merged_headers()
+        
+        return True
     
     def check_header(self, header_name: str, variants: List[str] = None) -> tuple:
         """
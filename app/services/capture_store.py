@@ -0,0 +1,145 @@
+"""
+Хранилище сырых данных проверок (сжатые захваты)
+"""
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from app.models.scan_capture import ScanCapture
+
+# Предустановленный словарь zlib: частые имена заголовков и значения.
+# Захваты небольшие, и без словаря zlib почти не успевает их сжать.
+# Менять нельзя: по нему распаковываются уже сохраненные захваты (формат 1).
+CAPTURE_ZDICT = (
+    b'{"url":"https://","timestamp":"","page":{"hops":[{"status_code":200,"headers":[['
+    b'"Content-Type","text/html; charset=utf-8"],["Content-Length",["Content-Encoding","gzip"],'
+    b'["Date",["Server","nginx"],["Connection","keep-alive"],["Cache-Control","no-cache"],'
+    b'["Vary","Accept-Encoding"],["Set-Cookie","; Path=/; HttpOnly; Secure; SameSite=Lax"],'
+    b'["Strict-Transport-Security","max-age=31536000; includeSubDomains; preload"],'
+    b'["Content-Security-Policy","default-src \'self\'"],["X-Frame-Options","SAMEORIGIN"],'
+    b'["X-Content-Type-Options","nosniff"],["X-XSS-Protection","1; mode=block"],'
+    b'["Referrer-Policy","strict-origin-when-cross-origin"],["Permissions-Policy",'
+    b'["Location",["X-Powered-By",["Expires",["Last-Modified",["ETag",'
+    b'"elapsed_ms":,"error":null,"error_kind":null}],"robots":{"certificate":{"hostname":'
+    b'"port":443,"fields":{"subject":[[["commonName","issuer":[[["countryName","US"]],'
+    b'[["organizationName","Let\'s Encrypt"]],"version":3,"serialNumber":"notBefore":'
+    b'"notAfter":"GMT","subjectAltName":[["DNS","connect_ms":'
+)
+CAPTURE_FORMAT = 1
+
+
+def pack_capture(capture: ScanCapture) -> bytes:
+    """Сериализует захват в компактный сжатый вид"""
+    raw = json.dumps(capture.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    compressor = zlib.compressobj(level=6, zdict=CAPTURE_ZDICT)
+    return compressor.compress(raw) + compressor.flush()
+
+
+def unpack_capture(data: bytes) -> ScanCapture:
+    """Восстанавливает захват из сжатого вида"""
+    decompressor = zlib.decompressobj(zdict=CAPTURE_ZDICT)
+    raw = decompressor.decompress(data) + decompressor.flush()
+    return ScanCapture.from_dict(json.loads(raw))
+
+
+class CaptureStore:
+    """Захваты проверок в SQLite (одна запись - одна проверка)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS captures (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            format INTEGER NOT NULL,
+            data BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_captures_url ON captures (url, id);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._write_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, capture: ScanCapture) -> int:
+        """Сохраняет захват и возвращает его идентификатор"""
+        data = pack_capture(capture)
+        with self._write_lock, self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO captures (url, timestamp, format, data) VALUES (?, ?, ?, ?)',
+                (capture.url, capture.timestamp, CAPTURE_FORMAT, data)
+            )
+            return cursor.lastrowid
+
+    def get(self, capture_id: int) -> Optional[ScanCapture]:
+        """Возвращает захват по идентификатору"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM captures WHERE id = ?', (capture_id,)).fetchone()
+        return unpack_capture(row[0]) if row else None
+
+    def iter_captures(self, url: str = None, latest_only: bool = False,
+                      batch_size: int = 500) -> Iterator[ScanCapture]:
+        """
+        Перебирает захваты порциями (не загружая все в память)
+
+        Args:
+            url: Только захваты этого URL
+            latest_only: Только последний захват каждого URL
+            batch_size: Размер порции чтения
+        """
+        where = []
+        params = []
+        if url:
+            where.append('url = ?')
+            params.append(url)
+        if latest_only:
+            where.append('id IN (SELECT MAX(id) FROM captures GROUP BY url)')
+        where_sql = f'WHERE {" AND ".join(where)}' if where else ''
+
+        last_id = 0
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f'SELECT id, data FROM captures {where_sql} {"AND" if where else "WHERE"} id > ? '
+                    f'ORDER BY id LIMIT ?',
+                    params + [last_id, batch_size]
+                ).fetchall()
+            if not rows:
+                return
+            for capture_id, data in rows:
+                last_id = capture_id
+                yield unpack_capture(data)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM captures').fetchone()[0]
+
+
+# Хранилище, в которое сохраняются захваты всех проверок процесса (None - захват выключен)
+_default_store: Optional[CaptureStore] = None
+
+
+def set_default_capture_store(store: Optional[CaptureStore]):
+    """Включает (или выключает, если None) сохранение захватов всех проверок"""
+    global _default_store
+    _default_store = store
+
+
+def get_default_capture_store() -> Optional[CaptureStore]:
+    return _default_store
@@ -0,0 +1,210 @@
+"""
+Индекс сроков действия сертификатов (SQLite)
+"""
+import os
+import sqlite3
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from app.models.scan_capture import CertificateInfo
+
+DAY = 86400
+
+
+def _name(fields: Dict, key: str) -> Optional[str]:
+    """commonName (или organizationName) из subject/issuer getpeercert()"""
+    attributes = dict(pair for rdn in fields.get(key, ()) for pair in rdn)
+    return attributes.get('commonName') or attributes.get('organizationName')
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class CertificateIndex:
+    """
+    Сроки действия сертификатов всех проверенных хостов, упорядоченные по дате истечения
+
+    Обновляется каждой проверкой, получившей сертификат. Запрос "истекают
+    между X и Y" - диапазон по индексу not_after, поэтому не зависит от числа
+    хостов. refresh() заново запрашивает только сертификаты, срок которых
+    подходит к концу, - без полной перепроверки всех сайтов.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS certificates (
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            not_after REAL NOT NULL,
+            subject TEXT,
+            issuer TEXT,
+            last_seen REAL NOT NULL,
+            last_error TEXT,
+            PRIMARY KEY (host, port)
+        );
+        CREATE INDEX IF NOT EXISTS idx_certificates_expiry ON certificates (not_after, host, port);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, url: str, certificate: CertificateInfo, seen_at: float = None) -> bool:
+        """
+        Обновляет запись хоста по сертификату из проверки
+
+        Returns:
+            True, если срок действия известен и запись обновлена
+        """
+        if certificate is None or certificate.error or 'notAfter' not in (certificate.fields or {}):
+            return False
+        not_after = ssl.cert_time_to_seconds(certificate.fields['notAfter'])
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                '''INSERT INTO certificates (host, port, url, not_after, subject, issuer, last_seen, last_error)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+                   ON CONFLICT (host, port) DO UPDATE SET
+                       url = excluded.url, not_after = excluded.not_after, subject = excluded.subject,
+                       issuer = excluded.issuer, last_seen = excluded.last_seen, last_error = NULL''',
+                (certificate.hostname.lower(), certificate.port, url, not_after,
+                 _name(certificate.fields, 'subject'), _name(certificate.fields, 'issuer'),
+                 seen_at or time.time())
+            )
+        return True
+
+    def _record_error(self, host: str, port: int, error: str):
+        with self._write_lock, self._connect() as conn:
+            conn.execute('UPDATE certificates SET last_error = ? WHERE host = ? AND port = ?',
+                         (error[:200], host, port))
+
+    def expiring(self, start: float = None, end: float = None, limit: int = 100,
+                 cursor: Tuple[float, str, int] = None) -> List[Dict]:
+        """
+        Сертификаты, истекающие в диапазоне [start, end], самые срочные первыми
+
+        Args:
+            start: Начало диапазона (unix time), None - включая уже истекшие
+            end: Конец диапазона (unix time), None - без ограничения
+            limit: Размер страницы
+            cursor: (not_after, host, port) последней записи предыдущей страницы
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append('not_after >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('not_after <= ?')
+            params.append(end)
+        if cursor is not None:
+            conditions.append('(not_after, host, port) > (?, ?, ?)')
+            params.extend(cursor)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT * FROM certificates {where} ORDER BY not_after, host, port LIMIT ?',
+                params + [limit]
+            ).fetchall()
+
+        now = time.time()
+        return [{
+            'host': row['host'],
+            'port': row['port'],
+            'url': row['url'],
+            'not_after': _iso(row['not_after']),
+            'days_left': int((row['not_after'] - now) // DAY),
+            'subject': row['subject'],
+            'issuer': row['issuer'],
+            'last_seen': _iso(row['last_seen']),
+            'last_error': row['last_error'],
+            'cursor': [row['not_after'], row['host'], row['port']]
+        } for row in rows]
+
+    def expiring_within(self, days: float, include_expired: bool = True, limit: int = 100) -> List[Dict]:
+        """Сертификаты, истекающие в ближайшие days дней"""
+        now = time.time()
+        return self.expiring(None if include_expired else now, now + days * DAY, limit)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM certificates').fetchone()[0]
+
+    def refresh(self, within_days: float, probe: Callable[[str, str, int], CertificateInfo] = None,
+                min_age: float = 3600, concurrency: int = 8, limit: int = 1000) -> Dict:
+        """
+        Заново получает сертификаты, истекающие в ближайшие within_days дней
+
+        Продленный сертификат уходит из диапазона, поэтому повторные вызовы
+        затрагивают только хосты, которые все еще не обновили сертификат.
+
+        Args:
+            within_days: Горизонт в днях (включая уже истекшие)
+            probe: Функция (url, host, port) -> CertificateInfo (по умолчанию - TLS соединение)
+            min_age: Не обновлять записи, проверенные меньше min_age секунд назад
+            concurrency: Число одновременных TLS соединений
+            limit: Максимум обновляемых записей за вызов
+
+        Returns:
+            Сводка: сколько проверено, продлено, без изменений и с ошибками
+        """
+        if probe is None:
+            from app.services.http_fetch import fetch_certificate as probe
+
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                '''SELECT host, port, url, not_after FROM certificates
+                   WHERE not_after <= ? AND last_seen <= ? ORDER BY not_after LIMIT ?''',
+                (now + within_days * DAY, now - min_age, limit)
+            ).fetchall()
+
+        def refresh_one(row) -> str:
+            certificate = probe(row['url'], row['host'], row['port'])
+            if not self.record(row['url'], certificate):
+                self._record_error(row['host'], row['port'], certificate.error or 'Срок действия не получен')
+                return 'errors'
+            with self._connect() as conn:
+                updated = conn.execute('SELECT not_after FROM certificates WHERE host = ? AND port = ?',
+                                       (row['host'], row['port'])).fetchone()
+            return 'renewed' if updated['not_after'] > row['not_after'] else 'unchanged'
+
+        summary = {'checked': len(rows), 'renewed': 0, 'unchanged': 0, 'errors': 0}
+        if rows:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(rows))) as executor:
+                for outcome in executor.map(refresh_one, rows):
+                    summary[outcome] += 1
+        return summary
+
+
+# Индекс процесса (None - не ведется)
+_default_index: Optional[CertificateIndex] = None
+
+
+def set_default_cert_index(index: Optional[CertificateIndex]):
+    global _default_index
+    _default_index = index
+
+
+def get_default_cert_index() -> Optional[CertificateIndex]:
+    return _default_index
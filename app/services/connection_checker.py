@@ -1,8 +1,6 @@
 """
 Проверка соединения и SSL
 """
-import ssl
-import socket
 from datetime import datetime
 from typing import List
 from app.models.security_result import CheckResult
@@ -50,45 +48,49 @@ class ConnectionChecker(BaseChecker):
     def _check_ssl_certificate(self, hostname: str, port: int) -> CheckResult:
         """Проверяет SSL сертификат"""
         try:
-            context = ssl.create_default_context()
-            with socket.create_connection((hostname, port), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    # Проверка срока действия
-                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    days_until_expiry = (not_after - datetime.now()).days
-                    
-                    if days_until_expiry > 30:
-                        return CheckResult(
-                            name='Сертификат безопасности',
-                            status='success',
-                            score=10.0,
-                            max_score=10.0,
-                            message=f'Сертификат действителен до {not_after.strftime("%d.%m.%Y")}',
-                            category='connection',
-                            details={'expiry_date': not_after.isoformat(), 'days_left': days_until_expiry}
-                        )
-                    elif days_until_expiry > 0:
-                        return CheckResult(
-                            name='Сертификат безопасности',
-                            status='warning',
-                            score=7.0,
-                            max_score=10.0,
-                            message=f'Сертификат скоро истечет (через {days_until_expiry} дней)',
-                            category='connection',
-                            details={'expiry_date': not_after.isoformat(), 'days_left': days_until_expiry}
-                        )
-                    else:
-                        return CheckResult(
-                            name='Сертификат безопасности',
-                            status='danger',
-                            score=0.0,
-                            max_score=10.0,
-                            message='Сертификат истек',
-                            category='connection',
-                            details={'critical': True}
-                        )
+            certificate = self.io.certificate(hostname, port)
+            if certificate.error:
+                raise ConnectionError(certificate.error)
+            cert = certificate.fields
+            
+            # Проверка срока действия
+            not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+            days_until_expiry = (not_after - self.io.reference_time).days
+            
+            if days_until_expiry > 30:
+                return CheckResult(
+                    name='Сертификат безопасности',
+                    status='success',
+                    score=10.0,
+                    max_score=10.0,
+                    message=f'Сертификат действителен до {not_after.strftime("%d.%m.%Y")}',
+                    category='connection',
+                    details={'expiry_date': not_after.isoformat(), 'days_left': days_until_expiry}
+                )
+            elif days_until_expiry > 0:
+                return CheckResult(
+                    name='Сертификат безопасности',
+                    status='warning',
+                    score=7.0,
+                    max_score=10.0,
+                    message=f'Сертификат скоро истечет (через {days_until_expiry} дней)',
+                    category='connection',
+                    details={'expiry_date': not_after.isoformat(), 'days_left': days_until_expiry}
+                )
+            else:
+                return CheckResult(
+                    name='Сертификат безопасности',
+                    status='danger',
+                    score=0.0,
+                    max_score=10.0,
+                    message='Сертификат истек',
+                    category='connection',
+                    details={
+                        'critical': True,
+                        'expiry_date': not_after.isoformat(),
+                        'days_left': days_until_expiry
+                    }
+                )
         except Exception as e:
             return CheckResult(
                 name='Сертификат безопасности',
@@ -4,6 +4,7 @@
 from typing import List
 from app.models.security_result import CheckResult
 from app.services.base_checker import BaseChecker
+from app.utils.header_parser import parse_csp
 from urllib.parse import urlparse
 
 
@@ -36,22 +37,16 @@ class ContentChecker(BaseChecker):
     
     def _check_robots(self) -> CheckResult:
         """Проверяет наличие robots.txt"""
-        try:
-            parsed = urlparse(self.url)
-            robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-            
-            response = self.session.get(robots_url, timeout=5, verify=False)
-            if response.status_code == 200:
-                return CheckResult(
-                    name='Файл robots.txt',
-                    status='success',
-                    score=2.0,
-                    max_score=2.0,
-                    message='Файл robots.txt найден',
-                    category='content'
-                )
-        except:
-            pass
+        robots = self.io.robots()
+        if robots.ok and robots.final.status_code == 200:
+            return CheckResult(
+                name='Файл robots.txt',
+                status='success',
+                score=2.0,
+                max_score=2.0,
+                message='Файл robots.txt найден',
+                category='content'
+            )
         
         # Более мягкая оценка: даем 80% баллов даже если файл не найден
         return CheckResult(
@@ -70,8 +65,8 @@ class ContentChecker(BaseChecker):
             return None
         
         # Проверяем заголовок Content-Security-Policy на наличие upgrade-insecure-requests
-        csp = self.headers.get('content-security-policy', '')
-        if 'upgrade-insecure-requests' in csp.lower():
+        policies = parse_csp(self.headers.get('content-security-policy', ''))
+        if any('upgrade-insecure-requests' in policy.directives for policy in policies):
             return CheckResult(
                 name='Защита от смешанного контента',
                 status='success',
@@ -93,8 +88,8 @@ class ContentChecker(BaseChecker):
     
     def _check_response_time(self) -> CheckResult:
         """Проверяет время ответа сервера"""
-        if hasattr(self.response, 'elapsed'):
-            elapsed_ms = self.response.elapsed.total_seconds() * 1000
+        if self.response is not None:
+            elapsed_ms = self.response.elapsed_ms
             
             if elapsed_ms < 500:
                 score = 3.0
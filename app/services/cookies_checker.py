@@ -4,6 +4,7 @@
 from typing import List
 from app.models.security_result import CheckResult
 from app.services.base_checker import BaseChecker
+from app.utils.header_parser import parse_set_cookies
 
 
 class CookiesChecker(BaseChecker):
@@ -14,7 +15,10 @@ class CookiesChecker(BaseChecker):
         if not self._make_request():
             return []
         
-        cookies = self.response.cookies
+        # Set-Cookie заголовки всей цепочки редиректов с разобранными атрибутами и ответом, который их установил
+        set_by = [(hop, cookie) for hop, value in self.page.hop_cookies()
+                  for cookie in parse_set_cookies([value])]
+        cookies = [cookie for _, cookie in set_by]
         
         if not cookies:
             return [CheckResult(
@@ -26,49 +30,15 @@ class CookiesChecker(BaseChecker):
                 category='cookies'
             )]
         
-        # Собираем Set-Cookie заголовки
-        set_cookie_headers = []
-        for header_name, header_value in self.response.headers.items():
-            if header_name.lower() == 'set-cookie':
-                set_cookie_headers.append(header_value)
-        
-        # Проверяем историю редиректов
-        for hist_response in self.response.history:
-            for header_name, header_value in hist_response.headers.items():
-                if header_name.lower() == 'set-cookie':
-                    set_cookie_headers.append(header_value)
-        
-        if not set_cookie_headers:
-            # Используем информацию из объектов cookies
-            secure_count = sum(1 for cookie in cookies if cookie.secure)
-            total = len(cookies)
-            
-            score = 4.0 if secure_count == total else 2.0 if secure_count > 0 else 0.0
-            
-            return [CheckResult(
-                name='Безопасность файлов cookies',
-                status='success' if score >= 4.0 else 'warning' if score > 0 else 'danger',
-                score=score,
-                max_score=8.0,
-                message=f'Cookies: {total} найдено, Secure: {secure_count}/{total}',
-                category='cookies',
-                details={'total': total, 'secure': secure_count}
-            )]
-        
-        # Анализируем заголовки
-        secure_count = 0
-        httponly_count = 0
-        samesite_count = 0
+        # Анализируем атрибуты
         total = len(cookies)
-        
-        for cookie_header in set_cookie_headers:
-            cookie_lower = cookie_header.lower()
-            if '; secure' in cookie_lower or cookie_lower.startswith('secure'):
-                secure_count += 1
-            if '; httponly' in cookie_lower or 'httponly' in cookie_lower:
-                httponly_count += 1
-            if 'samesite=' in cookie_lower:
-                samesite_count += 1
+        # Cookie с Secure из ответа по HTTP браузер отклоняет, без Secure - передает открыто
+        secure_count = sum(1 for hop, cookie in set_by if cookie.attributes.secure and hop.secure)
+        httponly_count = sum(1 for cookie in cookies if cookie.attributes.httponly)
+        samesite_count = sum(1 for cookie in cookies if cookie.attributes.samesite_valid)
+        issues = [issue for cookie in cookies for issue in cookie.issues()]
+        issues += [f'{cookie.name}: установлена ответом по HTTP ({hop.url})'
+                   for hop, cookie in set_by if not hop.secure]
         
         # Рассчитываем оценку
         score = 0.0
@@ -88,6 +58,9 @@ class CookiesChecker(BaseChecker):
             score += 1.0
         
         status = 'success' if score >= 7.0 else 'warning' if score >= 4.0 else 'danger'
+        # Cookie с нарушенным префиксом браузер отклонит, cookie из ответа по HTTP передаются открыто
+        if issues and status == 'success':
+            status = 'warning'
         
         return [CheckResult(
             name='Безопасность файлов cookies',
@@ -100,7 +73,9 @@ class CookiesChecker(BaseChecker):
                 'total': total,
                 'secure': secure_count,
                 'httponly': httponly_count,
-                'samesite': samesite_count
+                'samesite': samesite_count,
+                'cookies': [dict(cookie.to_dict(), set_by=hop.url) for hop, cookie in set_by],
+                'issues': issues
             }
         )]
 
@@ -0,0 +1,419 @@
+"""
+Аналитика по всем сохраненным проверкам (колоночные массивы NumPy)
+"""
+import math
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlparse
+import numpy as np
+
+STATUSES = ('success', 'warning', 'danger', 'info')
+LEVELS = ('excellent', 'good', 'satisfactory', 'low')
+GROUP_KEYS = ('level', 'scheme', 'tld')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Интервалы срока действия сертификата, дней: (-inf, 0), [0, 7), ... [90, inf)
+CERT_EXPIRY_EDGES = (0, 7, 14, 30, 90)
+CERT_EXPIRY_LABELS = ('expired', '0-7', '7-14', '14-30', '30-90', '90+')
+
+# Проверки для сводки "доля сайтов без защиты"
+KEY_CHECKS = {
+    'hsts': 'Принудительное использование HTTPS (HSTS)',
+    'csp': 'Политика безопасности контента (CSP)',
+}
+
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+_LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+_MISSING_STATUS = -1
+
+
+@dataclass
+class FleetFrame:
+    """
+    Результаты проверок в колоночном виде: строка - отчет, столбец - показатель
+
+    Отсутствующие значения: NaN для оценок и дней сертификата, -1 для кодов.
+    """
+    percentage: np.ndarray       # (n,) float32
+    level: np.ndarray            # (n,) int8, индекс в LEVELS
+    https: np.ndarray            # (n,) bool
+    tld: np.ndarray              # (n,) int32, индекс в tld_names
+    cert_days_left: np.ndarray   # (n,) float32
+    categories: np.ndarray       # (n, C) float32, оценки категорий в процентах
+    check_scores: np.ndarray     # (n, K) float32
+    check_status: np.ndarray     # (n, K) int8, индекс в STATUSES
+    tld_names: List[str]
+    category_names: List[str]
+    check_names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.percentage)
+
+    def check_column(self, name: str) -> Optional[int]:
+        try:
+            return self.check_names.index(name)
+        except ValueError:
+            return None
+
+
+class FleetFrameBuilder:
+    """
+    Накопитель отчетов для FleetFrame
+
+    Значения копятся в array.array (компактно, без объекта Python на значение),
+    столбцы проверок и категорий добавляются по мере появления. При latest_only
+    новый отчет того же URL перезаписывает строку предыдущего.
+    """
+
+    def __init__(self, latest_only: bool = True):
+        self.latest_only = latest_only
+        self.last_id = 0
+        self._rows = 0
+        self._url_rows: Dict[str, int] = {}
+        self._percentage = array('f')
+        self._level = array('b')
+        self._https = array('b')
+        self._tld = array('i')
+        self._cert_days = array('f')
+        self._tld_codes: Dict[str, int] = {}
+        self._categories: Dict[str, array] = {}
+        self._check_scores: Dict[str, array] = {}
+        self._check_status: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _column(self, columns: Dict[str, array], name: str, typecode: str, fill) -> array:
+        column = columns.get(name)
+        if column is None:
+            column = array(typecode, [fill]) * self._rows
+            columns[name] = column
+        return column
+
+    def add(self, report: Dict):
+        """Добавляет отчет (словарь SecurityReport.to_dict(), например из ReportStore)"""
+        url = report['url']
+        row = self._url_rows.get(url) if self.latest_only else None
+        if row is None:
+            row = self._append_row()
+            if self.latest_only:
+                self._url_rows[url] = row
+        else:
+            self._clear_row(row)
+
+        host = urlparse(url).hostname or ''
+        tld = host.rsplit('.', 1)[-1] if '.' in host else host
+        tld_code = self._tld_codes.setdefault(tld, len(self._tld_codes))
+
+        self._percentage[row] = report.get('percentage', 0.0)
+        self._level[row] = _LEVEL_CODES.get(report.get('level'), _MISSING_STATUS)
+        self._https[row] = url.startswith('https://')
+        self._tld[row] = tld_code
+
+        for category, score in (report.get('categories') or {}).items():
+            self._column(self._categories, category, 'f', math.nan)[row] = score
+
+        for check in report.get('checks') or []:
+            name = check['name']
+            self._column(self._check_scores, name, 'f', math.nan)[row] = check['score']
+            self._column(self._check_status, name, 'b', _MISSING_STATUS)[row] = \
+                _STATUS_CODES.get(check['status'], _MISSING_STATUS)
+            days_left = (check.get('details') or {}).get('days_left')
+            if check.get('category') == 'connection' and days_left is not None:
+                self._cert_days[row] = days_left
+
+        if report.get('id'):
+            self.last_id = max(self.last_id, report['id'])
+
+    def extend(self, reports: Iterable[Dict]) -> 'FleetFrameBuilder':
+        for report in reports:
+            self.add(report)
+        return self
+
+    def _clear_row(self, row: int):
+        """Сбрасывает строку прежнего отчета URL (в новом может не быть части проверок)"""
+        for column in self._categories.values():
+            column[row] = math.nan
+        for column in self._check_scores.values():
+            column[row] = math.nan
+        for column in self._check_status.values():
+            column[row] = _MISSING_STATUS
+        self._cert_days[row] = math.nan
+
+    def _append_row(self) -> int:
+        self._percentage.append(math.nan)
+        self._level.append(_MISSING_STATUS)
+        self._https.append(0)
+        self._tld.append(0)
+        self._cert_days.append(math.nan)
+        for column in self._categories.values():
+            column.append(math.nan)
+        for column in self._check_scores.values():
+            column.append(math.nan)
+        for column in self._check_status.values():
+            column.append(_MISSING_STATUS)
+        self._rows += 1
+        return self._rows - 1
+
+    def build(self) -> FleetFrame:
+        """Собирает FleetFrame (копирует накопленные столбцы в массивы NumPy)"""
+        def matrix(columns: Dict[str, array], dtype) -> np.ndarray:
+            if not columns:
+                return np.empty((self._rows, 0), dtype=dtype)
+            # Порядок Fortran: каждый столбец непрерывен в памяти, агрегаты по столбцам быстрее
+            result = np.empty((self._rows, len(columns)), dtype=dtype, order='F')
+            for index, column in enumerate(columns.values()):
+                result[:, index] = np.frombuffer(column, dtype=dtype)
+            return result
+
+        tld_names = [''] * len(self._tld_codes)
+        for name, code in self._tld_codes.items():
+            tld_names[code] = name
+
+        return FleetFrame(
+            percentage=np.array(self._percentage, dtype=np.float32),
+            level=np.array(self._level, dtype=np.int8),
+            https=np.array(self._https, dtype=bool),
+            tld=np.array(self._tld, dtype=np.int32),
+            cert_days_left=np.array(self._cert_days, dtype=np.float32),
+            categories=matrix(self._categories, np.float32),
+            check_scores=matrix(self._check_scores, np.float32),
+            check_status=matrix(self._check_status, np.int8),
+            tld_names=tld_names,
+            category_names=list(self._categories),
+            check_names=list(self._check_scores)
+        )
+
+
+def load_frame(reports: Iterable[Dict], latest_only: bool = True) -> FleetFrame:
+    """Строит FleetFrame из последовательности отчетов"""
+    return FleetFrameBuilder(latest_only).extend(reports).build()
+
+
+# --- Агрегаты ---
+
+def _round(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else round(value, 1)
+
+
+def describe(values: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES):
+    """
+    Статистика по каждому столбцу (NaN пропускаются)
+
+    Args:
+        values: Массив (n,) или (n, m)
+
+    Returns:
+        Для (n,) - словарь count/mean/min/max/pXX, для (n, m) - список таких словарей
+    """
+    matrix = values if values.ndim > 1 else values[:, None]
+
+    results = []
+    for column in range(matrix.shape[1]):
+        data = matrix[:, column]
+        data = data[~np.isnan(data)]
+        if not len(data):
+            results.append({'count': 0})
+            continue
+
+        # Перцентили с линейной интерполяцией (векторная сортировка NumPy быстрее
+        # частичной np.partition с несколькими позициями)
+        ordered = np.sort(data)
+        positions = (len(data) - 1) * np.asarray(percentiles, dtype=np.float64) / 100.0
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        weight = positions - lower
+        quantiles = ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+        item = {
+            'count': int(len(data)),
+            'mean': _round(data.mean(dtype=np.float64)),
+            'min': _round(ordered[0]),
+            'max': _round(ordered[-1])
+        }
+        for p, quantile in zip(percentiles, quantiles):
+            item[f'p{p:g}'] = _round(quantile)
+        results.append(item)
+
+    return results if values.ndim > 1 else results[0]
+
+
+def column_means(values: np.ndarray) -> np.ndarray:
+    """Средние по столбцам матрицы (n, m) без учета NaN"""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    sums = np.where(present, values, 0).sum(axis=0, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def status_counts(frame: FleetFrame) -> np.ndarray:
+    """Матрица (K, len(STATUSES)): сколько отчетов получили каждый статус по каждой проверке"""
+    status = frame.check_status
+    return np.stack([(status == code).sum(axis=0) for code in range(len(STATUSES))], axis=1)
+
+
+def missing_share(frame: FleetFrame, check_names: Sequence[str]) -> Optional[float]:
+    """
+    Доля сайтов, у которых хотя бы одна из проверок не пройдена (статус не success)
+
+    Учитываются только отчеты, где есть все указанные проверки.
+    """
+    columns = [frame.check_column(name) for name in check_names]
+    if not len(frame) or None in columns:
+        return None
+    status = frame.check_status[:, columns]
+    present = (status >= 0).all(axis=1)
+    if not present.any():
+        return None
+    failing = (status != _STATUS_CODES['success']).any(axis=1) & present
+    return round(float(failing.sum() / present.sum()), 4)
+
+
+def cert_expiry_histogram(frame: FleetFrame) -> Dict[str, int]:
+    """Распределение сроков действия сертификатов по интервалам CERT_EXPIRY_LABELS"""
+    days = frame.cert_days_left[~np.isnan(frame.cert_days_left)]
+    buckets = np.searchsorted(np.array(CERT_EXPIRY_EDGES, dtype=np.float32), days, side='right')
+    counts = np.bincount(buckets, minlength=len(CERT_EXPIRY_LABELS))
+    return dict(zip(CERT_EXPIRY_LABELS, counts.tolist()))
+
+
+def score_histogram(frame: FleetFrame, bins: int = 10) -> Dict:
+    """Гистограмма общей оценки (в процентах)"""
+    percentage = frame.percentage[~np.isnan(frame.percentage)]
+    counts, edges = np.histogram(percentage, bins=bins, range=(0, 100))
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+def fleet_summary(frame: FleetFrame, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+    """
+    Сводка по всем сайтам: оценки, уровни, категории, проверки, сертификаты
+
+    Returns:
+        Словарь, готовый к сериализации в JSON
+    """
+    levels = np.bincount(frame.level[frame.level >= 0], minlength=len(LEVELS))
+    counts = status_counts(frame)
+    present = counts.sum(axis=1)
+    check_means = column_means(frame.check_scores)
+
+    checks = {}
+    for column, name in enumerate(frame.check_names):
+        total = int(present[column])
+        checks[name] = {
+            'count': total,
+            'statuses': dict(zip(STATUSES, counts[column].tolist())),
+            'failing_share': round(float(1 - counts[column, 0] / total), 4) if total else None,
+            'mean_score': _round(check_means[column])
+        }
+
+    missing = {key: missing_share(frame, [name]) for key, name in KEY_CHECKS.items()}
+    missing['_or_'.join(KEY_CHECKS)] = missing_share(frame, list(KEY_CHECKS.values()))
+
+    return {
+        'total': len(frame),
+        'score': describe(frame.percentage, percentiles),
+        'score_histogram': score_histogram(frame),
+        'levels': dict(zip(LEVELS, levels.tolist())),
+        'categories': dict(zip(frame.category_names, describe(frame.categories, percentiles))),
+        'checks': checks,
+        'missing': missing,
+        'certificates': {
+            'days_left': describe(frame.cert_days_left, percentiles),
+            'histogram': cert_expiry_histogram(frame)
+        }
+    }
+
+
+def group_by(frame: FleetFrame, key: str, percentiles: Sequence[float] = (50,)) -> Dict[str, Dict]:
+    """
+    Оценки в разрезе групп
+
+    Args:
+        key: 'level', 'scheme' (http/https) или 'tld' (домен верхнего уровня)
+        percentiles: Перцентили общей оценки для каждой группы (по ближайшему рангу)
+
+    Returns:
+        Словарь группа -> count, mean, pXX и средние оценки категорий
+    """
+    if key == 'level':
+        codes, names = frame.level.astype(np.int64), list(LEVELS)
+    elif key == 'scheme':
+        codes, names = frame.https.astype(np.int64), ['http', 'https']
+    elif key == 'tld':
+        codes, names = frame.tld.astype(np.int64), frame.tld_names
+    else:
+        raise ValueError(f'Неизвестный ключ группировки: {key} (допустимо: {", ".join(GROUP_KEYS)})')
+
+    valid = (codes >= 0) & ~np.isnan(frame.percentage)
+    codes = codes[valid]
+    percentage = frame.percentage[valid].astype(np.float64)
+    size = len(names)
+
+    counts = np.bincount(codes, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(codes, weights=percentage, minlength=size) / counts
+
+    # Перцентили групп: одна сортировка по составному ключу группа * 128 + оценка
+    # (оценка в диапазоне 0-100), затем индексы внутри каждой группы
+    ordered = np.sort(codes * 128.0 + percentage) - np.repeat(np.arange(size) * 128.0, counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    last = np.maximum(counts - 1, 0)
+    group_percentiles = {
+        p: ordered[np.minimum(starts + np.round(last * p / 100.0).astype(np.int64), max(len(ordered) - 1, 0))]
+        if len(ordered) else np.full(size, np.nan)
+        for p in percentiles
+    }
+
+    # Средние оценки категорий по группам (NaN не учитываются)
+    categories = frame.categories[valid]
+    category_means = []
+    for column in range(categories.shape[1]):
+        values = categories[:, column]
+        present = ~np.isnan(values)
+        present_counts = np.bincount(codes, weights=present, minlength=size)
+        sums = np.bincount(codes, weights=np.where(present, values, 0), minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            category_means.append(sums / present_counts)
+
+    result = {}
+    for code, name in enumerate(names):
+        if not counts[code]:
+            continue
+        item = {'count': int(counts[code]), 'mean': _round(means[code])}
+        for p in percentiles:
+            item[f'p{p:g}'] = _round(group_percentiles[p][code])
+        item['categories'] = {
+            category: _round(category_means[column][code])
+            for column, category in enumerate(frame.category_names)
+        }
+        result[name] = item
+    return result
+
+
+class FleetAnalytics:
+    """
+    FleetFrame поверх ReportStore с дозагрузкой
+
+    При каждом обращении читаются только отчеты, сохраненные после предыдущего:
+    разбор JSON выполняется один раз на отчет, а агрегаты считаются по массивам.
+    """
+
+    def __init__(self, store, latest_only: bool = True):
+        self.store = store
+        self._builder = FleetFrameBuilder(latest_only)
+        self._frame: Optional[FleetFrame] = None
+        self._lock = threading.Lock()
+
+    def frame(self) -> FleetFrame:
+        """Актуальный FleetFrame"""
+        with self._lock:
+            rows_before = len(self._builder)
+            last_id = self._builder.last_id
+            self._builder.extend(self.store.iter_reports(after_id=last_id))
+            if self._frame is None or self._builder.last_id != last_id or len(self._builder) != rows_before:
+                self._frame = self._builder.build()
+            return self._frame
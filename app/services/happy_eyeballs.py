@@ -0,0 +1,197 @@
+"""
+Установка TCP соединений с параллельными попытками по всем адресам хоста (Happy Eyeballs, RFC 8305)
+"""
+import errno
+import os
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Пауза перед попыткой следующего адреса, если предыдущая еще не завершилась (RFC 8305, раздел 5)
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+FAMILY_NAMES = {socket.AF_INET: 'ipv4', socket.AF_INET6: 'ipv6'}
+
+# Адрес из getaddrinfo: (family, type, proto, canonname, sockaddr)
+AddressInfo = Tuple[int, int, int, str, tuple]
+
+_IN_PROGRESS = (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN)
+
+
+def interleave(addresses: List[AddressInfo], preferred_family: int = None) -> List[AddressInfo]:
+    """
+    Порядок попыток: семейства адресов чередуются, первым идет предпочтительное
+
+    Предпочтительное семейство - выигравшее для хоста в прошлый раз, иначе
+    семейство первого адреса из getaddrinfo (порядок по RFC 6724).
+    """
+    if not addresses:
+        return []
+    first = preferred_family if any(info[0] == preferred_family for info in addresses) else addresses[0][0]
+    primary = [info for info in addresses if info[0] == first]
+    secondary = [info for info in addresses if info[0] != first]
+    ordered = []
+    for index in range(max(len(primary), len(secondary))):
+        ordered.extend(group[index] for group in (primary, secondary) if index < len(group))
+    return ordered
+
+
+class ConnectionRaces:
+    """
+    Выигравшие семейства адресов по хостам
+
+    Победитель запоминается и в следующий раз пробуется первым, неудачные
+    попытки по семействам показывают хосты со сломанным IPv6 или медленными
+    адресами.
+    """
+
+    def __init__(self, max_hosts: int = 10000):
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._hosts: 'OrderedDict[str, Dict]' = OrderedDict()
+
+    def preferred(self, host: str) -> Tuple[Optional[int], Optional[str]]:
+        """Семейство и адрес, выигравшие при последнем соединении с хостом"""
+        with self._lock:
+            state = self._hosts.get(host)
+            return (state['family_id'], state['address']) if state else (None, None)
+
+    def record(self, host: str, family: int, address: str, connect_ms: float, attempts: int,
+               failures: Dict[str, int]):
+        with self._lock:
+            state = self._hosts.pop(host, None) or {'connections': 0, 'failures': {}}
+            state.update(family_id=family, family=FAMILY_NAMES.get(family, str(family)),
+                         address=address, connect_ms=round(connect_ms, 1), attempts=attempts)
+            state['connections'] += 1
+            for name, count in failures.items():
+                state['failures'][name] = state['failures'].get(name, 0) + count
+            self._hosts[host] = state
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Семейство, адрес и время последнего соединения с каждым хостом"""
+        with self._lock:
+            return {
+                host: {key: value for key, value in state.items() if key != 'family_id'}
+                for host, state in self._hosts.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+def connect_any(addresses: List[AddressInfo], timeout: float = None, source_address: tuple = None,
+                socket_options: Iterable = None, attempt_delay: float = CONNECTION_ATTEMPT_DELAY,
+                host: str = None) -> socket.socket:
+    """
+    Соединяется с первым ответившим адресом
+
+    Попытки начинаются по очереди с паузой attempt_delay, не дожидаясь
+    завершения предыдущих; ошибка попытки сразу запускает следующую.
+    Побеждает первое установленное соединение, остальные закрываются.
+
+    Args:
+        addresses: Адреса в порядке попыток (см. interleave)
+        timeout: Общий таймаут соединения, он же таймаут возвращаемого сокета
+        host: Имя хоста для статистики connection_races
+
+    Raises:
+        socket.timeout: Ни одна попытка не завершилась за timeout
+        OSError: Все попытки завершились ошибкой (последняя ошибка)
+    """
+    started = time.monotonic()
+    deadline = started + timeout if timeout is not None else None
+    pending = list(addresses)
+    selector = selectors.DefaultSelector()
+    attempts = 0
+    failures: Dict[str, int] = {}
+    last_error: Optional[OSError] = None
+    next_attempt = started
+
+    def failed(family: int, error: OSError):
+        nonlocal last_error, next_attempt
+        name = FAMILY_NAMES.get(family, str(family))
+        failures[name] = failures.get(name, 0) + 1
+        last_error = error
+        next_attempt = time.monotonic()
+
+    try:
+        while True:
+            now = time.monotonic()
+            if pending and (not selector.get_map() or now >= next_attempt):
+                family, sock_type, proto, _, sockaddr = pending.pop(0)
+                attempts += 1
+                sock = socket.socket(family, sock_type, proto)
+                try:
+                    for option in socket_options or ():
+                        sock.setsockopt(*option)
+                    if source_address:
+                        sock.bind(source_address)
+                    sock.setblocking(False)
+                    code = sock.connect_ex(sockaddr)
+                    if code not in _IN_PROGRESS:
+                        raise OSError(code, os.strerror(code))
+                except OSError as e:
+                    sock.close()
+                    failed(family, e)
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE, (family, sockaddr))
+                next_attempt = now + attempt_delay
+                continue
+
+            if not selector.get_map():
+                raise last_error or OSError(f'Нет адресов для соединения с {host}')
+            if deadline is not None and now >= deadline:
+                raise socket.timeout('timed out')
+
+            wait_until = min(next_attempt if pending else float('inf'),
+                             deadline if deadline is not None else float('inf'))
+            events = selector.select(None if wait_until == float('inf') else max(0.0, wait_until - now))
+            for key, _ in events:
+                sock = key.fileobj
+                family, sockaddr = key.data
+                selector.unregister(sock)
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code:
+                    sock.close()
+                    failed(family, OSError(code, os.strerror(code)))
+                    continue
+                sock.setblocking(True)
+                sock.settimeout(timeout)
+                if host is not None:
+                    connection_races.record(host, family, sockaddr[0], (time.monotonic() - started) * 1000,
+                                            attempts, failures)
+                return sock
+    finally:
+        # Проигравшие попытки закрываются
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+
+
+def create_connection(address: Tuple[str, int], timeout: float = None, source_address: tuple = None,
+                      socket_options: Iterable = None,
+                      attempt_delay: float = CONNECTION_ATTEMPT_DELAY) -> socket.socket:
+    """
+    Замена socket.create_connection с параллельными попытками по всем адресам хоста
+
+    Raises:
+        socket.gaierror: Имя не разрешается
+        socket.timeout, OSError: Как socket.create_connection
+    """
+    host, port = address
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    family, winner = connection_races.preferred(host)
+    ordered = interleave(addresses, family)
+    # Адрес, выигравший в прошлый раз, пробуется первым
+    ordered.sort(key=lambda info: info[4][0] != winner)
+    return connect_any(ordered, timeout, source_address, socket_options, attempt_delay, host=host)
+
+
+# Статистика соединений процесса
+connection_races = ConnectionRaces()
@@ -1,9 +1,10 @@
 """
 Проверка безопасности HTTP заголовков
 """
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from app.models.security_result import CheckResult
 from app.services.base_checker import BaseChecker
+from app.utils.header_parser import parse_csp, parse_hsts
 
 
 class HeadersChecker(BaseChecker):
@@ -13,12 +14,14 @@ class HeadersChecker(BaseChecker):
     HEADERS_CONFIG = {
         'Принудительное использование HTTPS (HSTS)': {
             'headers': ['strict-transport-security', 'hsts'],
+            'analyze': 'hsts',
             'weight': 12.0,
             'category': 'headers',
             'description': 'Настройте принудительное использование защищенного соединения'
         },
         'Защита от встраивания (X-Frame-Options)': {
             'headers': ['x-frame-options'],
+            'csp_fallback': 'frame-ancestors',
             'weight': 8.0,
             'category': 'headers',
             'description': 'Настройте защиту от встраивания вашего сайта в чужие страницы'
@@ -31,6 +34,7 @@ class HeadersChecker(BaseChecker):
         },
         'Политика безопасности контента (CSP)': {
             'headers': ['content-security-policy', 'x-content-security-policy'],
+            'analyze': 'csp',
             'weight': 12.0,
             'category': 'headers',
             'description': 'Настройте политику безопасности контента'
@@ -55,6 +59,62 @@ class HeadersChecker(BaseChecker):
         }
     }
     
+    # Доля веса для заголовка, настроенного с недостатками
+    WEAK_SCORE_SHARE = 0.6
+    
+    def _analyze(self, kind: str, value: str) -> Tuple[List[str], Dict]:
+        """
+        Разбирает значение заголовка и ищет недостатки политики
+        
+        Returns:
+            Кортеж (недостатки, разобранная политика для details)
+        """
+        if kind == 'hsts':
+            policy = parse_hsts(value)
+            return policy.issues(), policy.to_dict()
+        
+        policies = parse_csp(value)
+        if not policies:
+            return ['пустая политика'], {'policies': []}
+        # Все политики действуют одновременно - защиту определяет самая строгая
+        issues = min((policy.script_issues() for policy in policies), key=len)
+        return issues, {'policies': [policy.to_dict() for policy in policies]}
+    
+    def _csp_directive(self, directive: str) -> Optional[str]:
+        """Значение директивы CSP, заменяющей устаревший заголовок"""
+        found, value = self.check_header('content-security-policy')
+        if not found:
+            return None
+        for policy in parse_csp(value):
+            sources = policy.directives.get(directive)
+            if sources:
+                return ' '.join(sources)
+        return None
+    
+    def _hsts_header(self, names: List[str]) -> Tuple[bool, Optional[str], Dict]:
+        """
+        HSTS из ответа, который его устанавливает
+        
+        Браузер принимает HSTS только из ответов по HTTPS: значение берется из
+        финального ответа, иначе из первого ответа цепочки по HTTPS. Заголовок
+        в ответах по HTTP не учитывается, такие ответы перечисляются в ignored_on.
+        
+        Returns:
+            Кортеж (найден, значение, details с адресом ответа)
+        """
+        hops = self.page.hops
+        ignored = [hop.url for hop in hops if not hop.secure and any(hop.get_all(name) for name in names)]
+        details = {'ignored_on': ignored} if ignored else {}
+        
+        for hop in [hops[-1]] + hops[:-1]:
+            if not hop.secure:
+                continue
+            headers = hop.header_dict()
+            for name in names:
+                if name in headers:
+                    return True, headers[name], dict(details, hop=hop.url)
+        return False, None, details
+    
     def run(self) -> List[CheckResult]:
         """Запускает проверки заголовков"""
         if not self._make_request():
@@ -70,19 +130,46 @@ class HeadersChecker(BaseChecker):
         results = []
         
         for name, config in self.HEADERS_CONFIG.items():
-            found, value = self.check_header(config['headers'][0], config['headers'])
+            hop_details = {}
+            if config.get('analyze') == 'hsts':
+                found, value, hop_details = self._hsts_header(config['headers'])
+            else:
+                found, value = self.check_header(config['headers'][0], config['headers'])
+            
+            if not found and config.get('csp_fallback'):
+                directive_value = self._csp_directive(config['csp_fallback'])
+                if directive_value is not None:
+                    found, value = True, f'{config["csp_fallback"]} {directive_value}'
             
             if found:
                 display_value = value[:80] + '...' if len(value) > 80 else value
-                results.append(CheckResult(
-                    name=name,
-                    status='success',
-                    score=config['weight'],
-                    max_score=config['weight'],
-                    message=f'Настроен: {display_value}',
-                    category=config['category'],
-                    details={'header_value': value}
-                ))
+                details = dict(hop_details, header_value=value)
+                issues = []
+                if config.get('analyze'):
+                    issues, details['parsed'] = self._analyze(config['analyze'], value)
+                
+                if issues:
+                    details['issues'] = issues
+                    details['recommendation'] = config['description']
+                    results.append(CheckResult(
+                        name=name,
+                        status='warning',
+                        score=config['weight'] * self.WEAK_SCORE_SHARE,
+                        max_score=config['weight'],
+                        message=f'Настроен с недостатками: {"; ".join(issues)}',
+                        category=config['category'],
+                        details=details
+                    ))
+                else:
+                    results.append(CheckResult(
+                        name=name,
+                        status='success',
+                        score=config['weight'],
+                        max_score=config['weight'],
+                        message=f'Настроен: {display_value}',
+                        category=config['category'],
+                        details=details
+                    ))
             else:
                 # Более мягкая оценка: даем частичные баллы за отсутствующие заголовки
                 # Критичные заголовки (HSTS, CSP) - 20% от веса
@@ -103,9 +190,10 @@ class HeadersChecker(BaseChecker):
                     status='warning',
                     score=partial_score,
                     max_score=config['weight'],
-                    message='Отсутствует',
+                    message='Передан только по HTTP и игнорируется браузером' if hop_details.get('ignored_on')
+                            else 'Отсутствует',
                     category=config['category'],
-                    details={'recommendation': config['description']}
+                    details=dict(hop_details, recommendation=config['description'])
                 ))
         
         return results
@@ -0,0 +1,146 @@
+"""
+Отслеживание доступности хостов (circuit breaker и негативный кэш)
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class HostState:
+    """Состояние одного хоста"""
+    state: str = 'closed'  # 'closed', 'open', 'half_open'
+    failures: int = 0
+    opened_until: float = 0.0
+    last_error: Optional[str] = None
+    probe_in_flight: bool = False
+    # Негативный кэш для ответов 403/5xx: (статус_код, сообщение) и время истечения
+    blocked_result: Optional[Tuple[int, str]] = None
+    blocked_until: float = 0.0
+
+
+class HostHealthTracker:
+    """
+    Circuit breaker по хостам
+
+    После failure_threshold подряд таймаутов или ошибок соединения цепь
+    размыкается: проверки этого хоста сразу завершаются с сохраненной
+    ошибкой. Когда пауза истекает, пропускается одна пробная проверка
+    (half-open): успех замыкает цепь, неудача снова размыкает ее с
+    удвоенной паузой. Ответы 403/5xx кэшируются на blocked_ttl секунд.
+    """
+
+    def __init__(self, failure_threshold: int = 3,
+                 base_cooldown: float = 30.0,
+                 max_cooldown: float = 900.0,
+                 blocked_ttl: float = 120.0):
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+        self.configure(failure_threshold, base_cooldown, max_cooldown, blocked_ttl)
+
+    def configure(self, failure_threshold: int, base_cooldown: float,
+                  max_cooldown: float, blocked_ttl: float):
+        """Меняет параметры (используется при создании приложения)"""
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.blocked_ttl = blocked_ttl
+
+    def _cooldown(self, failures: int) -> float:
+        """Пауза растет вдвое с каждой неудачей сверх порога"""
+        exponent = max(failures - self.failure_threshold, 0)
+        return min(self.base_cooldown * (2 ** exponent), self.max_cooldown)
+
+    def before_request(self, host: str) -> Optional[Tuple[bool, Optional[int], str]]:
+        """
+        Решает, можно ли обращаться к хосту
+
+        Returns:
+            None если запрос можно выполнять, иначе готовый результат
+            (существует, статус_код, сообщение) для быстрого отказа
+        """
+        now = time.time()
+        with self._lock:
+            host_state = self._hosts.get(host)
+            if host_state is None:
+                return None
+
+            if host_state.blocked_result and host_state.blocked_until > now:
+                status_code, message = host_state.blocked_result
+                return False, status_code, message
+
+            if host_state.state == 'closed':
+                return None
+
+            if host_state.state == 'open' and host_state.opened_until <= now:
+                host_state.state = 'half_open'
+
+            if host_state.state == 'half_open' and not host_state.probe_in_flight:
+                # Пробный запрос: остальные продолжают получать быстрый отказ
+                host_state.probe_in_flight = True
+                return None
+
+            retry_in = max(host_state.opened_until - now, 0)
+            return False, None, f'{host_state.last_error} (повторная попытка через {retry_in:.0f} с)'
+
+    def record_success(self, host: str):
+        """Хост ответил: цепь замыкается, состояние хоста забывается"""
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host: str, message: str):
+        """Таймаут или ошибка соединения"""
+        now = time.time()
+        with self._lock:
+            host_state = self._hosts.setdefault(host, HostState())
+            host_state.failures += 1
+            host_state.last_error = message
+            host_state.probe_in_flight = False
+
+            if host_state.state == 'half_open' or host_state.failures >= self.failure_threshold:
+                host_state.state = 'open'
+                host_state.opened_until = now + self._cooldown(host_state.failures)
+
+    def release_probe(self, host: str):
+        """Снимает отметку пробного запроса, если его исход не был записан"""
+        with self._lock:
+            host_state = self._hosts.get(host)
+            if host_state is not None:
+                host_state.probe_in_flight = False
+
+    def record_blocked(self, host: str, status_code: int, message: str):
+        """Хост ответил 403/5xx: результат кэшируется"""
+        with self._lock:
+            host_state = self._hosts.setdefault(host, HostState())
+            host_state.state = 'closed'
+            host_state.failures = 0
+            host_state.probe_in_flight = False
+            host_state.blocked_result = (status_code, message)
+            host_state.blocked_until = time.time() + self.blocked_ttl
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Состояние хостов с неудачами или кэшированными отказами"""
+        now = time.time()
+        with self._lock:
+            return {
+                host: {
+                    'state': host_state.state,
+                    'failures': host_state.failures,
+                    'retry_in': max(host_state.opened_until - now, 0),
+                    'last_error': host_state.last_error,
+                    'blocked_status': host_state.blocked_result[0]
+                    if host_state.blocked_result and host_state.blocked_until > now else None
+                }
+                for host, host_state in self._hosts.items()
+                if host_state.state != 'closed' or host_state.blocked_until > now
+            }
+
+    def reset(self):
+        """Забывает состояние всех хостов"""
+        with self._lock:
+            self._hosts.clear()
+
+
+# Общий трекер процесса
+host_health = HostHealthTracker()
@@ -0,0 +1,181 @@
+"""
+Запросы проверок по HTTP/2 с мультиплексированием соединений (httpx)
+"""
+import socket
+import time
+from urllib.parse import urljoin
+from app.models.scan_capture import FetchResult, HttpHop
+from app.services import happy_eyeballs
+from app.services.adaptive_timeouts import adaptive_timeouts, host_key, observe_response
+from app.services.resource_budget import BudgetExceeded, current_meter
+from app.utils.http_session import DEFAULT_HEADERS
+
+# Заголовки соединения HTTP/1.1 запрещены в HTTP/2; br распаковывается только при установленном brotli
+HTTP2_HEADERS = {
+    key: value for key, value in DEFAULT_HEADERS.items()
+    if key.lower() not in ('connection', 'accept-encoding')
+}
+HTTP2_HEADERS['Accept-Encoding'] = 'gzip, deflate'
+
+MAX_REDIRECTS = 30
+
+
+class Http2Fetcher:
+    """
+    Клиент проверок поверх общего пула соединений HTTP/2
+
+    Пул общий для процесса: запросы к одному источнику (страница, robots.txt)
+    из разных потоков одной проверки и из разных проверок массового запуска
+    идут параллельными потоками одного соединения. Серверы без h2 обслуживаются
+    по HTTP/1.1. Cookies между запросами не сохраняются, редиректы
+    обрабатываются здесь же, чтобы каждый переход попадал в цепочку и учет ресурсов.
+    """
+
+    def __init__(self, max_connections: int = 100, keepalive_expiry: float = 30.0):
+        try:
+            import httpx
+            import h2  # noqa: F401
+        except ImportError:
+            raise RuntimeError('Для HTTP/2 установите пакет httpx с поддержкой h2: pip install "httpx[http2]"')
+
+        self._httpx = httpx
+        self._transport = httpx.HTTPTransport(
+            verify=False,
+            http2=True,
+            trust_env=False,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=keepalive_expiry)
+        )
+        # httpx не принимает сетевой backend в HTTPTransport: подменяем его у пула httpcore
+        self._transport._pool._network_backend = _happy_eyeballs_backend()
+
+    def fetch(self, url: str, timeouts: tuple) -> FetchResult:
+        """
+        Выполняет GET запрос с переходом по редиректам
+
+        Args:
+            url: URL
+            timeouts: (таймаут соединения, таймаут чтения) в секундах
+
+        Returns:
+            FetchResult (ошибки не выбрасываются, а записываются в результат)
+        """
+        httpx = self._httpx
+        meter = current_meter()
+        timeout = httpx.Timeout(timeouts[1], connect=timeouts[0])
+        hops = []
+        current = url
+
+        try:
+            if meter is not None:
+                meter.check()
+
+            while True:
+                hop, location, body = self._send(current, timeout, meter)
+                hops.append(hop)
+                if location is None:
+                    break
+                if len(hops) > MAX_REDIRECTS:
+                    return FetchResult(url=url, hops=hops, error=f'Exceeded {MAX_REDIRECTS} redirects.',
+                                       error_kind='too_many_redirects')
+                current = urljoin(current, location)
+
+            observe_response(hops[-1].url, hops[-1].elapsed_ms / 1000)
+            return FetchResult(url=url, hops=hops, body=body)
+        except BudgetExceeded as e:
+            return FetchResult(url=url, error=e.message, error_kind='budget')
+        except httpx.ConnectTimeout as e:
+            adaptive_timeouts.observe_timeout(host_key(current), 'connect', timeouts[0])
+            return FetchResult(url=url, error=str(e)[:200], error_kind='connect_timeout')
+        except httpx.TimeoutException as e:
+            adaptive_timeouts.observe_timeout(host_key(current), 'read', timeouts[1])
+            return FetchResult(url=url, error=str(e)[:200], error_kind='read_timeout')
+        except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+            return FetchResult(url=url, error=str(e)[:200], error_kind='connection')
+        except httpx.HTTPError as e:
+            return FetchResult(url=url, error=str(e)[:200], error_kind='request')
+        except Exception as e:
+            return FetchResult(url=url, error=str(e)[:200], error_kind='unexpected')
+
+    def _send(self, url: str, timeout, meter) -> tuple:
+        """
+        Один запрос без перехода по редиректу
+
+        Returns:
+            Кортеж (HttpHop, Location для редиректа или None, тело ответа)
+        """
+        httpx = self._httpx
+        extensions = {'timeout': timeout.as_dict()}
+        if meter is not None:
+            # Новые соединения пула учитываются в проверке, открывшей их
+            def trace(event, info):
+                if event == 'connection.connect_tcp.started':
+                    meter.record_connection()
+            extensions['trace'] = trace
+
+        request = httpx.Request('GET', url, headers=HTTP2_HEADERS, extensions=extensions)
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        try:
+            response.request = request
+            alpn = _selected_alpn(response)
+            if meter is not None:
+                meter.record_request(redirect=response.is_redirect)
+                meter.record_bytes(sum(len(key) + len(value) + 4 for key, value in response.headers.raw))
+                received = 0
+                chunks = []
+                for chunk in response.iter_bytes():
+                    chunks.append(chunk)
+                    meter.record_bytes(response.num_bytes_downloaded - received, len(chunk))
+                    received = response.num_bytes_downloaded
+                body = b''.join(chunks)
+            else:
+                body = response.read()
+        finally:
+            response.close()
+
+        hop = HttpHop(
+            url=url,
+            status_code=response.status_code,
+            headers=list(response.headers.multi_items()),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            http_version=response.http_version,
+            alpn=alpn
+        )
+        location = response.headers.get('location') if response.is_redirect else None
+        return hop, location, body
+
+    def close(self):
+        self._transport.close()
+
+
+def _happy_eyeballs_backend():
+    """Backend httpcore, соединяющийся с параллельными попытками по адресам IPv4 и IPv6"""
+    import httpcore
+    from httpcore._backends.sync import SyncStream
+
+    class HappyEyeballsBackend(httpcore.SyncBackend):
+        def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            try:
+                sock = happy_eyeballs.create_connection(
+                    (host, port),
+                    timeout,
+                    source_address=None if local_address is None else (local_address, 0),
+                    socket_options=socket_options
+                )
+            except socket.timeout as e:
+                raise httpcore.ConnectTimeout(e) from e
+            except OSError as e:
+                raise httpcore.ConnectError(e) from e
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return SyncStream(sock)
+
+    return HappyEyeballsBackend()
+
+
+def _selected_alpn(response):
+    """Протокол, согласованный в TLS соединении ответа (None для http://)"""
+    stream = response.extensions.get('network_stream')
+    ssl_object = stream.get_extra_info('ssl_object') if stream is not None else None
+    return ssl_object.selected_alpn_protocol() if ssl_object is not None else None
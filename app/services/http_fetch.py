@@ -0,0 +1,207 @@
+"""
+Сетевые запросы проверок: HTTP и TLS
+"""
+import socket
+import ssl
+import time
+import warnings
+from urllib.parse import urljoin
+import requests
+from app.models.scan_capture import CertificateInfo, FetchResult, HttpHop
+from app.services import happy_eyeballs
+from app.services.adaptive_timeouts import adaptive_timeouts, host_key, observe_response, request_timeouts
+from app.services.resource_budget import BudgetExceeded, current_meter
+from app.services.scan_profiler import span
+from app.utils.http_session import get_session
+
+# Игнорируем предупреждения о небезопасных SSL запросах
+warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+
+# Размер блока при чтении тела ответа
+READ_CHUNK_SIZE = 64 * 1024
+
+# Версии протокола urllib3 (HTTPResponse.version)
+HTTP_VERSIONS = {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}
+
+# Клиент HTTP/2 (None - запросы выполняются через requests по HTTP/1.1)
+_http2_fetcher = None
+
+
+def _to_hop(response: requests.Response) -> HttpHop:
+    """Преобразует ответ requests в HttpHop, сохраняя повторяющиеся заголовки"""
+    raw_headers = getattr(response.raw, 'headers', None)
+    if raw_headers is not None and hasattr(raw_headers, 'iteritems'):
+        headers = list(raw_headers.iteritems())
+    else:
+        headers = list(response.headers.items())
+
+    version = getattr(response.raw, 'version', None)
+    return HttpHop(
+        url=response.url,
+        status_code=response.status_code,
+        headers=headers,
+        elapsed_ms=response.elapsed.total_seconds() * 1000,
+        http_version=HTTP_VERSIONS.get(version)
+    )
+
+
+def _read_metered(response: requests.Response, *args, **kwargs) -> requests.Response:
+    """
+    Хук requests: читает тело каждого ответа цепочки блоками с учетом лимитов проверки
+
+    Вызывается до того, как requests прочитает тело сам, поэтому огромный
+    ответ прерывается на превышении лимита, а не загружается целиком.
+    """
+    meter = current_meter()
+    if meter is None:
+        return response
+
+    try:
+        meter.record_request(redirect=response.is_redirect)
+        # Строка статуса и заголовки: длина имен и значений с разделителями
+        meter.record_bytes(sum(len(key) + len(value) + 4 for key, value in response.headers.items()) + 17)
+
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(READ_CHUNK_SIZE):
+            chunks.append(chunk)
+            wire = response.raw.tell()
+            meter.record_bytes(wire - received, len(chunk))
+            received = wire
+    except BudgetExceeded:
+        response.close()
+        raise
+
+    response._content = b''.join(chunks)
+    return response
+
+
+def fetch(url: str, timeout: float = None, default_timeout: float = 10.0) -> FetchResult:
+    """
+    Выполняет GET запрос с переходом по редиректам
+
+    Args:
+        url: URL
+        timeout: Фиксированный таймаут (по умолчанию - адаптивный по хосту)
+        default_timeout: Таймаут для хостов без истории задержек
+
+    Returns:
+        FetchResult (ошибки не выбрасываются, а записываются в результат)
+    """
+    timeouts = (timeout, timeout) if timeout else request_timeouts(url, default_timeout)
+
+    with span('GET', 'network', url=url) as args:
+        fetcher = _http2_fetcher
+        result = fetcher.fetch(url, timeouts) if fetcher is not None else _get(url, timeouts)
+        args['status'] = result.final.status_code if result.final else result.error_kind
+        args['hops'] = len(result.hops)
+        return result
+
+
+def set_http2_fetcher(fetcher):
+    """
+    Включает HTTP/2 для запросов проверок процесса (None - HTTP/1.1 через requests)
+
+    Args:
+        fetcher: Http2Fetcher из app.services.http2_fetch
+    """
+    global _http2_fetcher
+    previous, _http2_fetcher = _http2_fetcher, fetcher
+    if previous is not None and previous is not fetcher:
+        previous.close()
+
+
+def get_http2_fetcher():
+    return _http2_fetcher
+
+
+def _get(url: str, timeouts: tuple) -> FetchResult:
+    try:
+        meter = current_meter()
+        if meter is not None:
+            meter.check()
+
+        response = get_session().get(
+            url,
+            timeout=timeouts,
+            verify=False,
+            allow_redirects=True,
+            hooks={'response': _read_metered}
+        )
+        observe_response(response.url, response.elapsed.total_seconds())
+
+        return FetchResult(
+            url=url,
+            hops=[_to_hop(hop) for hop in response.history] + [_to_hop(response)],
+            body=response.content
+        )
+    except BudgetExceeded as e:
+        return FetchResult(url=url, error=e.message, error_kind='budget')
+    except requests.exceptions.ConnectTimeout as e:
+        adaptive_timeouts.observe_timeout(host_key(url), 'connect', timeouts[0])
+        return FetchResult(url=url, error=str(e)[:200], error_kind='connect_timeout')
+    except requests.exceptions.Timeout as e:
+        adaptive_timeouts.observe_timeout(host_key(url), 'read', timeouts[1])
+        return FetchResult(url=url, error=str(e)[:200], error_kind='read_timeout')
+    except requests.exceptions.ConnectionError as e:
+        return FetchResult(url=url, error=str(e)[:200], error_kind='connection')
+    except requests.exceptions.TooManyRedirects as e:
+        return FetchResult(url=url, error=str(e)[:200], error_kind='too_many_redirects')
+    except requests.exceptions.RequestException as e:
+        return FetchResult(url=url, error=str(e)[:200], error_kind='request')
+    except Exception as e:
+        return FetchResult(url=url, error=str(e)[:200], error_kind='unexpected')
+
+
+def fetch_robots(url: str) -> FetchResult:
+    """Запрашивает robots.txt сайта"""
+    return fetch(urljoin(url, '/robots.txt'), default_timeout=5.0)
+
+
+def fetch_certificate(url: str, hostname: str, port: int) -> CertificateInfo:
+    """
+    Устанавливает TLS соединение и получает поля сертификата
+
+    Returns:
+        CertificateInfo (ошибка записывается в поле error)
+    """
+    host = host_key(url)
+    connect_timeout = adaptive_timeouts.timeout(host, 'connect', 5.0)
+    meter = current_meter()
+
+    try:
+        if meter is not None:
+            meter.record_connection()
+        context = ssl.create_default_context()
+        # Предлагаем h2: выбранный сервером протокол попадает в отчет
+        context.set_alpn_protocols(['h2', 'http/1.1'])
+
+        started = time.monotonic()
+        try:
+            with span('tcp connect', 'network', host=hostname, port=port):
+                # Адреса IPv4 и IPv6 пробуются параллельно: сломанный IPv6 не съедает таймаут
+                sock = happy_eyeballs.create_connection((hostname, port), timeout=connect_timeout)
+        except socket.timeout:
+            adaptive_timeouts.observe_timeout(host, 'connect', connect_timeout)
+            raise
+        connect_seconds = time.monotonic() - started
+        adaptive_timeouts.observe(host, 'connect', connect_seconds)
+
+        # Рукопожатие и чтение сертификата ограничиваем таймаутом чтения
+        sock.settimeout(adaptive_timeouts.timeout(host, 'read', 5.0))
+        with sock:
+            with span('tls handshake', 'network', host=hostname):
+                ssock = context.wrap_socket(sock, server_hostname=hostname)
+            with ssock:
+                if meter is not None:
+                    # Цепочку рукопожатия не видно, учитываем размер сертификата сервера
+                    meter.record_bytes(len(ssock.getpeercert(binary_form=True) or b''))
+                return CertificateInfo(
+                    hostname=hostname,
+                    port=port,
+                    fields=ssock.getpeercert(),
+                    connect_ms=connect_seconds * 1000,
+                    alpn=ssock.selected_alpn_protocol()
+                )
+    except Exception as e:
+        return CertificateInfo(hostname=hostname, port=port, error=str(e))
@@ -0,0 +1,256 @@
+"""
+Планировщик непрерывного мониторинга сайтов
+"""
+import hashlib
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from app.models.security_result import SecurityReport
+from app.services.report_store import ReportStore
+from app.services.security_service import SecurityService
+from app.services.webhooks import WebhookDispatcher, scan_event
+
+
+def _run_scan(url: str) -> SecurityReport:
+    """Функция проверки по умолчанию"""
+    return SecurityService(url).run_all_checks()
+
+
+def get_certificate_days_left(report: SecurityReport) -> Optional[int]:
+    """Возвращает количество дней до истечения сертификата из отчета (если известно)"""
+    for check in report.checks:
+        if check.category == 'connection' and 'days_left' in check.details:
+            return check.details['days_left']
+    return None
+
+
+@dataclass
+class WatchEntry:
+    """Сайт в списке наблюдения"""
+    url: str
+    interval: float
+    next_run: float
+    last_run: Optional[float] = None
+    running: bool = False
+    generation: int = 0  # Увеличивается при перепланировании, устаревшие записи кучи игнорируются
+    callback_url: Optional[str] = None  # Адрес доставки отчетов (webhooks)
+
+
+class MonitoringScheduler:
+    """
+    Планировщик повторных проверок
+
+    Проверки каждого сайта распределяются равномерно внутри его интервала
+    (фаза зависит от хеша URL) и сдвигаются на случайный jitter, поэтому
+    сайты с одинаковым интервалом не запускаются одновременно.
+    Общее число одновременных проверок ограничено max_concurrency.
+    """
+
+    def __init__(self, store: ReportStore,
+                 max_concurrency: int = 4,
+                 jitter: float = 0.1,
+                 min_interval: float = 60.0,
+                 cert_threshold_days: int = 14,
+                 cert_rescan_interval: float = 6 * 3600,
+                 scan_func: Callable[[str], SecurityReport] = _run_scan,
+                 webhooks: Optional[WebhookDispatcher] = None):
+        """
+        Args:
+            store: Хранилище отчетов и списка наблюдения
+            max_concurrency: Максимум одновременных проверок
+            jitter: Доля интервала для случайного сдвига (0.1 = ±10%)
+            min_interval: Минимально допустимый интервал в секундах
+            cert_threshold_days: Порог дней до истечения сертификата для внеочередных проверок
+            cert_rescan_interval: Интервал внеочередных проверок в секундах
+            scan_func: Функция, выполняющая проверку URL
+            webhooks: Доставка отчетов сайтов с адресом обратного вызова
+        """
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.min_interval = min_interval
+        self.cert_threshold_days = cert_threshold_days
+        self.cert_rescan_interval = cert_rescan_interval
+        self.scan_func = scan_func
+        self.webhooks = webhooks
+
+        self._entries: Dict[str, WatchEntry] = {}
+        self._heap: List[tuple] = []
+        self._condition = threading.Condition()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        for row in store.list_watches():
+            next_run = row['next_run']
+            if next_run is None:
+                next_run = time.time() + self._phase_offset(row['url'], row['interval_seconds'])
+            self._entries[row['url']] = WatchEntry(
+                url=row['url'],
+                interval=row['interval_seconds'],
+                next_run=next_run,
+                last_run=row['last_run'],
+                callback_url=row['callback_url']
+            )
+            heapq.heappush(self._heap, (next_run, row['url'], 0))
+
+    # --- Управление списком наблюдения ---
+
+    def register(self, url: str, interval: float, callback_url: str = None) -> WatchEntry:
+        """Добавляет URL в мониторинг (или меняет его интервал и адрес обратного вызова)"""
+        if interval < self.min_interval:
+            raise ValueError(f'Интервал должен быть не меньше {self.min_interval:.0f} секунд')
+
+        with self._condition:
+            entry = self._entries.get(url)
+            next_run = time.time() + self._phase_offset(url, interval)
+            if entry is None:
+                entry = WatchEntry(url=url, interval=interval, next_run=next_run, callback_url=callback_url)
+                self._entries[url] = entry
+            else:
+                entry.interval = interval
+                entry.next_run = next_run
+                entry.callback_url = callback_url
+                entry.generation += 1
+
+            self.store.upsert_watch(url, interval, next_run, callback_url)
+            if not entry.running:
+                heapq.heappush(self._heap, (entry.next_run, url, entry.generation))
+            self._condition.notify()
+
+        return entry
+
+    def unregister(self, url: str) -> bool:
+        """Удаляет URL из мониторинга"""
+        with self._condition:
+            self._entries.pop(url, None)
+            return self.store.remove_watch(url)
+
+    def list_entries(self) -> List[Dict]:
+        """Возвращает текущее состояние списка наблюдения"""
+        with self._condition:
+            return [
+                {
+                    'url': entry.url,
+                    'interval': entry.interval,
+                    'next_run': entry.next_run,
+                    'last_run': entry.last_run,
+                    'running': entry.running,
+                    'callback_url': entry.callback_url
+                }
+                for entry in sorted(self._entries.values(), key=lambda e: e.url)
+            ]
+
+    # --- Жизненный цикл ---
+
+    def start(self):
+        """Запускает фоновый поток планировщика"""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix='monitoring-scan')
+        self._thread = threading.Thread(target=self._loop, name='monitoring-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Останавливает планировщик"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    # --- Внутренняя логика ---
+
+    def _phase_offset(self, url: str, interval: float) -> float:
+        """
+        Смещение первой проверки внутри интервала
+
+        Хеш URL дает равномерно распределенную фазу, поэтому проверки
+        множества сайтов размазываются по всему интервалу, а не собираются
+        в начале часа.
+        """
+        digest = hashlib.sha1(url.encode('utf-8')).digest()
+        phase = int.from_bytes(digest[:4], 'big') / 2 ** 32
+        return phase * interval
+
+    def _next_run_after(self, entry: WatchEntry, started_at: float, report: Optional[SecurityReport]) -> float:
+        """Вычисляет время следующей проверки с учетом jitter и срока сертификата"""
+        spread = entry.interval * self.jitter
+        next_run = started_at + entry.interval + random.uniform(-spread, spread)
+
+        if report is not None:
+            days_left = get_certificate_days_left(report)
+            if days_left is not None and days_left < self.cert_threshold_days:
+                next_run = min(next_run, started_at + self.cert_rescan_interval)
+
+        return next_run
+
+    def _loop(self):
+        """Основной цикл: дожидается ближайшей проверки и отдает ее в пул"""
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    if self._heap:
+                        delay = self._heap[0][0] - time.time()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(timeout=delay)
+                    else:
+                        self._condition.wait()
+
+                if self._stopping:
+                    return
+
+                _, url, generation = heapq.heappop(self._heap)
+                entry = self._entries.get(url)
+                if entry is None or entry.generation != generation or entry.running:
+                    continue
+                entry.running = True
+
+            # Ждем свободный слот вне блокировки, чтобы не мешать регистрации
+            self._slots.acquire()
+            if self._stopping:
+                self._slots.release()
+                return
+            self._executor.submit(self._run_entry, entry)
+
+    def _run_entry(self, entry: WatchEntry):
+        """Выполняет проверку сайта и планирует следующую"""
+        started_at = time.time()
+        report = None
+        try:
+            report = self.scan_func(entry.url)
+            self.store.save_report(report)
+        except Exception:
+            # Ошибка проверки не должна останавливать мониторинг
+            report = None
+        finally:
+            self._slots.release()
+
+        if report is not None and entry.callback_url and self.webhooks is not None:
+            try:
+                self.webhooks.submit(entry.callback_url, [scan_event(report.to_dict(), 'watchlist')])
+            except Exception:
+                pass
+
+        with self._condition:
+            entry.running = False
+            if self._entries.get(entry.url) is not entry:
+                return
+            entry.last_run = started_at
+            entry.next_run = self._next_run_after(entry, started_at, report)
+            entry.generation += 1
+            heapq.heappush(self._heap, (entry.next_run, entry.url, entry.generation))
+            self.store.update_watch_run(entry.url, entry.last_run, entry.next_run)
+            self._condition.notify()
@@ -0,0 +1,133 @@
+"""
+Многопроцессное выполнение проверок
+"""
+import atexit
+import json
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+def _init_worker(capture_path: Optional[str] = None, cert_index_path: Optional[str] = None,
+                 http2: bool = False):
+    """
+    Прогрев процесса пула
+
+    Импортирует сервисы заранее и повторяет настройки родителя: процессы
+    запускаются без fork и не наследуют их. Каждый процесс держит
+    собственный пул соединений.
+
+    Args:
+        capture_path: Файл хранилища захватов (None - захват выключен)
+        cert_index_path: Файл индекса сроков сертификатов (None - индекс не ведется)
+        http2: Запросы по HTTP/2 (Http2Fetcher)
+    """
+    from app.services import security_service  # noqa: F401
+    from app.services.capture_store import CaptureStore, set_default_capture_store
+    from app.services.cert_index import CertificateIndex, set_default_cert_index
+    from app.services.http_fetch import set_http2_fetcher
+    from app.utils.http_session import reset_sessions
+    reset_sessions()
+    if http2:
+        from app.services.http2_fetch import Http2Fetcher
+        set_http2_fetcher(Http2Fetcher())
+    set_default_capture_store(CaptureStore(capture_path) if capture_path else None)
+    set_default_cert_index(CertificateIndex(cert_index_path) if cert_index_path else None)
+
+
+def _mp_context():
+    """
+    Контекст запуска процессов пула
+
+    Пул создается из работающего приложения, где уже есть потоки (сервер,
+    диспетчер webhook-ов, кэши с блокировками). fork копирует только вызвавший
+    поток и захваченные другими потоками блокировки, поэтому процессы
+    запускаются через forkserver, а где его нет (Windows, macOS без fork) - через spawn.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def scan_compact(url: str) -> bytes:
+    """
+    Выполняет проверку в процессе пула
+
+    Returns:
+        Отчет в компактном виде (JSON без пробелов в UTF-8):
+        байты передаются между процессами дешевле, чем граф объектов
+    """
+    from app.services.security_service import SecurityService
+    report = SecurityService(url).run_all_checks()
+    return json.dumps(report.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decode_compact(payload: bytes) -> Dict:
+    """Восстанавливает словарь отчета из компактного вида"""
+    return json.loads(payload)
+
+
+class ProcessScanPool:
+    """
+    Пул процессов для проверок
+
+    Сетевые ожидания перекрываются потоками внутри процесса, а CPU-часть
+    (TLS рукопожатия, распаковка ответов, разбор сертификатов, сериализация)
+    упирается в GIL. Пул распределяет проверки по ядрам.
+    """
+
+    def __init__(self, processes: Optional[int] = None, capture_path: Optional[str] = None):
+        from app.services.cert_index import get_default_cert_index
+        from app.services.http_fetch import get_http2_fetcher
+        self.processes = processes or os.cpu_count() or 1
+        # Индекс сертификатов и HTTP/2 процессы пула берут из настроек текущего процесса
+        cert_index = get_default_cert_index()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+            initargs=(capture_path, cert_index.path if cert_index else None, get_http2_fetcher() is not None)
+        )
+        atexit.register(self.shutdown)
+
+    def scan(self, url: str) -> Dict:
+        """Выполняет одну проверку в пуле"""
+        return decode_compact(self._executor.submit(scan_compact, url).result())
+
+    def scan_many(self, urls: Iterable[str],
+                  max_in_flight: Optional[int] = None) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+        """
+        Выполняет проверки в пуле по мере готовности
+
+        Одновременно в пуле находится не больше max_in_flight задач,
+        поэтому входной поток URL может быть сколь угодно длинным.
+
+        Yields:
+            Кортеж (url, отчет или None, ошибка или None) в порядке завершения
+        """
+        max_in_flight = max_in_flight or self.processes * 4
+        pending = {}
+        url_iter = iter(urls)
+
+        while True:
+            for url in url_iter:
+                pending[self._executor.submit(scan_compact, url)] = url
+                if len(pending) >= max_in_flight:
+                    break
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    yield url, decode_compact(future.result()), None
+                except Exception as e:
+                    yield url, None, str(e)[:100]
+
+    def shutdown(self, wait: bool = True):
+        """Останавливает процессы пула"""
+        atexit.unregister(self.shutdown)
+        self._executor.shutdown(wait=wait)
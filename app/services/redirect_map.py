@@ -0,0 +1,201 @@
+"""
+Карта редиректов по источникам и разбор цепочки редиректов по ответам
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+from app.models.scan_capture import FetchResult, HttpHop
+
+# Постоянные редиректы кэшируются сразу, временные - после повторения с тем же Location
+PERMANENT_STATUSES = (301, 308)
+TEMPORARY_STATUSES = (302, 303, 307)
+
+# Заголовки безопасности, показываемые для каждого ответа цепочки
+HOP_SECURITY_HEADERS = (
+    'strict-transport-security',
+    'content-security-policy',
+    'x-frame-options',
+    'x-content-type-options',
+    'referrer-policy'
+)
+
+MAX_CACHED_HOPS = 10
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    parts = urlsplit(url)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+
+@dataclass
+class _Redirect:
+    hop: HttpHop
+    location: str
+    expires: float
+    observations: int = 1
+
+    @property
+    def stable(self) -> bool:
+        return self.hop.status_code in PERMANENT_STATUSES or self.observations >= 2
+
+
+class RedirectMap:
+    """
+    Стабильные редиректы по источникам с ограниченным временем жизни
+
+    Повторная проверка того же адреса начинается сразу с конечного URL
+    известной цепочки (http -> https -> www), а ответы пропущенных переходов
+    подставляются из карты с пометкой cached - их заголовки и время
+    по-прежнему попадают в отчет. Редиректы с Set-Cookie или Cache-Control:
+    no-store не кэшируются: такие ответы меняются от запроса к запросу.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_origins: int = 10000):
+        self.ttl = ttl
+        self.max_origins = max_origins
+        self._lock = threading.Lock()
+        self._origins: 'OrderedDict[Tuple[str, str], Dict[str, _Redirect]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttl: float = None, max_origins: int = None):
+        if ttl is not None:
+            self.ttl = float(ttl)
+        if max_origins is not None:
+            self.max_origins = int(max_origins)
+
+    @staticmethod
+    def _cacheable(hop: HttpHop) -> bool:
+        if hop.cached or hop.status_code not in PERMANENT_STATUSES + TEMPORARY_STATUSES:
+            return False
+        headers = hop.header_dict()
+        return 'set-cookie' not in headers and 'no-store' not in headers.get('cache-control', '').lower()
+
+    def learn(self, result: FetchResult):
+        """Запоминает редиректы из цепочки живого запроса"""
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for hop in result.history:
+                location = hop.location
+                if location is None:
+                    continue
+                origin = _origin(hop.url)
+                redirects = self._origins.get(origin)
+                if not self._cacheable(hop):
+                    # Ответ перестал быть стабильным: прежняя запись больше не действует
+                    if redirects is not None and not hop.cached:
+                        redirects.pop(hop.url, None)
+                    continue
+                if redirects is None:
+                    redirects = self._origins[origin] = {}
+                self._origins.move_to_end(origin)
+                previous = redirects.get(hop.url)
+                observations = previous.observations + 1 if previous and previous.location == location else 1
+                redirects[hop.url] = _Redirect(hop, location, now + self.ttl, observations)
+            while len(self._origins) > self.max_origins:
+                self._origins.popitem(last=False)
+
+    def resolve(self, url: str) -> List[HttpHop]:
+        """
+        Известные стабильные редиректы, начиная с url
+
+        Returns:
+            Ответы цепочки с пометкой cached (пустой список, если url не редиректит);
+            конечный адрес - location последнего ответа
+        """
+        hops = []
+        seen = {url}
+        now = time.monotonic()
+        with self._lock:
+            while len(hops) < MAX_CACHED_HOPS:
+                redirects = self._origins.get(_origin(url))
+                entry = redirects.get(url) if redirects else None
+                if entry is None or not entry.stable:
+                    break
+                if entry.expires <= now:
+                    del redirects[url]
+                    break
+                if entry.location in seen:
+                    # Цикл редиректов не сокращаем: его должен увидеть живой запрос
+                    hops = []
+                    break
+                hops.append(replace(entry.hop, cached=True))
+                url = entry.location
+                seen.add(url)
+            if hops:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hops
+
+    def invalidate(self, url: str):
+        """Удаляет редиректы источника url (цепочка изменилась)"""
+        with self._lock:
+            self._origins.pop(_origin(url), None)
+
+    def clear(self):
+        with self._lock:
+            self._origins.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'origins': len(self._origins),
+                'redirects': sum(len(redirects) for redirects in self._origins.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl': self.ttl
+            }
+
+
+def describe_chain(result: FetchResult) -> Dict:
+    """
+    Цепочка редиректов по ответам: статус, переход, заголовки безопасности, cookies, время
+
+    Returns:
+        Словарь с ответами цепочки (hops) и найденными проблемами (issues)
+    """
+    hops = []
+    issues = []
+    for index, hop in enumerate(result.hops):
+        headers = hop.header_dict()
+        cookies = [value.split('=', 1)[0].strip() for value in hop.get_all('set-cookie')]
+        hops.append({
+            'url': hop.url,
+            'status_code': hop.status_code,
+            'location': hop.location,
+            'secure': hop.secure,
+            'elapsed_ms': round(hop.elapsed_ms, 1),
+            'cached': hop.cached,
+            'security_headers': {name: headers[name] for name in HOP_SECURITY_HEADERS if name in headers},
+            'cookies': cookies
+        })
+
+        if hop.location and hop.secure and not hop.location.lower().startswith('https://'):
+            issues.append(f'Переход с HTTPS на HTTP: {hop.url} -> {hop.location}')
+        if not hop.secure and 'strict-transport-security' in headers:
+            issues.append(f'HSTS в ответе по HTTP игнорируется браузером: {hop.url}')
+        if not hop.secure and cookies:
+            issues.append(f'Cookies установлены ответом по HTTP: {hop.url} ({", ".join(cookies)})')
+        if hop.status_code in TEMPORARY_STATUSES and index == 0 and not hop.secure \
+                and (hop.location or '').lower().startswith('https://'):
+            issues.append(f'Переход на HTTPS временным редиректом {hop.status_code}: '
+                          f'рекомендуется 301 или 308')
+
+    return {
+        'hops': hops,
+        'redirects': len(result.history),
+        'cached': sum(1 for hop in result.hops if hop.cached),
+        'total_ms': round(sum(hop.elapsed_ms for hop in result.hops if not hop.cached), 1),
+        'issues': issues
+    }
+
+
+# Карта редиректов процесса (время жизни настраивается в create_app)
+redirect_map = RedirectMap()
@@ -0,0 +1,200 @@
+"""
+Сравнение отчетов о проверке одного сайта: только изменения между двумя отчетами
+"""
+from typing import Dict, List, Optional, Tuple
+
+REGRESSION = 'regression'
+IMPROVEMENT = 'improvement'
+MIXED = 'mixed'
+CHANGED = 'changed'  # Изменение без оценки (например, новое значение заголовка)
+
+DIRECTIONS = (REGRESSION, IMPROVEMENT, MIXED, CHANGED)
+
+# Порядок статусов от худшего к лучшему (info - нейтральный результат)
+STATUS_RANK = {'danger': 0, 'warning': 1, 'info': 2, 'success': 3}
+
+# Значения details, изменение которых показывается без оценки направления.
+# Остальные поля details (days_left, response_time_ms и т.п.) меняются при каждой проверке и не сравниваются
+TRACKED_DETAILS = ('header_value', 'disclosed_info', 'expiry_date')
+COOKIE_FLAGS = ('secure', 'httponly', 'samesite')
+
+# Изменение оценки меньше этого значения считается округлением
+SCORE_EPSILON = 0.05
+
+
+def _combine(directions) -> Optional[str]:
+    found = set(directions) - {None}
+    if (REGRESSION in found and IMPROVEMENT in found) or MIXED in found:
+        return MIXED
+    for direction in (REGRESSION, IMPROVEMENT, CHANGED):
+        if direction in found:
+            return direction
+    return None
+
+
+def _delta(previous: float, current: float) -> Optional[Dict]:
+    if previous is None or current is None or abs(current - previous) < SCORE_EPSILON:
+        return None
+    return {'from': previous, 'to': current, 'delta': round(current - previous, 1)}
+
+
+def _direction_of(delta: Optional[Dict]) -> Optional[str]:
+    if delta is None:
+        return None
+    return IMPROVEMENT if delta['delta'] > 0 else REGRESSION
+
+
+def _check_key(check: Dict) -> Tuple[str, str]:
+    return check.get('category', 'general'), check.get('name', '')
+
+
+def _index_checks(checks: List[Dict]) -> Dict[Tuple[str, str], Dict]:
+    """Проверки по (категория, название); повторяющиеся названия нумеруются"""
+    indexed = {}
+    for check in checks:
+        key = _check_key(check)
+        number = 2
+        while key in indexed:
+            key = (check.get('category', 'general'), f'{check.get("name", "")} #{number}')
+            number += 1
+        indexed[key] = check
+    return indexed
+
+
+def _cookie_changes(previous: List[Dict], current: List[Dict]) -> List[Dict]:
+    """Cookies, потерявшие или получившие атрибуты защиты, появившиеся и исчезнувшие"""
+    before = {cookie.get('name'): cookie for cookie in previous or []}
+    after = {cookie.get('name'): cookie for cookie in current or []}
+    changes = []
+    for name in sorted(set(before) | set(after), key=str):
+        if name not in before:
+            insecure = [flag for flag in COOKIE_FLAGS if not after[name].get(flag)]
+            changes.append({'name': name, 'change': 'added', 'missing': insecure,
+                            'direction': REGRESSION if insecure else None})
+            continue
+        if name not in after:
+            changes.append({'name': name, 'change': 'removed', 'direction': None})
+            continue
+        lost = [flag for flag in COOKIE_FLAGS if before[name].get(flag) and not after[name].get(flag)]
+        gained = [flag for flag in COOKIE_FLAGS if not before[name].get(flag) and after[name].get(flag)]
+        if lost or gained:
+            changes.append({'name': name, 'change': 'changed', 'lost': lost, 'gained': gained,
+                            'direction': _combine([REGRESSION if lost else None, IMPROVEMENT if gained else None])})
+    return changes
+
+
+def diff_check(previous: Optional[Dict], current: Optional[Dict]) -> Optional[Dict]:
+    """
+    Изменения одной проверки (словари CheckResult.to_dict())
+
+    Returns:
+        Описание изменения или None, если значимых изменений нет
+    """
+    if previous is None:
+        direction = IMPROVEMENT if current['status'] == 'success' else REGRESSION \
+            if current['status'] in ('warning', 'danger') else CHANGED
+        return {'name': current['name'], 'category': current.get('category'), 'change': 'added',
+                'direction': direction, 'status': {'from': None, 'to': current['status']},
+                'message': current.get('message')}
+    if current is None:
+        return {'name': previous['name'], 'category': previous.get('category'), 'change': 'removed',
+                'direction': CHANGED, 'status': {'from': previous['status'], 'to': None}}
+
+    change = {}
+    directions = []
+
+    if previous['status'] != current['status']:
+        change['status'] = {'from': previous['status'], 'to': current['status']}
+        rank_before = STATUS_RANK.get(previous['status'], 2)
+        rank_after = STATUS_RANK.get(current['status'], 2)
+        directions.append(IMPROVEMENT if rank_after > rank_before else REGRESSION if rank_after < rank_before
+                          else CHANGED)
+
+    score = _delta(previous.get('score'), current.get('score'))
+    if score is not None:
+        change['score'] = score
+        directions.append(_direction_of(score))
+
+    before_details = previous.get('details') or {}
+    after_details = current.get('details') or {}
+
+    issues_before = before_details.get('issues') or []
+    issues_after = after_details.get('issues') or []
+    added = [issue for issue in issues_after if issue not in issues_before]
+    removed = [issue for issue in issues_before if issue not in issues_after]
+    if added:
+        change['issues_added'] = added
+        directions.append(REGRESSION)
+    if removed:
+        change['issues_removed'] = removed
+        directions.append(IMPROVEMENT)
+
+    cookies = _cookie_changes(before_details.get('cookies'), after_details.get('cookies'))
+    if cookies:
+        change['cookies'] = cookies
+        directions.extend(cookie['direction'] or CHANGED for cookie in cookies)
+
+    for key in TRACKED_DETAILS:
+        if before_details.get(key) != after_details.get(key):
+            change.setdefault('details', {})[key] = {'from': before_details.get(key), 'to': after_details.get(key)}
+            directions.append(CHANGED)
+
+    if not change:
+        return None
+    return dict(
+        {'name': current['name'], 'category': current.get('category'), 'change': 'changed',
+         'direction': _combine(directions), 'message': current.get('message')},
+        **change
+    )
+
+
+def diff_reports(previous: Dict, current: Dict) -> Optional[Dict]:
+    """
+    Изменения между двумя отчетами одного сайта (словари SecurityReport.to_dict())
+
+    Сравниваются итоговая оценка, уровень, оценки категорий и каждая проверка:
+    статус, баллы, найденные недостатки, атрибуты cookies и значения заголовков.
+    Поля, меняющиеся при каждой проверке (время ответа, дни до истечения
+    сертификата), не сравниваются - вход сертификата в окно предупреждения
+    виден по смене статуса проверки.
+
+    Returns:
+        Изменение с направлением (regression, improvement, mixed, changed) или None, если отчеты совпадают
+    """
+    change = {}
+    directions = []
+
+    percentage = _delta(previous.get('percentage'), current.get('percentage'))
+    if percentage is not None:
+        change['percentage'] = percentage
+        directions.append(_direction_of(percentage))
+    if previous.get('level') != current.get('level'):
+        change['level'] = {'from': previous.get('level'), 'to': current.get('level')}
+
+    categories = {}
+    previous_categories = previous.get('categories') or {}
+    current_categories = current.get('categories') or {}
+    for category in sorted(set(previous_categories) | set(current_categories)):
+        delta = _delta(previous_categories.get(category), current_categories.get(category))
+        if delta is not None:
+            categories[category] = delta
+    if categories:
+        change['categories'] = categories
+
+    before = _index_checks(previous.get('checks') or [])
+    after = _index_checks(current.get('checks') or [])
+    checks = []
+    for key in list(after) + [key for key in before if key not in after]:
+        check_change = diff_check(before.get(key), after.get(key))
+        if check_change is not None:
+            checks.append(check_change)
+            directions.append(check_change['direction'])
+    if checks:
+        change['checks'] = checks
+
+    if not change:
+        return None
+    change['direction'] = _combine(directions) or CHANGED
+    change['regressions'] = sum(1 for check in checks if check['direction'] in (REGRESSION, MIXED))
+    change['improvements'] = sum(1 for check in checks if check['direction'] in (IMPROVEMENT, MIXED))
+    return change
@@ -0,0 +1,269 @@
+"""
+Хранилище истории проверок, списка наблюдения и задержек хостов (SQLite)
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.models.security_result import SecurityReport
+from app.services.report_diff import diff_reports
+
+
+class ReportStore:
+    """Хранит отчеты о проверках и список сайтов для мониторинга"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            percentage REAL NOT NULL,
+            level TEXT NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reports_url ON reports (url, id);
+        CREATE TABLE IF NOT EXISTS report_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            report_id INTEGER NOT NULL,
+            previous_report_id INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_report_changes_url ON report_changes (url, id);
+        CREATE TABLE IF NOT EXISTS watchlist (
+            url TEXT PRIMARY KEY,
+            interval_seconds REAL NOT NULL,
+            next_run REAL,
+            last_run REAL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            callback_url TEXT
+        );
+        CREATE TABLE IF NOT EXISTS host_latency (
+            host TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            srtt REAL NOT NULL,
+            rttvar REAL NOT NULL,
+            samples INTEGER NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (host, kind)
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Запись сериализуем: SQLite допускает только одного писателя
+        self._write_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+            # Хранилища, созданные до появления адресов обратного вызова
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(watchlist)')}
+            if 'callback_url' not in columns:
+                conn.execute('ALTER TABLE watchlist ADD COLUMN callback_url TEXT')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Открывает соединение на время операции (соединения SQLite нельзя делить между потоками)"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Отчеты ---
+
+    def save_report(self, report: SecurityReport) -> int:
+        """
+        Сохраняет отчет о проверке
+
+        Returns:
+            Идентификатор сохраненного отчета
+        """
+        payload = report.to_dict()
+        with self._write_lock, self._connect() as conn:
+            previous = conn.execute(
+                'SELECT id, payload FROM reports WHERE url = ? ORDER BY id DESC LIMIT 1',
+                (report.url,)
+            ).fetchone()
+            cursor = conn.execute(
+                'INSERT INTO reports (url, timestamp, percentage, level, payload) VALUES (?, ?, ?, ?, ?)',
+                (
+                    report.url,
+                    payload['timestamp'],
+                    report.percentage,
+                    report.level,
+                    json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+                )
+            )
+            report_id = cursor.lastrowid
+
+            # В ленту изменений попадают только отличия от предыдущего отчета того же URL
+            if previous is not None:
+                change = diff_reports(json.loads(previous['payload']), payload)
+                if change is not None:
+                    conn.execute(
+                        '''INSERT INTO report_changes (url, report_id, previous_report_id, timestamp, direction, payload)
+                           VALUES (?, ?, ?, ?, ?, ?)''',
+                        (
+                            report.url,
+                            report_id,
+                            previous['id'],
+                            payload['timestamp'],
+                            change['direction'],
+                            json.dumps(change, ensure_ascii=False, separators=(',', ':'))
+                        )
+                    )
+            return report_id
+
+    def latest_report(self, url: str) -> Optional[Dict]:
+        """Возвращает последний сохраненный отчет для URL"""
+        history = self.report_history(url, limit=1)
+        return history[0] if history else None
+
+    def history_version(self, url: str) -> Optional[Tuple[int, str]]:
+        """
+        Версия истории URL: идентификатор и время последнего отчета
+
+        Отчеты только добавляются, поэтому новый отчет меняет версию;
+        запрос идет по индексу без чтения payload.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT id, timestamp FROM reports WHERE url = ? ORDER BY id DESC LIMIT 1',
+                (url,)
+            ).fetchone()
+        return (row['id'], row['timestamp']) if row else None
+
+    def report_history(self, url: str, limit: int = 20) -> List[Dict]:
+        """Возвращает историю отчетов для URL (новые первыми)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT id, payload FROM reports WHERE url = ? ORDER BY id DESC LIMIT ?',
+                (url, limit)
+            ).fetchall()
+
+        return [dict(json.loads(row['payload']), id=row['id']) for row in rows]
+
+    def changes(self, after_id: int = 0, limit: int = 100, url: str = None,
+                directions: List[str] = None) -> List[Dict]:
+        """
+        Лента изменений отчетов в порядке появления
+
+        Args:
+            after_id: Курсор - идентификатор последнего полученного изменения
+            limit: Максимальное количество изменений
+            url: Только изменения этого URL
+            directions: Только изменения с этими направлениями (regression, improvement, ...)
+        """
+        query = 'SELECT id, url, report_id, previous_report_id, timestamp, direction, payload FROM report_changes WHERE id > ?'
+        params: list = [after_id]
+        if url is not None:
+            query += ' AND url = ?'
+            params.append(url)
+        if directions:
+            query += f' AND direction IN ({", ".join("?" * len(directions))})'
+            params.extend(directions)
+        query += ' ORDER BY id LIMIT ?'
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        return [
+            dict(
+                json.loads(row['payload']),
+                id=row['id'],
+                url=row['url'],
+                report_id=row['report_id'],
+                previous_report_id=row['previous_report_id'],
+                timestamp=row['timestamp']
+            )
+            for row in rows
+        ]
+
+    def iter_reports(self, after_id: int = 0, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Перебирает все отчеты в порядке сохранения, порциями (не загружая все в память)
+
+        Args:
+            after_id: Только отчеты с идентификатором больше указанного
+            batch_size: Размер порции чтения
+        """
+        last_id = after_id
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    'SELECT id, payload FROM reports WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                last_id = row['id']
+                yield dict(json.loads(row['payload']), id=row['id'])
+
+    # --- Список наблюдения ---
+
+    def upsert_watch(self, url: str, interval_seconds: float, next_run: float, callback_url: str = None):
+        """Добавляет URL в список наблюдения или обновляет его интервал и адрес обратного вызова"""
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                '''INSERT INTO watchlist (url, interval_seconds, next_run, callback_url) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET interval_seconds = excluded.interval_seconds,
+                                                  next_run = excluded.next_run,
+                                                  callback_url = excluded.callback_url''',
+                (url, interval_seconds, next_run, callback_url)
+            )
+
+    def update_watch_run(self, url: str, last_run: float, next_run: float):
+        """Сохраняет время последней и следующей проверки"""
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                'UPDATE watchlist SET last_run = ?, next_run = ? WHERE url = ?',
+                (last_run, next_run, url)
+            )
+
+    def remove_watch(self, url: str) -> bool:
+        """Удаляет URL из списка наблюдения"""
+        with self._write_lock, self._connect() as conn:
+            cursor = conn.execute('DELETE FROM watchlist WHERE url = ?', (url,))
+            return cursor.rowcount > 0
+
+    def list_watches(self) -> List[Dict]:
+        """Возвращает список наблюдения"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT url, interval_seconds, next_run, last_run, created_at, callback_url FROM watchlist ORDER BY url'
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    # --- Задержки хостов ---
+
+    def save_latency_estimates(self, rows: List[tuple]):
+        """Сохраняет оценки задержек: кортежи (host, kind, srtt, rttvar, samples)"""
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                '''INSERT INTO host_latency (host, kind, srtt, rttvar, samples) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(host, kind) DO UPDATE SET srtt = excluded.srtt, rttvar = excluded.rttvar,
+                                                        samples = excluded.samples,
+                                                        updated_at = CURRENT_TIMESTAMP''',
+                rows
+            )
+
+    def load_latency_estimates(self) -> List[Dict]:
+        """Возвращает сохраненные оценки задержек"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT host, kind, srtt, rttvar, samples FROM host_latency').fetchall()
+
+        return [dict(row) for row in rows]
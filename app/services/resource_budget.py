@@ -0,0 +1,156 @@
+"""
+Учет сетевых ресурсов проверки и ограничения на одну проверку
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, Optional
+
+_current_meter: contextvars.ContextVar = contextvars.ContextVar('scan_meter', default=None)
+
+# Учитываемые ресурсы и их названия для сообщений
+RESOURCES = {
+    'bytes': 'получено байт',
+    'decoded_bytes': 'байт после распаковки',
+    'connections': 'соединений',
+    'requests': 'запросов',
+    'redirects': 'редиректов'
+}
+
+
+@dataclass
+class ScanBudget:
+    """Лимиты одной проверки (0 - без ограничения)"""
+    max_bytes: int = 10 * 1024 * 1024
+    max_decoded_bytes: int = 50 * 1024 * 1024
+    max_connections: int = 10
+    max_requests: int = 20
+    max_redirects: int = 10
+
+    def limit(self, resource: str) -> int:
+        return getattr(self, f'max_{resource}')
+
+    def configure(self, **limits):
+        for name, value in limits.items():
+            if value is not None:
+                setattr(self, name, int(value))
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class BudgetExceeded(Exception):
+    """Проверка израсходовала лимит ресурса"""
+
+    def __init__(self, resource: str, used: int, limit: int):
+        self.resource = resource
+        self.used = used
+        self.limit = limit
+        self.message = f'Превышен лимит проверки: {RESOURCES[resource]} {used} при лимите {limit}'
+        super().__init__(self.message)
+
+
+class ResourceMeter:
+    """
+    Счетчики ресурсов одной проверки
+
+    Общий для всех потоков проверки: проверщики получают его через копию
+    контекста. После превышения лимита все следующие сетевые операции
+    проверки сразу завершаются с той же ошибкой.
+    """
+
+    def __init__(self, budget: ScanBudget = None):
+        self.budget = budget or default_budget
+        self.usage = {resource: 0 for resource in RESOURCES}
+        self.exceeded: Optional[BudgetExceeded] = None
+        self._lock = threading.Lock()
+
+    def _add(self, resource: str, amount: int):
+        with self._lock:
+            self.usage[resource] += amount
+            used = self.usage[resource]
+            limit = self.budget.limit(resource)
+            if limit and used > limit:
+                if self.exceeded is None:
+                    self.exceeded = BudgetExceeded(resource, used, limit)
+                raise self.exceeded
+
+    def check(self):
+        """Выбрасывает BudgetExceeded, если лимит уже был превышен"""
+        if self.exceeded is not None:
+            raise self.exceeded
+
+    def record_request(self, redirect: bool = False):
+        self._add('requests', 1)
+        if redirect:
+            self._add('redirects', 1)
+
+    def record_connection(self):
+        self.check()
+        self._add('connections', 1)
+
+    def record_bytes(self, received: int, decoded: int = 0):
+        self._add('bytes', received)
+        if decoded:
+            self._add('decoded_bytes', decoded)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'usage': dict(self.usage),
+                'limits': self.budget.to_dict(),
+                'exceeded': self.exceeded.resource if self.exceeded else None
+            }
+
+
+@contextmanager
+def metering(meter: Optional[ResourceMeter]) -> Iterator[Optional[ResourceMeter]]:
+    """Учитывает сетевые операции внутри блока в счетчиках meter"""
+    token = _current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _current_meter.reset(token)
+
+
+def current_meter() -> Optional[ResourceMeter]:
+    return _current_meter.get()
+
+
+class ResourceTotals:
+    """Суммарное потребление ресурсов проверками процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scans = 0
+        self._totals = {resource: 0 for resource in RESOURCES}
+        self._max = {resource: 0 for resource in RESOURCES}
+        self._exceeded = {resource: 0 for resource in RESOURCES}
+
+    def record(self, meter: ResourceMeter):
+        with self._lock:
+            self._scans += 1
+            for resource, value in meter.usage.items():
+                self._totals[resource] += value
+                self._max[resource] = max(self._max[resource], value)
+            if meter.exceeded is not None:
+                self._exceeded[meter.exceeded.resource] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            scans = self._scans
+            return {
+                'scans': scans,
+                'totals': dict(self._totals),
+                'mean': {resource: round(value / scans, 1) if scans else 0.0
+                         for resource, value in self._totals.items()},
+                'max': dict(self._max),
+                'exceeded': dict(self._exceeded),
+                'limits': default_budget.to_dict()
+            }
+
+
+# Лимиты по умолчанию (настраиваются в create_app) и суммарные счетчики процесса
+default_budget = ScanBudget()
+resource_totals = ResourceTotals()
@@ -0,0 +1,110 @@
+"""
+Сетевые данные одной проверки: выполняются один раз и записываются в захват
+"""
+import threading
+from datetime import datetime
+from typing import Callable
+from app.models.scan_capture import CertificateInfo, FetchResult, ScanCapture
+from app.services.redirect_map import RedirectMap, redirect_map
+from app.services.transport import Transport, get_default_transport
+
+# Ошибки, при которых повторный запрос всей цепочки не поможет
+_UNRECOVERABLE = ('connect_timeout', 'read_timeout', 'budget')
+
+
+class ScanIO:
+    """
+    Доступ проверок к сети в рамках одной проверки
+
+    Каждый ресурс (страница, robots.txt, сертификат) запрашивается один раз,
+    все проверки получают один и тот же результат. Результаты записываются
+    в ScanCapture. В режиме replay сеть не используется: данные берутся
+    из ранее сохраненного захвата.
+    """
+
+    def __init__(self, url: str, capture: ScanCapture = None, replay: bool = False,
+                 transport: Transport = None, redirects: RedirectMap = None):
+        self.url = url
+        self.replay = replay
+        # Через транспорт выполняются все запросы (по умолчанию - реальная сеть)
+        self.transport = transport or get_default_transport()
+        # Известные редиректы (по умолчанию - карта процесса для сетевого транспорта)
+        self.redirects = redirects if redirects is not None else (
+            redirect_map if self.transport.network else None
+        )
+        self.capture = capture or ScanCapture(url=url, timestamp=datetime.now().isoformat())
+        # Отдельная блокировка на ресурс: параллельные проверки ждут только свой запрос
+        self._locks = {name: threading.Lock() for name in ('page', 'robots', 'certificate')}
+
+    @property
+    def reference_time(self) -> datetime:
+        """Момент, относительно которого оцениваются сроки (время захвата при replay)"""
+        if self.replay:
+            return datetime.fromisoformat(self.capture.timestamp)
+        return datetime.now()
+
+    def _load(self, name: str, loader: Callable, missing: Callable):
+        with self._locks[name]:
+            value = getattr(self.capture, name)
+            if value is None:
+                value = missing() if self.replay else loader()
+                setattr(self.capture, name, value)
+            return value
+
+    def page(self) -> FetchResult:
+        """Ответ проверяемой страницы"""
+        return self._load(
+            'page',
+            self._fetch_page,
+            lambda: self._missing(self.url)
+        )
+
+    def _fetch_page(self) -> FetchResult:
+        """
+        Запрос страницы: известные стабильные редиректы пропускаются
+
+        Пропущенные ответы берутся из карты редиректов, поэтому цепочка
+        в результате та же, что и при полном проходе. Если конечный адрес
+        перестал отвечать, цепочка проходится заново.
+        """
+        if self.redirects is None:
+            return self.transport.fetch(self.url)
+
+        cached = self.redirects.resolve(self.url)
+        if cached:
+            result = self.transport.fetch(cached[-1].location)
+            if result.ok or result.error_kind in _UNRECOVERABLE:
+                self.redirects.learn(result)
+                return FetchResult(url=self.url, hops=cached + result.hops, error=result.error,
+                                   error_kind=result.error_kind, body=result.body)
+            self.redirects.invalidate(self.url)
+
+        result = self.transport.fetch(self.url)
+        if result.ok:
+            self.redirects.learn(result)
+        return result
+
+    def robots(self) -> FetchResult:
+        """Ответ на запрос robots.txt"""
+        return self._load(
+            'robots',
+            lambda: self.transport.fetch_robots(self.url),
+            lambda: self._missing(self.url)
+        )
+
+    def certificate(self, hostname: str, port: int) -> CertificateInfo:
+        """Сертификат сервера"""
+        return self._load(
+            'certificate',
+            lambda: self.transport.fetch_certificate(self.url, hostname, port),
+            lambda: CertificateInfo(hostname=hostname, port=port, error='Нет данных в захвате')
+        )
+
+    @staticmethod
+    def _missing(url: str) -> FetchResult:
+        return FetchResult(url=url, error='Нет данных в захвате', error_kind='unexpected')
+
+
+def open_capture(capture: ScanCapture) -> ScanIO:
+    """ScanIO для повторной оценки сохраненного захвата без сети"""
+    return ScanIO(capture.url, capture=capture, replay=True)
@@ -0,0 +1,281 @@
+"""
+Профилирование отдельных проверок: дерево интервалов и выборка стеков в формате Chrome trace
+"""
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('scan_trace', default=None)
+
+# Имена артефактов: только такие файлы отдаются через API
+ARTIFACT_RE = re.compile(r'^[\w.-]+\.(trace\.json|folded)$')
+
+
+class Trace:
+    """
+    Профиль одной проверки
+
+    Интервалы (span) записываются явно в сетевых фазах и проверщиках.
+    Параллельно фоновый поток снимает стеки потоков, находящихся внутри
+    интервалов трассы: из выборки строится flame chart в той же трассе
+    и свернутые стеки для flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, label: str, sample_interval: float = 0.005, max_samples: int = 20000):
+        self.label = label
+        self.id = f'{datetime.now().strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        self.artifact = f'{self.id}.trace.json'
+        self.sample_interval = sample_interval
+        self.max_samples = max_samples
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[Dict] = []
+        self._threads: Dict[int, str] = {}
+        self._active: Dict[int, Tuple[int, int]] = {}  # tid -> (глубина вложенности, глубина стека на входе)
+        self._samples: Dict[int, List[Tuple[float, Tuple[str, ...]]]] = {}
+        self._sample_count = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1_000_000
+
+    # --- Интервалы ---
+
+    def enter(self, frame):
+        """
+        Поток входит в интервал: с этого момента его стек попадает в выборку
+
+        Args:
+            frame: Кадр, открывший интервал - кадры выше него в выборку не попадают
+        """
+        tid = threading.get_ident()
+        with self._lock:
+            depth, base = self._active.get(tid, (0, 0))
+            if depth == 0:
+                base = _stack_depth(frame)
+                self._threads.setdefault(tid, threading.current_thread().name)
+            self._active[tid] = (depth + 1, base)
+
+    def exit(self):
+        tid = threading.get_ident()
+        with self._lock:
+            depth, base = self._active.get(tid, (1, 0))
+            if depth <= 1:
+                self._active.pop(tid, None)
+            else:
+                self._active[tid] = (depth - 1, base)
+
+    def add_span(self, name: str, category: str, start_us: float, end_us: float, args: Dict):
+        with self._lock:
+            self._events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round(start_us, 1),
+                'dur': round(end_us - start_us, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args
+            })
+
+    # --- Выборка стеков ---
+
+    def start_sampling(self):
+        if self.sample_interval and self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, name='scan-profiler', daemon=True)
+            self._sampler.start()
+
+    def stop_sampling(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            timestamp = self.now_us()
+            with self._lock:
+                for tid, (_, base) in active.items():
+                    frame = frames.get(tid)
+                    if frame is None:
+                        continue
+                    stack = _stack(frame)[max(base - 1, 0):]
+                    self._samples.setdefault(tid, []).append((timestamp, stack))
+                    self._sample_count += 1
+                if self._sample_count >= self.max_samples:
+                    return
+
+    # --- Экспорт ---
+
+    def to_chrome(self) -> Dict:
+        """Трасса в формате Chrome trace-event (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            samples = {tid: list(items) for tid, items in self._samples.items()}
+            threads = dict(self._threads)
+
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                       'args': {'name': f'scan {self.label}'}})
+        for tid, name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+
+        # Последовательные выборки с общим префиксом стека объединяются в один интервал кадра
+        for tid, items in samples.items():
+            open_frames: List[Tuple[str, float]] = []
+            for timestamp, stack in items + [(self.now_us(), ())]:
+                common = 0
+                while (common < len(open_frames) and common < len(stack)
+                       and open_frames[common][0] == stack[common]):
+                    common += 1
+                for name, start in reversed(open_frames[common:]):
+                    events.append({'name': name, 'cat': 'sample', 'ph': 'X', 'ts': round(start, 1),
+                                   'dur': round(timestamp - start, 1), 'pid': pid, 'tid': tid})
+                open_frames = open_frames[:common] + [(name, timestamp) for name in stack[common:]]
+
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'label': self.label, 'id': self.id, 'sample_interval_ms': self.sample_interval * 1000}
+        }
+
+    def folded(self) -> str:
+        """Свернутые стеки: 'кадр;кадр;кадр количество' в строке"""
+        counts: Dict[Tuple[str, ...], int] = {}
+        with self._lock:
+            for items in self._samples.values():
+                for _, stack in items:
+                    counts[stack] = counts.get(stack, 0) + 1
+        return ''.join(f'{";".join(stack)} {count}\n' for stack, count in counts.items() if stack)
+
+
+def _stack_depth(frame) -> int:
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    """Стек от корня к текущему кадру"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+@contextmanager
+def span(name: str, category: str = 'scan', **args) -> Iterator[Dict]:
+    """
+    Интервал трассы текущей проверки (без активной трассы ничего не делает)
+
+    Yields:
+        Словарь аргументов интервала - можно дополнить результатами (статус ответа и т.п.)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield args
+        return
+
+    # Кадр 0 - этот генератор, 1 - __enter__ контекстного менеджера, 2 - вызывающий код
+    trace.enter(sys._getframe(2))
+    start = trace.now_us()
+    try:
+        yield args
+    finally:
+        trace.add_span(name, category, start, trace.now_us(), args)
+        trace.exit()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class ScanProfiler:
+    """Профилирование проверок по запросу с сохранением артефактов в каталог"""
+
+    def __init__(self, directory: str, sample_interval: float = 0.005, max_artifacts: int = 50):
+        self.directory = directory
+        self.sample_interval = sample_interval
+        self.max_artifacts = max_artifacts
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[Trace]:
+        """
+        Профилирует код внутри блока
+
+        Все интервалы этого контекста (и потоков, запущенных с его копией)
+        попадают в трассу. После выхода из блока трасса сохраняется:
+        <id>.trace.json (Chrome trace-event) и <id>.folded (свернутые стеки).
+        """
+        trace = Trace(label, self.sample_interval)
+        token = _current_trace.set(trace)
+        trace.enter(sys._getframe(2))
+        trace.start_sampling()
+        start = trace.now_us()
+        try:
+            yield trace
+        finally:
+            trace.add_span('scan', 'scan', start, trace.now_us(), {'url': label})
+            trace.exit()
+            trace.stop_sampling()
+            _current_trace.reset(token)
+            self._save(trace)
+
+    def _save(self, trace: Trace):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, trace.artifact), 'w', encoding='utf-8') as f:
+            json.dump(trace.to_chrome(), f, ensure_ascii=False, separators=(',', ':'))
+        with open(os.path.join(self.directory, f'{trace.id}.folded'), 'w', encoding='utf-8') as f:
+            f.write(trace.folded())
+        self._prune()
+
+    def _prune(self):
+        """Удаляет самые старые профили сверх max_artifacts"""
+        traces = sorted(name for name in os.listdir(self.directory) if name.endswith('.trace.json'))
+        for name in traces[:max(0, len(traces) - self.max_artifacts)]:
+            trace_id = name[:-len('.trace.json')]
+            for suffix in ('.trace.json', '.folded'):
+                try:
+                    os.remove(os.path.join(self.directory, trace_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list_artifacts(self) -> List[Dict]:
+        """Сохраненные профили (новые первыми)"""
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if ARTIFACT_RE.match(name):
+                stat = os.stat(os.path.join(self.directory, name))
+                result.append({
+                    'name': name,
+                    'size': stat.st_size,
+                    'created_at': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                })
+        return result
+
+    def artifact_path(self, name: str) -> Optional[str]:
+        """Путь к артефакту по имени (None для недопустимых и отсутствующих имен)"""
+        if not ARTIFACT_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
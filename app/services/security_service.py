@@ -1,7 +1,9 @@
 """
 Главный сервис для проверки безопасности
 """
-from typing import List
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Tuple
 from app.models.security_result import CheckResult, SecurityReport
 from app.services.connection_checker import ConnectionChecker
 from app.services.headers_checker import HeadersChecker
@@ -9,20 +11,42 @@ from app.services.server_info_checker import ServerInfoChecker
 from app.services.cookies_checker import CookiesChecker
 from app.services.content_checker import ContentChecker
 from app.utils.score_calculator import create_report
-from app.utils.url_validator import check_url_exists
+from app.models.scan_capture import ScanCapture
+from app.services.capture_store import CaptureStore, get_default_capture_store
+from app.services.cert_index import get_default_cert_index
+from app.services.redirect_map import describe_chain
+from app.services.scan_io import ScanIO, open_capture
+from app.services.transport import Transport
+from app.services.scan_profiler import span
+from app.services.resource_budget import ResourceMeter, ScanBudget, metering, resource_totals
+from app.utils.url_validator import check_url_exists, evaluate_availability
 
 
 class SecurityService:
     """Главный сервис для проверки безопасности сайта"""
     
-    def __init__(self, url: str):
+    def __init__(self, url: str, capture: ScanCapture = None, capture_store: CaptureStore = None,
+                 budget: ScanBudget = None, transport: Transport = None):
+        """
+        Args:
+            url: Проверяемый URL
+            capture: Сохраненный захват - проверка выполняется по нему без сети
+            capture_store: Куда сохранить захват этой проверки
+                (по умолчанию - хранилище процесса, если захват включен)
+            budget: Лимиты сетевых ресурсов проверки (по умолчанию - лимиты процесса)
+            transport: Транспорт сетевых операций (по умолчанию - транспорт процесса)
+        """
         self.url = url
+        self.io = open_capture(capture) if capture is not None else ScanIO(url, transport=transport)
+        self.capture_store = capture_store
+        # Учет ресурсов всех сетевых операций проверки (в режиме replay сети нет)
+        self.meter = None if self.io.replay else ResourceMeter(budget)
         self.checkers = [
-            ConnectionChecker(url),
-            HeadersChecker(url),
-            ServerInfoChecker(url),
-            CookiesChecker(url),
-            ContentChecker(url)
+            ConnectionChecker(url, self.io),
+            HeadersChecker(url, self.io),
+            ServerInfoChecker(url, self.io),
+            CookiesChecker(url, self.io),
+            ContentChecker(url, self.io)
         ]
     
     def run_all_checks(self) -> SecurityReport:
@@ -32,8 +56,82 @@ class SecurityService:
         Returns:
             SecurityReport с результатами
         """
-        # Сначала проверяем существование URL
-        exists, status_code, error_message = check_url_exists(self.url)
+        report = None
+        for kind, value in self.iter_results():
+            if kind == 'report':
+                report = value
+        return report
+    
+    def iter_results(self) -> Iterator[Tuple[str, object]]:
+        """
+        Запускает проверки и отдает результаты по мере готовности
+        
+        Проверщики выполняются параллельно: результаты каждого отдаются сразу,
+        как только он завершился. Порядок проверок в итоговом отчете
+        не зависит от порядка завершения.
+        
+        Yields:
+            ('check', CheckResult) для каждого результата, в конце ('report', SecurityReport)
+        """
+        try:
+            for kind, value in self._iter_results():
+                if kind == 'report':
+                    protocol = self._protocol()
+                    if protocol:
+                        value.extra['protocol'] = protocol
+                    page = self.io.capture.page
+                    if page is not None and page.history:
+                        # Ответы цепочки редиректов: кто установил HSTS и cookies
+                        value.extra['redirects'] = describe_chain(page)
+                    if self.meter is not None:
+                        value.resources = self.meter.to_dict()
+                        resource_totals.record(self.meter)
+                yield kind, value
+        finally:
+            self._save_capture()
+            self._index_certificate()
+    
+    def _protocol(self) -> dict:
+        """Версия HTTP финального ответа и протокол, согласованный в TLS (ALPN)"""
+        page = self.io.capture.page
+        final = page.final if page is not None else None
+        if final is None:
+            return {}
+        certificate = self.io.capture.certificate
+        alpn = final.alpn or (certificate.alpn if certificate is not None else None)
+        return {'http_version': final.http_version, 'alpn': alpn}
+    
+    def _index_certificate(self):
+        """Обновляет индекс сроков сертификатов, если проверка получила сертификат"""
+        index = get_default_cert_index()
+        if index is None or self.io.replay or self.io.capture.certificate is None:
+            return
+        try:
+            index.record(self.url, self.io.capture.certificate)
+        except Exception:
+            # Ошибка индекса не должна влиять на результат проверки
+            pass
+    
+    def _save_capture(self):
+        """Сохраняет сырые данные живой проверки, если захват включен"""
+        if self.io.replay:
+            return
+        store = self.capture_store or get_default_capture_store()
+        if store is not None and self.io.capture.page is not None:
+            try:
+                store.save(self.io.capture)
+            except Exception:
+                # Ошибка хранилища не должна влиять на результат проверки
+                pass
+    
+    def _iter_results(self) -> Iterator[Tuple[str, object]]:
+        # Сначала проверяем существование URL (ответ страницы переиспользуют проверки)
+        with span('availability', 'phase'), metering(self.meter):
+            # Circuit breaker защищает реальные хосты - без сети он не нужен
+            if self.io.replay or not self.io.transport.network:
+                exists, status_code, error_message = evaluate_availability(self.io.page())
+            else:
+                exists, status_code, error_message = check_url_exists(self.url, fetch_page=self.io.page)
         
         if not exists:
             # Если страница не существует, возвращаем отчет с ошибкой
@@ -47,44 +145,98 @@ class SecurityService:
                 details={'error': True, 'status_code': status_code}
             )
             
-            return create_report(
+            yield 'check', error_check
+            yield 'report', create_report(
                 self.url,
                 [error_check],
                 [f'❌ Сайт недоступен: {error_message}. Проверьте правильность URL и доступность сайта.']
             )
+            return
         
+        # Запускаем все проверки
+        results = [None] * len(self.checkers)
+        if not self.io.transport.network:
+            # Без сети потокам нечего ждать: последовательное выполнение быстрее
+            for index, checker in enumerate(self.checkers):
+                results[index] = self._run_checker(checker, self.meter)
+                for check in results[index]:
+                    yield 'check', check
+            yield from self._finish(results)
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=len(self.checkers))
+        try:
+            futures = {
+                # Копия контекста: интервалы профилировщика из потоков попадают в трассу запроса
+                executor.submit(contextvars.copy_context().run, self._run_checker, checker, self.meter): index
+                for index, checker in enumerate(self.checkers)
+            }
+            for future in as_completed(futures):
+                checks = future.result()
+                results[futures[future]] = checks
+                for check in checks:
+                    yield 'check', check
+        finally:
+            # Если потребитель прервал поток (клиент отключился), незапущенные проверки отменяются
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        yield from self._finish(results)
+    
+    def _finish(self, results: List[List[CheckResult]]) -> Iterator[Tuple[str, object]]:
+        """Собирает отчет из результатов проверщиков (в порядке проверщиков)"""
         all_checks = []
         recommendations = []
         
-        # Запускаем все проверки
-        for checker in self.checkers:
-            try:
-                checks = checker.run()
-                all_checks.extend(checks)
-                
-                # Собираем рекомендации
-                for check in checks:
-                    if check.status in ['warning', 'danger'] and 'recommendation' in check.details:
-                        recommendations.append(check.details['recommendation'])
-                    elif check.status == 'danger' and check.score == 0:
-                        # Критические проблемы
-                        if 'critical' in check.details:
-                            recommendations.append(f'🚨 КРИТИЧНО: {check.name} - требуется немедленное исправление')
-                        else:
-                            recommendations.append(f'⚠️ ВАЖНО: {check.name} - рекомендуется исправить')
-            except Exception as e:
-                # Если проверка упала, добавляем ошибку
-                all_checks.append(CheckResult(
-                    name=f'Ошибка проверки: {checker.__class__.__name__}',
-                    status='danger',
-                    score=0.0,
-                    max_score=0.0,
-                    message=f'Ошибка: {str(e)[:100]}',
-                    category='general'
-                ))
+        for checks in results:
+            all_checks.extend(checks)
+            
+            # Собираем рекомендации
+            for check in checks:
+                if check.status in ['warning', 'danger'] and 'recommendation' in check.details:
+                    recommendations.append(check.details['recommendation'])
+                elif check.status == 'danger' and check.score == 0:
+                    # Критические проблемы
+                    if 'critical' in check.details:
+                        recommendations.append(f'🚨 КРИТИЧНО: {check.name} - требуется немедленное исправление')
+                    else:
+                        recommendations.append(f'⚠️ ВАЖНО: {check.name} - рекомендуется исправить')
         
-        # Создаем отчет
-        report = create_report(self.url, all_checks, recommendations)
+        if self.meter is not None and self.meter.exceeded is not None:
+            # Часть данных не получена: результаты затронутых проверок неполные
+            budget_check = CheckResult(
+                name='Лимит ресурсов проверки',
+                status='warning',
+                score=0.0,
+                max_score=0.0,
+                message=self.meter.exceeded.message,
+                category='general',
+                details={'resources': self.meter.to_dict()}
+            )
+            all_checks.append(budget_check)
+            yield 'check', budget_check
         
-        return report
+        # Создаем отчет
+        yield 'report', create_report(self.url, all_checks, recommendations)
+    
+    @staticmethod
+    def _run_checker(checker, meter: ResourceMeter = None) -> List[CheckResult]:
+        try:
+            with span(checker.__class__.__name__, 'checker') as args, metering(meter):
+                checks = checker.run()
+                args['checks'] = len(checks)
+                return checks
+        except Exception as e:
+            # Если проверка упала, добавляем ошибку
+            return [CheckResult(
+                name=f'Ошибка проверки: {checker.__class__.__name__}',
+                status='danger',
+                score=0.0,
+                max_score=0.0,
+                message=f'Ошибка: {str(e)[:100]}',
+                category='general'
+            )]
+
 
+def rescore_capture(capture: ScanCapture) -> SecurityReport:
+    """Повторно оценивает сохраненный захват по текущим правилам без обращения к сети"""
+    return SecurityService(capture.url, capture=capture).run_all_checks()
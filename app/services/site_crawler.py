@@ -0,0 +1,465 @@
+"""
+Обход сайта: проверка заголовков, cookies и контента на нескольких страницах одного источника
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from app.models.scan_capture import FetchResult, ScanCapture
+from app.services.content_checker import ContentChecker
+from app.services.cookies_checker import CookiesChecker
+from app.services.headers_checker import HeadersChecker
+from app.services.resource_budget import ResourceMeter, ScanBudget, metering
+from app.services.scan_io import ScanIO
+from app.services.security_service import SecurityService
+from app.services.transport import Transport, get_default_transport
+from app.utils.url_normalizer import canonicalize_url
+
+# User-agent, для которого применяются правила robots.txt
+ROBOTS_USER_AGENT = 'SecurityChecker'
+
+# Заголовки, согласованность которых между страницами проверяется
+CONSISTENCY_HEADERS = (
+    'strict-transport-security',
+    'content-security-policy',
+    'x-frame-options',
+    'x-content-type-options',
+    'referrer-policy',
+    'permissions-policy'
+)
+
+# Ссылки на файлы, которые не являются страницами
+SKIPPED_EXTENSIONS = (
+    '.css', '.js', '.json', '.xml', '.txt', '.pdf', '.zip', '.gz', '.rar', '.7z', '.exe', '.dmg',
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.bmp', '.mp3', '.mp4', '.avi', '.mov',
+    '.webm', '.woff', '.woff2', '.ttf', '.eot', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx'
+)
+
+# Максимум ссылок, извлекаемых из одной страницы
+MAX_LINKS_PER_PAGE = 500
+
+
+@dataclass
+class CrawlLimits:
+    """Ограничения одного обхода"""
+    max_pages: int = 20
+    max_depth: int = 2
+    concurrency: int = 4        # Одновременных запросов к сайту
+    max_seconds: float = 60.0   # Время обхода; по истечении новые страницы не запрашиваются
+
+    def configure(self, **limits):
+        for name, value in limits.items():
+            if value is not None:
+                setattr(self, name, type(getattr(self, name))(value))
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class _LinkParser(HTMLParser):
+    """Ссылки <a href> и <base href> страницы"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base = None
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a' and len(self.links) < MAX_LINKS_PER_PAGE:
+            attributes = dict(attrs)
+            if attributes.get('href') and 'nofollow' not in (attributes.get('rel') or '').lower():
+                self.links.append(attributes['href'].strip())
+        elif tag == 'base' and self.base is None:
+            self.base = dict(attrs).get('href')
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc
+
+
+def extract_links(page: FetchResult, origin: Tuple[str, str] = None) -> List[str]:
+    """
+    Ссылки HTML страницы на тот же источник (схема, хост и порт), канонизированные и без повторов
+
+    Args:
+        page: Ответ страницы
+        origin: Источник обхода (по умолчанию - источник итогового URL страницы)
+
+    Returns:
+        Список URL в порядке появления на странице
+    """
+    final = page.final
+    if final is None or 'html' not in final.header_dict().get('content-type', '').lower():
+        return []
+
+    parser = _LinkParser()
+    try:
+        parser.feed(page.text())
+        parser.close()
+    except Exception:
+        # Некорректный HTML: используем то, что успели разобрать
+        pass
+
+    base = urljoin(final.url, parser.base) if parser.base else final.url
+    origin = origin or _origin(final.url)
+    links = []
+    seen = set()
+    for href in parser.links:
+        if href.startswith(('#', 'mailto:', 'tel:', 'javascript:', 'data:')):
+            continue
+        url, _ = urldefrag(urljoin(base, href))
+        if _origin(url) != origin or urlsplit(url).path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
+        key, reason = canonicalize_url(url)
+        if key is not None and key not in seen:
+            seen.add(key)
+            links.append(key)
+    return links
+
+
+class RobotsPolicy:
+    """Разобранный robots.txt источника"""
+
+    def __init__(self, result: FetchResult, fetched_at: float = None):
+        self.result = result
+        self.fetched_at = fetched_at or time.monotonic()
+        self._parser = RobotFileParser()
+        status = result.final.status_code if result.ok else None
+        if status is None or status >= 500:
+            # Сервер недоступен: по правилам robots.txt обход запрещен целиком
+            self._parser.disallow_all = True
+        elif status >= 400:
+            self._parser.allow_all = True
+        else:
+            self._parser.parse(result.text().splitlines())
+
+    @property
+    def found(self) -> bool:
+        return self.result.ok and self.result.final.status_code == 200
+
+    def allowed(self, url: str) -> bool:
+        return self._parser.can_fetch(ROBOTS_USER_AGENT, url)
+
+    def crawl_delay(self) -> Optional[float]:
+        delay = self._parser.crawl_delay(ROBOTS_USER_AGENT)
+        return float(delay) if delay is not None else None
+
+
+class RobotsCache:
+    """
+    robots.txt по источникам: запрашивается один раз и хранится ttl секунд
+
+    Общий для обходов процесса: повторный обход того же сайта и проверки
+    его страниц (ContentChecker) используют уже полученный ответ.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._origin_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._policies: 'OrderedDict[Tuple[str, str], RobotsPolicy]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttl: float = None, max_entries: int = None):
+        if ttl is not None:
+            self.ttl = float(ttl)
+        if max_entries is not None:
+            self.max_entries = int(max_entries)
+
+    def _cached(self, origin: Tuple[str, str]) -> Optional[RobotsPolicy]:
+        with self._lock:
+            policy = self._policies.get(origin)
+            if policy is None or time.monotonic() - policy.fetched_at > self.ttl:
+                return None
+            self._policies.move_to_end(origin)
+            self.hits += 1
+            return policy
+
+    def get(self, url: str, transport: Transport = None) -> RobotsPolicy:
+        """Политика источника url (запрос robots.txt - только при отсутствии в кэше)"""
+        origin = _origin(url)
+        policy = self._cached(origin)
+        if policy is not None:
+            return policy
+
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        # Параллельные обходы одного источника ждут один запрос
+        with origin_lock:
+            policy = self._cached(origin)
+            if policy is not None:
+                return policy
+            policy = RobotsPolicy((transport or get_default_transport()).fetch_robots(url))
+            with self._lock:
+                self.misses += 1
+                self._policies[origin] = policy
+                self._policies.move_to_end(origin)
+                while len(self._policies) > self.max_entries:
+                    evicted, _ = self._policies.popitem(last=False)
+                    self._origin_locks.pop(evicted, None)
+            return policy
+
+    def clear(self):
+        with self._lock:
+            self._policies.clear()
+            self._origin_locks.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._policies), 'hits': self.hits, 'misses': self.misses,
+                    'ttl': self.ttl, 'max_entries': self.max_entries}
+
+
+class SiteCrawler:
+    """
+    Обход страниц одного источника в ширину
+
+    Начинает со стартовой страницы и переходит по ссылкам на тот же источник
+    до max_depth, соблюдая robots.txt. На каждой странице выполняются проверки
+    заголовков, cookies и контента; одновременно к сайту выполняется не больше
+    concurrency запросов. Результаты отдаются по мере готовности, в конце -
+    сводка согласованности политик между страницами. Обход останавливается
+    досрочно, когда исчерпан лимит страниц или времени.
+    """
+
+    CHECKERS = (HeadersChecker, CookiesChecker, ContentChecker)
+
+    def __init__(self, url: str, limits: CrawlLimits = None, transport: Transport = None,
+                 budget: ScanBudget = None, robots: RobotsCache = None):
+        """
+        Args:
+            url: Стартовая страница
+            limits: Ограничения обхода (по умолчанию - лимиты процесса)
+            transport: Транспорт запросов (по умолчанию - транспорт процесса)
+            budget: Лимиты сетевых ресурсов на одну страницу (по умолчанию - лимиты процесса)
+            robots: Кэш robots.txt (по умолчанию - общий кэш процесса)
+        """
+        self.url = url
+        self.limits = limits or default_crawl_limits
+        self.transport = transport or get_default_transport()
+        self.budget = budget
+        self.robots = robots or robots_cache
+
+    def iter_results(self) -> Iterator[Tuple[str, Dict]]:
+        """
+        Выполняет обход
+
+        Yields:
+            ('page', результат страницы) по мере готовности, в конце ('summary', сводка)
+        """
+        started = time.monotonic()
+        deadline = started + self.limits.max_seconds
+        policy = self.robots.get(self.url, self.transport)
+        delay = policy.crawl_delay() or 0.0
+        # Источник обхода - итоговый URL стартовой страницы (http -> https -> www допустимы),
+        # определяется один раз; страницы, перенаправляющие на другой источник, не обходятся
+        origin = None
+
+        pages: List[Dict] = []
+        seen: Set[str] = {canonicalize_url(self.url)[0] or self.url}
+        queue: List[Tuple[str, int]] = [(self.url, 0)]
+        skipped = Counter()
+        stopped = None
+        last_request = 0.0
+
+        executor = ThreadPoolExecutor(max_workers=max(1, self.limits.concurrency))
+        pending = {}
+        try:
+            while queue or pending:
+                # Запускаем страницы из очереди, пока есть свободные слоты
+                while queue and len(pending) < self.limits.concurrency and stopped is None:
+                    if len(pages) + len(pending) >= self.limits.max_pages:
+                        stopped = 'max_pages'
+                        break
+                    if time.monotonic() >= deadline:
+                        stopped = 'max_seconds'
+                        break
+                    url, depth = queue.pop(0)
+                    # Стартовая страница запрошена пользователем явно и проверяется всегда
+                    if depth > 0 and not policy.allowed(url):
+                        skipped['robots'] += 1
+                        continue
+                    if delay:
+                        # Crawl-delay из robots.txt: пауза между запросами к сайту (не дольше бюджета времени)
+                        time.sleep(max(0.0, min(last_request + delay, deadline) - time.monotonic()))
+                        last_request = time.monotonic()
+                    pending[executor.submit(self._scan_page, url, depth, policy.result, origin)] = url
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    stopped = 'max_seconds'
+                    break
+
+                for future in done:
+                    pending.pop(future)
+                    page, links = future.result()
+                    pages.append(page)
+                    if page['depth'] == 0 and page.get('final_url'):
+                        origin = _origin(page['final_url'])
+                        if origin != _origin(self.url):
+                            # robots.txt действует для источника, на который перенаправила стартовая страница
+                            policy = self.robots.get(page['final_url'], self.transport)
+                            delay = policy.crawl_delay() or 0.0
+                    if page.get('skipped'):
+                        skipped[page['skipped']] += 1
+                    yield 'page', page
+
+                    if page['depth'] < self.limits.max_depth:
+                        for link in links:
+                            if link not in seen:
+                                seen.add(link)
+                                queue.append((link, page['depth'] + 1))
+        finally:
+            # Незапущенные страницы отменяются (лимит, остановка или отключение клиента)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if stopped is None and queue:
+            stopped = 'max_pages'
+        yield 'summary', {
+            'url': self.url,
+            'pages_scanned': len(pages),
+            'pages_queued': len(queue) + len(pending),
+            'skipped': dict(skipped),
+            'stopped': stopped,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+            'robots': {'found': policy.found, 'crawl_delay': policy.crawl_delay()},
+            'limits': self.limits.to_dict(),
+            'consistency': consistency(pages)
+        }
+
+    def crawl(self) -> Dict:
+        """Выполняет обход целиком: сводка со списком страниц"""
+        pages = []
+        summary = None
+        for kind, value in self.iter_results():
+            if kind == 'page':
+                pages.append(value)
+            else:
+                summary = value
+        return dict(summary, pages=pages)
+
+    def _scan_page(self, url: str, depth: int, robots: FetchResult,
+                   origin: Tuple[str, str] = None) -> Tuple[Dict, List[str]]:
+        """
+        Проверки одной страницы; robots.txt берется из кэша, а не запрашивается заново
+
+        Страница, перенаправившая на другой источник (не origin), не проверяется,
+        и ссылки из нее не извлекаются.
+        """
+        capture = ScanCapture(url=url, timestamp=datetime.now().isoformat(), robots=robots)
+        io = ScanIO(url, capture=capture, transport=self.transport)
+        meter = ResourceMeter(self.budget)
+
+        with metering(meter):
+            page = io.page()
+        result = {'url': url, 'depth': depth}
+        if not page.ok or page.final.status_code >= 400:
+            result.update({
+                'ok': False,
+                'status_code': page.final.status_code if page.final else None,
+                'error': page.error or f'HTTP {page.final.status_code}',
+                'resources': meter.to_dict()
+            })
+            return result, []
+        if origin is not None and _origin(page.final.url) != origin:
+            result.update({
+                'ok': False,
+                'skipped': 'off_origin',
+                'final_url': page.final.url,
+                'status_code': page.final.status_code,
+                'resources': meter.to_dict()
+            })
+            return result, []
+
+        checks = []
+        for checker_class in self.CHECKERS:
+            checks.extend(SecurityService._run_checker(checker_class(url, io), meter))
+        headers = page.merged_headers()
+        score = sum(check.score for check in checks)
+        max_score = sum(check.max_score for check in checks)
+        result.update({
+            'ok': True,
+            'final_url': page.final.url,
+            'status_code': page.final.status_code,
+            'score': round(score, 1),
+            'max_score': round(max_score, 1),
+            'percentage': round(score / max_score * 100, 1) if max_score else 0.0,
+            'checks': [check.to_dict() for check in checks],
+            'headers': {name: headers.get(name) for name in CONSISTENCY_HEADERS},
+            'cookies': sorted({cookie.split('=', 1)[0].strip() for cookie in page.set_cookies()}),
+            'resources': meter.to_dict()
+        })
+        return result, extract_links(page, origin or _origin(page.final.url))
+
+
+def consistency(pages: List[Dict]) -> Dict:
+    """
+    Согласованность политик между страницами сайта
+
+    Для каждого заголовка - различающиеся значения и страницы без него,
+    для каждой проверки - распределение статусов. consistent=False означает,
+    что политика зависит от страницы.
+    """
+    scanned = [page for page in pages if page.get('ok')]
+    headers = {}
+    for name in CONSISTENCY_HEADERS:
+        values = Counter(page['headers'][name] for page in scanned)
+        missing = [page['url'] for page in scanned if page['headers'][name] is None]
+        headers[name] = {
+            'consistent': len(values) <= 1,
+            'variants': len([value for value in values if value is not None]),
+            'present': len(scanned) - len(missing),
+            'missing_on': missing[:10]
+        }
+
+    checks = {}
+    for page in scanned:
+        for check in page['checks']:
+            entry = checks.setdefault(check['name'], {'statuses': Counter(), 'pages': {}})
+            entry['statuses'][check['status']] += 1
+            entry['pages'].setdefault(check['status'], page['url'])
+    checks = {
+        name: {
+            'consistent': len(entry['statuses']) == 1,
+            'statuses': dict(entry['statuses']),
+            # Пример страницы для каждого статуса
+            'examples': entry['pages'] if len(entry['statuses']) > 1 else {}
+        }
+        for name, entry in checks.items()
+    }
+
+    percentages = [page['percentage'] for page in scanned]
+    inconsistent = [name for name, entry in headers.items() if not entry['consistent']]
+    inconsistent += [name for name, entry in checks.items() if not entry['consistent']]
+    return {
+        'pages': len(scanned),
+        'errors': len([page for page in pages if not page.get('ok') and not page.get('skipped')]),
+        'consistent': not inconsistent,
+        'inconsistent': inconsistent,
+        'score': {
+            'min': min(percentages),
+            'max': max(percentages),
+            'mean': round(sum(percentages) / len(percentages), 1)
+        } if percentages else None,
+        'headers': headers,
+        'checks': checks
+    }
+
+
+# Лимиты обхода по умолчанию (настраиваются в create_app) и кэш robots.txt процесса
+default_crawl_limits = CrawlLimits()
+robots_cache = RobotsCache()
@@ -0,0 +1,340 @@
+"""
+Потоковая сводка по результатам проверок с постоянным расходом памяти
+
+Отчеты не хранятся: каждый отчет обновляет небольшие объединяемые структуры
+(скетчи) - дайджест квантилей (t-digest), HyperLogLog для числа различных
+значений и счетчики. Скетчи параллельных процессов и отдельных запусков
+объединяются через merge() или сериализованный вид to_dict()/from_dict().
+"""
+import base64
+import hashlib
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlparse
+from app.utils.score_calculator import calculate_level
+
+LEVELS = ('excellent', 'good', 'satisfactory', 'low')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+SKETCH_VERSION = 1
+
+
+class TDigest:
+    """
+    Дайджест квантилей (merging t-digest)
+
+    Значения копятся в буфере и периодически сжимаются в центроиды (среднее, вес).
+    Размер центроида ограничен функцией масштаба k1, поэтому у краев распределения
+    центроиды мельче и крайние квантили точнее. Число центроидов не превышает
+    примерно compression при любом числе значений.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: List[List[float]] = []  # [среднее, вес], по возрастанию среднего
+        self._buffer: List[List[float]] = []
+        self._buffer_limit = int(compression * 5)
+
+    @property
+    def count(self) -> float:
+        return sum(weight for _, weight in self._centroids) + sum(weight for _, weight in self._buffer)
+
+    def add(self, value: float, weight: float = 1.0):
+        if value is None or math.isnan(value):
+            return
+        self._buffer.append([value, weight])
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Добавляет центроиды другого дайджеста"""
+        other._compress()
+        self._buffer.extend([mean, weight] for mean, weight in other._centroids)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _q_limit(self, q: float) -> float:
+        """Верхняя граница доли для центроида, начинающегося на доле q (k1: k(q) = d/2pi * asin(2q - 1))"""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer, key=lambda item: item[0])
+        self._buffer = []
+        total = sum(weight for _, weight in items)
+
+        merged = []
+        current = list(items[0])
+        weight_before = 0.0
+        q_limit = self._q_limit(0.0)
+        for mean, weight in items[1:]:
+            if (weight_before + current[1] + weight) / total <= q_limit:
+                current[1] += weight
+                current[0] += (mean - current[0]) * weight / current[1]
+            else:
+                merged.append(current)
+                weight_before += current[1]
+                q_limit = self._q_limit(weight_before / total)
+                current = [mean, weight]
+        merged.append(current)
+        self._centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля q (0..1) интерполяцией между центрами центроидов"""
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1 or q <= 0:
+            return self.min if q <= 0 else self._centroids[0][0]
+        if q >= 1:
+            return self.max
+
+        total = sum(weight for _, weight in self._centroids)
+        target = q * total
+        first_mean, first_weight = self._centroids[0]
+        if target < first_weight / 2:
+            return self.min + (first_mean - self.min) * target / (first_weight / 2)
+
+        cumulative = 0.0
+        for (mean, weight), (next_mean, next_weight) in zip(self._centroids, self._centroids[1:]):
+            center = cumulative + weight / 2
+            next_center = cumulative + weight + next_weight / 2
+            if target < next_center:
+                return mean + (next_mean - mean) * (target - center) / (next_center - center)
+            cumulative += weight
+
+        last_mean, last_weight = self._centroids[-1]
+        position = (target - (total - last_weight / 2)) / (last_weight / 2)
+        return last_mean + (self.max - last_mean) * min(position, 1.0)
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {
+            'compression': self.compression,
+            'min': self.min if self._centroids else None,
+            'max': self.max if self._centroids else None,
+            'centroids': [[round(mean, 6), weight] for mean, weight in self._centroids]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TDigest':
+        digest = cls(data.get('compression', 100.0))
+        digest._centroids = [[mean, weight] for mean, weight in data.get('centroids') or []]
+        if digest._centroids:
+            digest.min = data['min']
+            digest.max = data['max']
+        return digest
+
+
+class HyperLogLog:
+    """
+    Оценка числа различных значений (HyperLogLog, 2^precision однобайтовых регистров)
+
+    При precision=12 занимает 4 КБ, стандартная ошибка около 1.6%.
+    Объединение - поэлементный максимум регистров.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError('precision должна быть от 4 до 16')
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        rest_bits = 64 - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError('Нельзя объединить HyperLogLog с разной точностью')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        # Поправка для малых значений: подсчет по пустым регистрам (linear counting)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> Dict:
+        return {'precision': self.precision, 'registers': base64.b64encode(bytes(self.registers)).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HyperLogLog':
+        sketch = cls(data['precision'])
+        registers = base64.b64decode(data['registers'])
+        if len(registers) != len(sketch.registers):
+            raise ValueError('Размер регистров HyperLogLog не соответствует точности')
+        sketch.registers = bytearray(registers)
+        return sketch
+
+
+def _disclosed_servers(report: Dict) -> List[str]:
+    """Значения Server и X-Powered-By из проверки раскрытия информации о сервере"""
+    for check in report.get('checks') or []:
+        if check.get('category') == 'server':
+            disclosed = (check.get('details') or {}).get('disclosed_info')
+            if disclosed:
+                return list(disclosed)
+    return []
+
+
+class StreamingSummary:
+    """
+    Сводка по потоку отчетов: оценки, уровни, категории, серверы
+
+    add() принимает словарь SecurityReport.to_dict() и не сохраняет его.
+    Методы потокобезопасны, summary() можно вызывать во время обработки.
+    """
+
+    def __init__(self, compression: float = 100.0, precision: int = 12):
+        self.compression = compression
+        self.precision = precision
+        self.reports = 0
+        self.errors = 0
+        self.levels: Counter = Counter()
+        self.percentage = TDigest(compression)
+        self.percentage_sum = 0.0
+        self.categories: Dict[str, TDigest] = {}
+        self.disclosing = 0  # Отчеты, раскрывающие Server или X-Powered-By
+        self.servers = HyperLogLog(precision)
+        self.hosts = HyperLogLog(precision)
+        self._lock = threading.Lock()
+
+    def add(self, report: Dict):
+        """Учитывает отчет (словарь SecurityReport.to_dict())"""
+        percentage = report.get('percentage') or 0.0
+        level, _ = calculate_level(percentage)
+        servers = _disclosed_servers(report)
+        host = urlparse(report.get('url', '')).hostname
+
+        with self._lock:
+            self.reports += 1
+            self.levels[level] += 1
+            self.percentage.add(percentage)
+            self.percentage_sum += percentage
+            for category, score in (report.get('categories') or {}).items():
+                digest = self.categories.get(category)
+                if digest is None:
+                    digest = self.categories[category] = TDigest(self.compression)
+                digest.add(score)
+            if servers:
+                self.disclosing += 1
+                for server in servers:
+                    self.servers.add(server)
+            if host:
+                self.hosts.add(host)
+
+    def add_error(self):
+        """Учитывает проверку, завершившуюся ошибкой"""
+        with self._lock:
+            self.errors += 1
+
+    def extend(self, results: Iterable[Dict]) -> 'StreamingSummary':
+        """Учитывает результаты в формате scan (success=False - ошибка проверки)"""
+        for result in results:
+            if result.get('success', True) and 'checks' in result:
+                self.add(result)
+            elif 'error' in result:
+                self.add_error()
+        return self
+
+    def merge(self, other: 'StreamingSummary') -> 'StreamingSummary':
+        """Объединяет сводку другого процесса или запуска"""
+        with self._lock:
+            self.reports += other.reports
+            self.errors += other.errors
+            self.levels.update(other.levels)
+            self.percentage.merge(other.percentage)
+            self.percentage_sum += other.percentage_sum
+            for category, digest in other.categories.items():
+                if category in self.categories:
+                    self.categories[category].merge(digest)
+                else:
+                    self.categories[category] = TDigest(self.compression).merge(digest)
+            self.disclosing += other.disclosing
+            self.servers.merge(other.servers)
+            self.hosts.merge(other.hosts)
+        return self
+
+    @staticmethod
+    def _distribution(digest: TDigest, percentiles: Sequence[float]) -> Dict:
+        if not digest.count:
+            return {'count': 0}
+        return {
+            'count': int(digest.count),
+            'min': round(digest.min, 1),
+            'max': round(digest.max, 1),
+            'percentiles': {f'p{p:g}': round(digest.quantile(p / 100), 1) for p in percentiles}
+        }
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+        """Текущая сводка (квантили и числа различных значений - оценки)"""
+        with self._lock:
+            percentage = self._distribution(self.percentage, percentiles)
+            if self.reports:
+                percentage['mean'] = round(self.percentage_sum / self.reports, 1)
+            return {
+                'reports': self.reports,
+                'errors': self.errors,
+                'levels': {level: self.levels.get(level, 0) for level in LEVELS},
+                'percentage': percentage,
+                'categories': {
+                    category: self._distribution(digest, percentiles)
+                    for category, digest in sorted(self.categories.items())
+                },
+                'servers': {'disclosing': self.disclosing, 'distinct': self.servers.count()},
+                'hosts': {'distinct': self.hosts.count()}
+            }
+
+    def to_dict(self) -> Dict:
+        """Сериализуемое состояние для объединения в другом процессе"""
+        with self._lock:
+            return {
+                'version': SKETCH_VERSION,
+                'reports': self.reports,
+                'errors': self.errors,
+                'levels': dict(self.levels),
+                'percentage': self.percentage.to_dict(),
+                'percentage_sum': self.percentage_sum,
+                'categories': {category: digest.to_dict() for category, digest in self.categories.items()},
+                'disclosing': self.disclosing,
+                'servers': self.servers.to_dict(),
+                'hosts': self.hosts.to_dict()
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StreamingSummary':
+        if data.get('version') != SKETCH_VERSION:
+            raise ValueError(f'Неподдерживаемая версия сводки: {data.get("version")}')
+        percentage = TDigest.from_dict(data['percentage'])
+        servers = HyperLogLog.from_dict(data['servers'])
+        summary = cls(compression=percentage.compression, precision=servers.precision)
+        summary.reports = data['reports']
+        summary.errors = data['errors']
+        summary.levels = Counter(data['levels'])
+        summary.percentage = percentage
+        summary.percentage_sum = data['percentage_sum']
+        summary.categories = {category: TDigest.from_dict(digest) for category, digest in data['categories'].items()}
+        summary.disclosing = data['disclosing']
+        summary.servers = servers
+        summary.hosts = HyperLogLog.from_dict(data['hosts'])
+        return summary
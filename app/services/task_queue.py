@@ -0,0 +1,738 @@
+"""
+Общая очередь задач проверки для распределенных воркеров
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:  # redis не обязателен: исключение нужно FakeRedis
+    class WatchError(Exception):
+        """Транзакция отклонена: отслеживаемый ключ изменился (как redis.exceptions.WatchError)"""
+
+
+@dataclass
+class ScanTask:
+    """Задача на проверку одного URL"""
+    id: str
+    url: str
+    status: str  # 'pending', 'leased', 'done', 'failed'
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    lease_until: Optional[float] = None
+    available_at: float = 0.0
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    def to_dict(self):
+        """Преобразование в словарь для JSON"""
+        return asdict(self)
+
+
+class BaseTaskQueue:
+    """
+    Интерфейс очереди задач
+
+    Воркер берет задачу в аренду (lease) на ограниченное время и продлевает ее
+    heartbeat-ом. Если воркер упал и аренда истекла, задача возвращается
+    в очередь и достается другому воркеру. После max_attempts неудачных
+    попыток задача помечается как failed.
+    """
+
+    def __init__(self, max_attempts: int = 3, retry_backoff: float = 5.0):
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    def enqueue(self, url: str) -> str:
+        """Добавляет задачу в очередь и возвращает ее идентификатор"""
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[ScanTask]:
+        """Берет следующую доступную задачу в аренду"""
+        raise NotImplementedError
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Продлевает аренду. False - задача больше не принадлежит воркеру"""
+        raise NotImplementedError
+
+    def complete(self, task_id: str, worker_id: str, result: Dict) -> bool:
+        """Сохраняет результат задачи"""
+        raise NotImplementedError
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        """Отмечает неудачную попытку (задача будет повторена или помечена failed)"""
+        raise NotImplementedError
+
+    def get(self, task_id: str) -> Optional[ScanTask]:
+        """Возвращает задачу по идентификатору"""
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """Возвращает в очередь задачи с истекшей арендой (упавшие воркеры)"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Количество задач по статусам"""
+        raise NotImplementedError
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Экспоненциальная задержка перед повтором"""
+        return self.retry_backoff * (2 ** max(attempts - 1, 0))
+
+
+class SQLiteTaskQueue(BaseTaskQueue):
+    """Очередь в файле SQLite: общая для процессов на одной машине или на общем диске"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_id TEXT,
+            lease_until REAL,
+            available_at REAL NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_pending ON tasks (status, available_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_leases ON tasks (status, lease_until);
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Открывает соединение на время операции"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Транзакция с немедленной блокировкой на запись (атомарная аренда между процессами)"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def _row_to_task(row: sqlite3.Row) -> ScanTask:
+        data = dict(row)
+        data['result'] = json.loads(data['result']) if data['result'] else None
+        return ScanTask(**data)
+
+    def enqueue(self, url: str) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                '''INSERT INTO tasks (id, url, status, available_at, created_at, updated_at)
+                   VALUES (?, ?, 'pending', ?, ?, ?)''',
+                (task_id, url, now, now, now)
+            )
+        return task_id
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[ScanTask]:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                '''SELECT id FROM tasks WHERE status = 'pending' AND available_at <= ?
+                   ORDER BY available_at LIMIT 1''',
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                '''UPDATE tasks SET status = 'leased', worker_id = ?, lease_until = ?,
+                                    attempts = attempts + 1, updated_at = ?
+                   WHERE id = ?''',
+                (worker_id, now + lease_seconds, now, row['id'])
+            )
+            task = conn.execute('SELECT * FROM tasks WHERE id = ?', (row['id'],)).fetchone()
+        return self._row_to_task(task)
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                '''UPDATE tasks SET lease_until = ?, updated_at = ?
+                   WHERE id = ? AND worker_id = ? AND status = 'leased' ''',
+                (now + lease_seconds, now, task_id, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def complete(self, task_id: str, worker_id: str, result: Dict) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                '''UPDATE tasks SET status = 'done', result = ?, error = NULL,
+                                    lease_until = NULL, updated_at = ?
+                   WHERE id = ? AND worker_id = ? AND status = 'leased' ''',
+                (json.dumps(result, ensure_ascii=False, separators=(',', ':')), now, task_id, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (task_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return False
+
+            if row['attempts'] >= self.max_attempts:
+                conn.execute(
+                    '''UPDATE tasks SET status = 'failed', error = ?, lease_until = NULL, updated_at = ?
+                       WHERE id = ?''',
+                    (error, now, task_id)
+                )
+            else:
+                conn.execute(
+                    '''UPDATE tasks SET status = 'pending', error = ?, worker_id = NULL, lease_until = NULL,
+                                        available_at = ?, updated_at = ?
+                       WHERE id = ?''',
+                    (error, now + self._retry_delay(row['attempts']), now, task_id)
+                )
+            return True
+
+    def get(self, task_id: str) -> Optional[ScanTask]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                '''UPDATE tasks SET status = 'failed', error = 'Аренда истекла: воркер не отвечает',
+                                    lease_until = NULL, updated_at = ?
+                   WHERE status = 'leased' AND lease_until < ? AND attempts >= ?''',
+                (now, now, self.max_attempts)
+            )
+            cursor = conn.execute(
+                '''UPDATE tasks SET status = 'pending', worker_id = NULL, lease_until = NULL,
+                                    available_at = ?, updated_at = ?
+                   WHERE status = 'leased' AND lease_until < ?''',
+                (now, now, now)
+            )
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS total FROM tasks GROUP BY status').fetchall()
+        return {row['status']: row['total'] for row in rows}
+
+
+class RedisTaskQueue(BaseTaskQueue):
+    """
+    Очередь в Redis (или совместимом сервере) для воркеров на разных машинах
+
+    Структуры:
+        {prefix}:task:{id}  - hash с полями задачи
+        {prefix}:pending    - list готовых к выполнению задач
+        {prefix}:processing - list задач в работе
+        {prefix}:leases     - zset аренд (score = время истечения)
+        {prefix}:delayed    - zset отложенных повторов (score = время доступности)
+        {prefix}:finished   - hash счетчиков завершенных задач (done, failed)
+
+    Проверка владельца и запись выполняются одной транзакцией WATCH/MULTI
+    по hash задачи: если аренда истекла и задачу забрал другой воркер,
+    запись устаревшего воркера отклоняется.
+    """
+
+    def __init__(self, client, prefix: str = 'seccheck', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisTaskQueue':
+        """Создает очередь по URL вида redis://host:6379/0"""
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('Для очереди Redis установите пакет redis: pip install redis')
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, *parts: str) -> str:
+        return ':'.join((self.prefix,) + parts)
+
+    @staticmethod
+    def _decode(value):
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def _load(self, task_id: str, client=None) -> Optional[ScanTask]:
+        raw = (client or self.client).hgetall(self._key('task', task_id))
+        if not raw:
+            return None
+        data = {self._decode(k): self._decode(v) for k, v in raw.items()}
+
+        def optional_float(name):
+            return float(data[name]) if data.get(name) else None
+
+        return ScanTask(
+            id=task_id,
+            url=data['url'],
+            status=data['status'],
+            attempts=int(data.get('attempts', 0)),
+            worker_id=data.get('worker_id') or None,
+            lease_until=optional_float('lease_until'),
+            available_at=float(data.get('available_at', 0)),
+            result=json.loads(data['result']) if data.get('result') else None,
+            error=data.get('error') or None,
+            created_at=float(data.get('created_at', 0)),
+            updated_at=float(data.get('updated_at', 0))
+        )
+
+    def _atomic(self, task_id: str, update: Callable) -> bool:
+        """
+        Транзакция по задаче: update(pipe, task) читает состояние и, если запись нужна,
+        вызывает pipe.multi() и добавляет команды. False из update - запись не нужна.
+        При изменении задачи другим клиентом до EXEC транзакция повторяется.
+        """
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._key('task', task_id))
+                    if not update(pipe, self._load(task_id, pipe)):
+                        pipe.unwatch()
+                        return False
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+    def _release(self, pipe, task_id: str):
+        """Убирает задачу из списка выполняемых и из аренд (в транзакции pipe)"""
+        pipe.zrem(self._key('leases'), task_id)
+        pipe.lrem(self._key('processing'), 1, task_id)
+
+    @staticmethod
+    def _owned(task: Optional[ScanTask], worker_id: str) -> bool:
+        return task is not None and task.worker_id == worker_id and task.status == 'leased'
+
+    def enqueue(self, url: str) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.hset(self._key('task', task_id), mapping={
+            'url': url,
+            'status': 'pending',
+            'attempts': 0,
+            'available_at': now,
+            'created_at': now,
+            'updated_at': now
+        })
+        pipe.lpush(self._key('pending'), task_id)
+        pipe.execute()
+        return task_id
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[ScanTask]:
+        self._promote_delayed()
+
+        # Извлечение из очереди и запись аренды - одна транзакция WATCH/MULTI по списку
+        # ожидающих: задача не может остаться в списке выполняемых без аренды
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._key('pending'))
+                    task_id = self._decode(pipe.lindex(self._key('pending'), -1))
+                    if task_id is None:
+                        pipe.unwatch()
+                        return None
+                    now = time.time()
+                    pipe.multi()
+                    pipe.rpop(self._key('pending'))
+                    pipe.lpush(self._key('processing'), task_id)
+                    pipe.zadd(self._key('leases'), {task_id: now + lease_seconds})
+                    pipe.hincrby(self._key('task', task_id), 'attempts', 1)
+                    pipe.hset(self._key('task', task_id), mapping={
+                        'status': 'leased',
+                        'worker_id': worker_id,
+                        'lease_until': now + lease_seconds,
+                        'updated_at': now
+                    })
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        return self._load(task_id)
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        def update(pipe, task):
+            if not self._owned(task, worker_id):
+                return False
+            now = time.time()
+            pipe.multi()
+            pipe.zadd(self._key('leases'), {task_id: now + lease_seconds})
+            pipe.hset(self._key('task', task_id), mapping={'lease_until': now + lease_seconds, 'updated_at': now})
+            return True
+
+        return self._atomic(task_id, update)
+
+    def complete(self, task_id: str, worker_id: str, result: Dict) -> bool:
+        def update(pipe, task):
+            if not self._owned(task, worker_id):
+                return False
+            pipe.multi()
+            pipe.hset(self._key('task', task_id), mapping={
+                'status': 'done',
+                'result': json.dumps(result, ensure_ascii=False, separators=(',', ':')),
+                'error': '',
+                'lease_until': '',
+                'updated_at': time.time()
+            })
+            pipe.hincrby(self._key('finished'), 'done', 1)
+            self._release(pipe, task_id)
+            return True
+
+        return self._atomic(task_id, update)
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        def update(pipe, task):
+            if not self._owned(task, worker_id):
+                return False
+            now = time.time()
+            pipe.multi()
+            self._release(pipe, task_id)
+            if task.attempts >= self.max_attempts:
+                pipe.hset(self._key('task', task_id), mapping={
+                    'status': 'failed', 'error': error, 'lease_until': '', 'updated_at': now
+                })
+                pipe.hincrby(self._key('finished'), 'failed', 1)
+            else:
+                available_at = now + self._retry_delay(task.attempts)
+                pipe.hset(self._key('task', task_id), mapping={
+                    'status': 'pending', 'error': error, 'worker_id': '', 'lease_until': '',
+                    'available_at': available_at, 'updated_at': now
+                })
+                pipe.zadd(self._key('delayed'), {task_id: available_at})
+            return True
+
+        return self._atomic(task_id, update)
+
+    def get(self, task_id: str) -> Optional[ScanTask]:
+        return self._load(task_id)
+
+    def _promote_delayed(self):
+        """Переносит отложенные задачи, время которых пришло, в очередь"""
+        due = self.client.zrangebyscore(self._key('delayed'), '-inf', time.time())
+        for raw_id in due:
+            task_id = self._decode(raw_id)
+            # Только тот, кто удалил запись, переносит задачу - защита от дублей
+            if self.client.zrem(self._key('delayed'), task_id):
+                self.client.lpush(self._key('pending'), task_id)
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+
+        # Задачи в списке выполняемых без аренды (оставшиеся от прежнего неатомарного lease)
+        # получают аренду здесь. Завершенные задачи только убираются из списка выполняемых
+        for raw_id in self.client.lrange(self._key('processing'), 0, -1):
+            task_id = self._decode(raw_id)
+
+            def update(pipe, task):
+                if pipe.zscore(self._key('leases'), task_id) is not None:
+                    return False
+                pipe.multi()
+                if task is None or task.status in ('done', 'failed'):
+                    pipe.lrem(self._key('processing'), 1, task_id)
+                else:
+                    pipe.zadd(self._key('leases'), {task_id: now + 60}, nx=True)
+                return True
+
+            self._atomic(task_id, update)
+
+        requeued = 0
+        for raw_id in self.client.zrangebyscore(self._key('leases'), '-inf', now):
+            task_id = self._decode(raw_id)
+
+            def update(pipe, task):
+                nonlocal requeued
+                # Аренда могла быть продлена или снята после выборки
+                expires = pipe.zscore(self._key('leases'), task_id)
+                if expires is None or float(expires) > now:
+                    return False
+                pipe.multi()
+                self._release(pipe, task_id)
+                if task is None or task.status not in ('leased', 'pending'):
+                    return True
+                if task.attempts >= self.max_attempts:
+                    pipe.hset(self._key('task', task_id), mapping={
+                        'status': 'failed', 'error': 'Аренда истекла: воркер не отвечает',
+                        'lease_until': '', 'updated_at': now
+                    })
+                    pipe.hincrby(self._key('finished'), 'failed', 1)
+                else:
+                    pipe.hset(self._key('task', task_id), mapping={
+                        'status': 'pending', 'worker_id': '', 'lease_until': '', 'updated_at': now
+                    })
+                    pipe.lpush(self._key('pending'), task_id)
+                    requeued += 1
+                return True
+
+            self._atomic(task_id, update)
+        return requeued
+
+    def stats(self) -> Dict[str, int]:
+        finished = {self._decode(k): int(v) for k, v in self.client.hgetall(self._key('finished')).items()}
+        return {
+            'pending': self.client.llen(self._key('pending')) + self.client.zcard(self._key('delayed')),
+            'leased': self.client.zcard(self._key('leases')),
+            'done': finished.get('done', 0),
+            'failed': finished.get('failed', 0)
+        }
+
+
+class FakeRedis:
+    """
+    Redis в памяти процесса с командами, которые использует RedisTaskQueue
+
+    Локальная замена сервера для разработки и проверки очереди без Redis
+    (open_task_queue('memory://')): воркеры в потоках одного процесса делят
+    один экземпляр. Транзакции WATCH/MULTI/EXEC ведут себя как в Redis -
+    EXEC отклоняется с WatchError, если отслеживаемый ключ изменился.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data: Dict[str, object] = {}
+        self._versions: Dict[str, int] = {}
+
+    def _touch(self, key: str):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _get(self, key: str, factory):
+        value = self._data.get(key)
+        if value is None:
+            value = self._data[key] = factory()
+        return value
+
+    def _cleanup(self, key: str):
+        if not self._data.get(key):
+            self._data.pop(key, None)
+
+    def pipeline(self, transaction: bool = True) -> 'FakePipeline':
+        return FakePipeline(self)
+
+    # --- hash ---
+
+    def hset(self, key: str, field: str = None, value=None, mapping: Dict = None) -> int:
+        with self._lock:
+            values = dict(mapping or {})
+            if field is not None:
+                values[field] = value
+            data = self._get(key, dict)
+            added = len(set(values) - set(data))
+            data.update({name: str(item) for name, item in values.items()})
+            self._touch(key)
+            return added
+
+    def hget(self, key: str, field: str):
+        with self._lock:
+            return self._data.get(key, {}).get(field)
+
+    def hmget(self, key: str, *fields):
+        with self._lock:
+            data = self._data.get(key, {})
+            return [data.get(field) for field in fields]
+
+    def hgetall(self, key: str) -> Dict:
+        with self._lock:
+            return dict(self._data.get(key, {}))
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            data = self._get(key, dict)
+            data[field] = str(int(data.get(field, 0)) + amount)
+            self._touch(key)
+            return int(data[field])
+
+    # --- list ---
+
+    def lpush(self, key: str, *values) -> int:
+        with self._lock:
+            items = self._get(key, list)
+            for value in values:
+                items.insert(0, str(value))
+            self._touch(key)
+            return len(items)
+
+    def rpop(self, key: str):
+        with self._lock:
+            items = self._data.get(key)
+            if not items:
+                return None
+            value = items.pop()
+            self._cleanup(key)
+            self._touch(key)
+            return value
+
+    def lindex(self, key: str, index: int):
+        with self._lock:
+            items = self._data.get(key) or []
+            try:
+                return items[index]
+            except IndexError:
+                return None
+
+    def lrem(self, key: str, count: int, value) -> int:
+        with self._lock:
+            items = self._data.get(key) or []
+            removed = 0
+            while str(value) in items and (count == 0 or removed < abs(count)):
+                items.remove(str(value))
+                removed += 1
+            if removed:
+                self._cleanup(key)
+                self._touch(key)
+            return removed
+
+    def lrange(self, key: str, start: int, end: int) -> list:
+        with self._lock:
+            items = self._data.get(key) or []
+            return list(items[start:None if end == -1 else end + 1])
+
+    def llen(self, key: str) -> int:
+        with self._lock:
+            return len(self._data.get(key) or [])
+
+    # --- sorted set ---
+
+    def zadd(self, key: str, mapping: Dict, nx: bool = False) -> int:
+        with self._lock:
+            scores = self._get(key, dict)
+            added = 0
+            for member, score in mapping.items():
+                if nx and member in scores:
+                    continue
+                added += member not in scores
+                scores[str(member)] = float(score)
+            self._touch(key)
+            return added
+
+    def zrem(self, key: str, *members) -> int:
+        with self._lock:
+            scores = self._data.get(key) or {}
+            removed = sum(1 for member in members if scores.pop(str(member), None) is not None)
+            if removed:
+                self._cleanup(key)
+                self._touch(key)
+            return removed
+
+    def zscore(self, key: str, member):
+        with self._lock:
+            return (self._data.get(key) or {}).get(str(member))
+
+    def zrangebyscore(self, key: str, minimum, maximum) -> list:
+        with self._lock:
+            low, high = float(minimum), float(maximum)
+            scores = self._data.get(key) or {}
+            return [member for member, score in sorted(scores.items(), key=lambda item: item[1])
+                    if low <= score <= high]
+
+    def zcard(self, key: str) -> int:
+        with self._lock:
+            return len(self._data.get(key) or {})
+
+
+class FakePipeline:
+    """Конвейер FakeRedis: после watch() команды выполняются сразу, после multi() - копятся до execute()"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self._commands = []
+        self._watched: Dict[str, int] = {}
+        self._immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def call(*args, **kwargs):
+            if self._immediate:
+                return command(*args, **kwargs)
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return call
+
+    def watch(self, *keys):
+        with self.client._lock:
+            self._watched.update({key: self.client._versions.get(key, 0) for key in keys})
+        self._immediate = True
+
+    def unwatch(self):
+        self._watched = {}
+        self._immediate = False
+
+    def multi(self):
+        self._immediate = False
+
+    def execute(self) -> list:
+        try:
+            with self.client._lock:
+                if any(self.client._versions.get(key, 0) != version for key, version in self._watched.items()):
+                    raise WatchError('Отслеживаемый ключ изменился')
+                return [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        finally:
+            self.reset()
+
+    def reset(self):
+        self._commands = []
+        self.unwatch()
+
+
+def open_task_queue(url: str, **kwargs) -> BaseTaskQueue:
+    """
+    Открывает очередь по строке подключения
+
+    Args:
+        url: 'redis://host:port/db', 'sqlite:///path/to/tasks.sqlite3', путь к файлу
+             или 'memory://' (RedisTaskQueue поверх FakeRedis, в пределах процесса)
+
+    Returns:
+        Экземпляр очереди
+    """
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisTaskQueue.from_url(url, **kwargs)
+    if url == 'memory://':
+        return RedisTaskQueue(FakeRedis(), **kwargs)
+    if url.startswith('sqlite:///'):
+        # sqlite:///relative.db или sqlite:////absolute/path.db
+        url = url[len('sqlite:///'):]
+    return SQLiteTaskQueue(url, **kwargs)
@@ -0,0 +1,233 @@
+"""
+Транспорт сетевых операций проверки: реальная сеть, запись и подмена в памяти
+"""
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+from app.models.scan_capture import CertificateInfo, FetchResult, HttpHop
+from app.services import http_fetch
+from app.services.resource_budget import BudgetExceeded, current_meter
+
+MAX_REDIRECTS = 30
+
+
+class Transport:
+    """
+    Интерфейс сетевых операций проверки
+
+    Через транспорт проходят все запросы ScanIO: страница (она же проверка
+    доступности), robots.txt и TLS соединение для сертификата.
+    """
+
+    # False - транспорт не обращается к сети: circuit breaker не используется,
+    # а проверщики выполняются последовательно (потокам нечего ждать)
+    network = True
+
+    def fetch(self, url: str, timeout: float = None, default_timeout: float = 10.0) -> FetchResult:
+        raise NotImplementedError('Метод fetch() должен быть переопределен')
+
+    def fetch_robots(self, url: str) -> FetchResult:
+        return self.fetch(urljoin(url, '/robots.txt'), default_timeout=5.0)
+
+    def fetch_certificate(self, url: str, hostname: str, port: int) -> CertificateInfo:
+        raise NotImplementedError('Метод fetch_certificate() должен быть переопределен')
+
+
+class NetworkTransport(Transport):
+    """Реальная сеть: requests или HTTP/2 (см. http_fetch) и TLS соединение"""
+
+    def fetch(self, url: str, timeout: float = None, default_timeout: float = 10.0) -> FetchResult:
+        return http_fetch.fetch(url, timeout, default_timeout)
+
+    def fetch_certificate(self, url: str, hostname: str, port: int) -> CertificateInfo:
+        return http_fetch.fetch_certificate(url, hostname, port)
+
+
+class RecordingTransport(Transport):
+    """
+    Записывает ответы другого транспорта
+
+    Записанное можно сохранить в JSON и подставить в FakeTransport:
+    так получаются регрессионные наборы с ответами реальных сайтов.
+    """
+
+    def __init__(self, inner: Transport = None):
+        self.inner = inner or NetworkTransport()
+        self.network = self.inner.network
+        self._lock = threading.Lock()
+        self.responses: Dict[str, FetchResult] = {}
+        self.certificates: Dict[Tuple[str, int], CertificateInfo] = {}
+
+    def fetch(self, url: str, timeout: float = None, default_timeout: float = 10.0) -> FetchResult:
+        result = self.inner.fetch(url, timeout, default_timeout)
+        with self._lock:
+            self.responses[url] = result
+        return result
+
+    def fetch_certificate(self, url: str, hostname: str, port: int) -> CertificateInfo:
+        certificate = self.inner.fetch_certificate(url, hostname, port)
+        with self._lock:
+            self.certificates[(hostname, port)] = certificate
+        return certificate
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'responses': [result.to_dict() for result in self.responses.values()],
+                'certificates': [certificate.to_dict() for certificate in self.certificates.values()]
+            }
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    def to_fake(self) -> 'FakeTransport':
+        """FakeTransport, отвечающий записанными данными"""
+        return FakeTransport.from_dict(self.to_dict())
+
+
+@dataclass
+class FakeResponse:
+    """Заготовленный ответ FakeTransport"""
+    status_code: int = 200
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    cookies: List[str] = field(default_factory=list)  # Значения Set-Cookie
+    latency_ms: float = 50.0                           # Записывается в elapsed_ms, без реального ожидания
+    body_size: int = 0                                 # Для учета ресурсов проверки (по умолчанию - длина body)
+    body: str = ''                                     # Тело ответа (HTML для обхода сайта, robots.txt)
+    http_version: str = 'HTTP/1.1'
+    alpn: Optional[str] = None
+
+    def to_hop(self, url: str) -> HttpHop:
+        return HttpHop(
+            url=url,
+            status_code=self.status_code,
+            headers=list(self.headers) + [('Set-Cookie', cookie) for cookie in self.cookies],
+            elapsed_ms=self.latency_ms,
+            http_version=self.http_version,
+            alpn=self.alpn
+        )
+
+
+def fake_certificate(hostname: str, port: int = 443, days_valid: int = 90,
+                     issuer: str = 'Fake CA', now: datetime = None) -> CertificateInfo:
+    """Сертификат в формате getpeercert(), действительный еще days_valid дней"""
+    now = now or datetime.now()
+    fields = {
+        'subject': ((('commonName', hostname),),),
+        'issuer': ((('organizationName', issuer),), (('commonName', issuer),)),
+        'notBefore': (now - timedelta(days=30)).strftime('%b %d %H:%M:%S %Y GMT'),
+        'notAfter': (now + timedelta(days=days_valid)).strftime('%b %d %H:%M:%S %Y GMT'),
+        'subjectAltName': (('DNS', hostname),)
+    }
+    return CertificateInfo(hostname=hostname, port=port, fields=fields, connect_ms=1.0)
+
+
+class FakeTransport(Transport):
+    """
+    Транспорт в памяти с заготовленными ответами
+
+    Ответы задаются по точному URL, редиректы - ответами 3xx с Location,
+    для неизвестных URL возвращается ошибка соединения (или default).
+    Полная проверка SecurityService с таким транспортом не обращается
+    к сети и выполняется за доли миллисекунды.
+    """
+
+    network = False
+
+    def __init__(self, default: Optional[FakeResponse] = None):
+        self.default = default
+        self.responses: Dict[str, FakeResponse] = {}
+        self.results: Dict[str, FetchResult] = {}
+        self.certificates: Dict[Tuple[str, int], CertificateInfo] = {}
+        self.requests: List[str] = []  # Журнал запрошенных URL
+
+    def add(self, url: str, response: FakeResponse = None, **kwargs) -> 'FakeTransport':
+        """Ответ на URL (FakeResponse или его поля в kwargs)"""
+        self.responses[url] = response or FakeResponse(**kwargs)
+        return self
+
+    def redirect(self, url: str, location: str, status_code: int = 301, **kwargs) -> 'FakeTransport':
+        headers = [('Location', location)] + list(kwargs.pop('headers', []))
+        return self.add(url, status_code=status_code, headers=headers, **kwargs)
+
+    def fail(self, url: str, error_kind: str = 'connection', error: str = 'Fake connection error') -> 'FakeTransport':
+        """Ошибка запроса: 'connection', 'connect_timeout', 'read_timeout' и т.п."""
+        self.results[url] = FetchResult(url=url, error=error, error_kind=error_kind)
+        return self
+
+    def certificate(self, hostname: str, port: int = 443, certificate: CertificateInfo = None,
+                    **kwargs) -> 'FakeTransport':
+        """Сертификат хоста (по умолчанию - fake_certificate с параметрами kwargs)"""
+        self.certificates[(hostname, port)] = certificate or fake_certificate(hostname, port, **kwargs)
+        return self
+
+    def fetch(self, url: str, timeout: float = None, default_timeout: float = 10.0) -> FetchResult:
+        self.requests.append(url)
+        if url in self.results:
+            return self.results[url]
+
+        meter = current_meter()
+        hops = []
+        current = url
+        try:
+            while True:
+                response = self.responses.get(current, self.default)
+                if response is None:
+                    return FetchResult(url=url, hops=[], error=f'No fake response for {current}',
+                                       error_kind='connection')
+                hop = response.to_hop(current)
+                hops.append(hop)
+                location = hop.header_dict().get('location') if 300 <= hop.status_code < 400 else None
+                body = response.body.encode('utf-8')
+                if meter is not None:
+                    size = response.body_size or len(body)
+                    meter.record_request(redirect=location is not None)
+                    meter.record_bytes(size, size)
+                if location is None:
+                    return FetchResult(url=url, hops=hops, body=body)
+                if len(hops) > MAX_REDIRECTS:
+                    return FetchResult(url=url, hops=hops, error=f'Exceeded {MAX_REDIRECTS} redirects.',
+                                       error_kind='too_many_redirects')
+                current = urljoin(current, location)
+        except BudgetExceeded as e:
+            return FetchResult(url=url, error=e.message, error_kind='budget')
+
+    def fetch_certificate(self, url: str, hostname: str, port: int) -> CertificateInfo:
+        certificate = self.certificates.get((hostname, port))
+        if certificate is None:
+            return CertificateInfo(hostname=hostname, port=port, error='Fake: сертификат не задан')
+        return certificate
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FakeTransport':
+        """FakeTransport из записи RecordingTransport.to_dict()"""
+        transport = cls()
+        for item in data.get('responses', []):
+            result = FetchResult.from_dict(item)
+            transport.results[result.url] = result
+        for item in data.get('certificates', []):
+            certificate = CertificateInfo.from_dict(item)
+            transport.certificates[(certificate.hostname, certificate.port)] = certificate
+        return transport
+
+    @classmethod
+    def load(cls, path: str) -> 'FakeTransport':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+# Транспорт процесса по умолчанию
+_default_transport: Transport = NetworkTransport()
+
+
+def set_default_transport(transport: Optional[Transport]):
+    global _default_transport
+    _default_transport = transport or NetworkTransport()
+
+
+def get_default_transport() -> Transport:
+    return _default_transport
@@ -0,0 +1,157 @@
+"""
+Массовый прием URL: канонизация, отбраковка и удаление дубликатов
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from app.utils.url_normalizer import canonicalize_url
+
+
+@dataclass
+class IngestEntry:
+    """Одна входная строка и ее судьба"""
+    line: int                          # Порядковый номер входного URL (с 1)
+    input: str                         # Исходное значение
+    key: Optional[str] = None          # Канонический URL - ключ проверки
+    reason: Optional[str] = None       # Причина отказа
+    first_line: Optional[int] = None   # Для дубликата - строка первого вхождения ключа
+
+    @property
+    def status(self) -> str:
+        if self.reason is not None:
+            return 'rejected'
+        return 'duplicate' if self.first_line is not None else 'new'
+
+    def to_dict(self):
+        result = {'line': self.line, 'input': self.input, 'status': self.status}
+        if self.key is not None:
+            result['key'] = self.key
+        if self.reason is not None:
+            result['reason'] = self.reason
+        if self.first_line is not None:
+            result['first_line'] = self.first_line
+        return result
+
+
+class MemoryKeyIndex:
+    """Уже встреченные ключи в памяти (для небольших списков, например запроса API)"""
+
+    def __init__(self):
+        self._first: Dict[str, int] = {}
+
+    def register(self, keys: List[tuple]) -> Dict[str, int]:
+        """
+        Регистрирует ключи порции
+
+        Args:
+            keys: Пары (ключ, номер строки) первых вхождений ключей в порции
+
+        Returns:
+            Номер строки первого вхождения для каждого ключа порции
+        """
+        for key, line in keys:
+            self._first.setdefault(key, line)
+        return {key: self._first[key] for key, _ in keys}
+
+    def close(self):
+        self._first.clear()
+
+
+class SqliteKeyIndex:
+    """
+    Уже встреченные ключи во временной базе SQLite
+
+    Память не растет с числом ключей: в процессе держится только порция
+    и кэш страниц SQLite, сами ключи лежат на диске.
+    """
+
+    # Ограничение SQLite на число параметров в запросе (старые версии - 999)
+    QUERY_CHUNK = 500
+
+    def __init__(self, path: str = None):
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='seccheck-ingest-', suffix='.sqlite3')
+            os.close(fd)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=OFF')
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, line INTEGER NOT NULL) WITHOUT ROWID')
+
+    def register(self, keys: List[tuple]) -> Dict[str, int]:
+        with self._conn:
+            self._conn.executemany('INSERT OR IGNORE INTO seen (key, line) VALUES (?, ?)', keys)
+
+        first = {}
+        names = [key for key, _ in keys]
+        for start in range(0, len(names), self.QUERY_CHUNK):
+            chunk = names[start:start + self.QUERY_CHUNK]
+            rows = self._conn.execute(
+                f'SELECT key, line FROM seen WHERE key IN ({",".join("?" * len(chunk))})', chunk
+            )
+            first.update(rows)
+        return first
+
+    def close(self):
+        self._conn.close()
+        if self._temporary:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def ingest_urls(values: Iterable[str], index=None, chunk_size: int = 10000) -> Iterator[IngestEntry]:
+    """
+    Канонизирует и дедуплицирует поток URL порциями
+
+    Каждый входной элемент дает ровно одну запись IngestEntry в исходном порядке:
+    new (первое вхождение ключа - его нужно проверить), duplicate (со ссылкой на
+    строку первого вхождения) или rejected (с причиной).
+
+    Args:
+        values: Входные строки (итератор - читается порциями)
+        index: Хранилище встреченных ключей (по умолчанию в памяти)
+        chunk_size: Размер порции
+    """
+    index = index if index is not None else MemoryKeyIndex()
+    iterator = iter(values)
+    line = 0
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+
+        entries = []
+        first_in_chunk: Dict[str, int] = {}
+        for value in chunk:
+            line += 1
+            key, reason = canonicalize_url(str(value))
+            entries.append(IngestEntry(line=line, input=value, key=key, reason=reason))
+            if key is not None:
+                first_in_chunk.setdefault(key, line)
+
+        first = index.register(list(first_in_chunk.items())) if first_in_chunk else {}
+        for entry in entries:
+            if entry.key is not None and first[entry.key] != entry.line:
+                entry.first_line = first[entry.key]
+            yield entry
+
+
+def read_url_lines(path: str) -> Iterator[str]:
+    """Строки файла со списком URL ("-" - stdin), без пустых строк и комментариев"""
+    stream: TextIO = sys.stdin if path == '-' else open(path, encoding='utf-8', errors='replace')
+    try:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
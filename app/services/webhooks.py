@@ -0,0 +1,447 @@
+"""
+Доставка результатов проверок на адреса обратного вызова (webhooks): пакеты, подпись HMAC, повторы, исходящая очередь на диске
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SIGNATURE_HEADER = 'X-SecCheck-Signature'
+TIMESTAMP_HEADER = 'X-SecCheck-Timestamp'
+DELIVERY_HEADER = 'X-SecCheck-Delivery'
+
+EVENT_SCAN_COMPLETED = 'scan.completed'
+
+
+def validate_callback_url(url) -> Optional[str]:
+    """
+    Проверяет адрес обратного вызова
+
+    Returns:
+        Причина отказа или None, если адрес подходит
+    """
+    if not isinstance(url, str) or not url.strip():
+        return 'callback_url должен быть непустой строкой'
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return 'callback_url должен быть адресом http:// или https://'
+    if len(url) > 2048:
+        return 'callback_url слишком длинный'
+    return None
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """
+    Подпись пакета: HMAC-SHA256 от "<timestamp>.<тело>"
+
+    Время входит в подпись, поэтому получатель может отклонять старые
+    пакеты и повторы перехваченных запросов.
+    """
+    message = timestamp.encode('ascii') + b'.' + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str,
+                     tolerance: Optional[float] = 300.0) -> bool:
+    """Проверка подписи на стороне получателя (tolerance - допустимый возраст пакета в секундах)"""
+    if tolerance is not None:
+        try:
+            if abs(time.time() - float(timestamp)) > tolerance:
+                return False
+        except ValueError:
+            return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature or '')
+
+
+def scan_event(report: Dict, source: str) -> Dict:
+    """Событие о завершенной проверке (report - SecurityReport.to_dict())"""
+    return {
+        'id': uuid.uuid4().hex,
+        'event': EVENT_SCAN_COMPLETED,
+        'source': source,
+        'url': report.get('url'),
+        'created_at': time.time(),
+        'report': report
+    }
+
+
+class WebhookOutbox:
+    """
+    Исходящая очередь событий на диске (SQLite)
+
+    Событие удаляется только после успешной доставки, поэтому перезапуск
+    процесса не теряет доставки. Размер очереди ограничен: при переполнении
+    сначала удаляются события с исчерпанными попытками (failed), затем самые
+    старые неотправленные (их число видно в stats). Событий failed хранится
+    не больше max_failed - они нужны только для разбора ошибок.
+
+    Перед отправкой события захватываются (status = 'sending', владелец и срок
+    захвата), как задачи SQLiteTaskQueue.lease: несколько процессов с общим
+    файлом очереди не отправляют один пакет дважды. События упавшего
+    процесса возвращаются в очередь по истечении срока захвата.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS webhook_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            callback_url TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            owner TEXT,
+            claimed_until REAL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due ON webhook_outbox (status, next_attempt_at);
+        CREATE INDEX IF NOT EXISTS idx_webhook_outbox_url ON webhook_outbox (callback_url, status, id);
+    """
+
+    def __init__(self, path: str, max_events: int = 10000, max_failed: int = 1000):
+        self.path = path
+        self.max_events = max_events
+        self.max_failed = max_failed
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._write_lock = threading.Lock()
+        self.dropped = 0
+        self.purged_failed = 0
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+            # Очереди, созданные до захвата событий перед отправкой
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(webhook_outbox)')}
+            if 'owner' not in columns:
+                conn.execute('ALTER TABLE webhook_outbox ADD COLUMN owner TEXT')
+                conn.execute('ALTER TABLE webhook_outbox ADD COLUMN claimed_until REAL')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, callback_url: str, events: List[Dict]) -> int:
+        """
+        Добавляет события для адреса
+
+        Returns:
+            Число событий, удаленных из-за переполнения очереди
+        """
+        now = time.time()
+        rows = [
+            (callback_url, json.dumps(event, ensure_ascii=False, separators=(',', ':')), now, now)
+            for event in events
+        ]
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO webhook_outbox (callback_url, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            excess = conn.execute('SELECT COUNT(*) FROM webhook_outbox').fetchone()[0] - self.max_events
+            if excess > 0:
+                # Первыми вытесняются события, которые уже не будут доставлены
+                excess -= self._purge_failed(conn, excess)
+            if excess > 0:
+                conn.execute(
+                    'DELETE FROM webhook_outbox WHERE id IN (SELECT id FROM webhook_outbox ORDER BY id LIMIT ?)',
+                    (excess,)
+                )
+                self.dropped += excess
+        return max(0, excess)
+
+    def _purge_failed(self, conn: sqlite3.Connection, limit: int) -> int:
+        """Удаляет до limit самых старых событий failed"""
+        cursor = conn.execute(
+            "DELETE FROM webhook_outbox WHERE id IN "
+            "(SELECT id FROM webhook_outbox WHERE status = 'failed' ORDER BY id LIMIT ?)",
+            (limit,)
+        )
+        self.purged_failed += cursor.rowcount
+        return cursor.rowcount
+
+    def next_due(self) -> Optional[float]:
+        """Время ближайшей доставки, включая истечение захватов (None - очередь пуста)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(CASE status WHEN 'pending' THEN next_attempt_at ELSE claimed_until END) "
+                "FROM webhook_outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()
+        return row[0]
+
+    def claim_batches(self, owner: str, now: float, batch_size: int,
+                      claim_seconds: float) -> List[Tuple[str, List[int], List[Dict], int]]:
+        """
+        Захватывает пакеты к отправке: события каждого адреса, время доставки которых наступило
+
+        Выборка и захват выполняются одной транзакцией с немедленной блокировкой
+        на запись, поэтому событие достается только одному процессу.
+
+        Returns:
+            Список (адрес, идентификаторы, события, попытки); попытки - максимум по пакету
+        """
+        with self._write_lock, self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Захваты упавших процессов истекли: события снова доступны
+            conn.execute(
+                "UPDATE webhook_outbox SET status = 'pending', owner = NULL, claimed_until = NULL "
+                "WHERE status = 'sending' AND claimed_until < ?",
+                (now,)
+            )
+            urls = [row[0] for row in conn.execute(
+                "SELECT DISTINCT callback_url FROM webhook_outbox WHERE status = 'pending' AND next_attempt_at <= ?",
+                (now,)
+            )]
+            batches = []
+            for url in urls:
+                rows = conn.execute(
+                    "SELECT id, payload, attempts FROM webhook_outbox "
+                    "WHERE callback_url = ? AND status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (url, now, batch_size)
+                ).fetchall()
+                ids = [row['id'] for row in rows]
+                conn.executemany(
+                    "UPDATE webhook_outbox SET status = 'sending', owner = ?, claimed_until = ? WHERE id = ?",
+                    [(owner, now + claim_seconds, id_) for id_ in ids]
+                )
+                batches.append((
+                    url,
+                    ids,
+                    [json.loads(row['payload']) for row in rows],
+                    max(row['attempts'] for row in rows)
+                ))
+        return batches
+
+    def delivered(self, ids: List[int], owner: str):
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM webhook_outbox WHERE id = ? AND owner = ? AND status = 'sending'",
+                [(id_, owner) for id_ in ids]
+            )
+
+    def retry(self, ids: List[int], owner: str, next_attempt_at: float, error: str):
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE webhook_outbox SET status = 'pending', owner = NULL, claimed_until = NULL, "
+                "attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                "WHERE id = ? AND owner = ? AND status = 'sending'",
+                [(next_attempt_at, error, id_, owner) for id_ in ids]
+            )
+
+    def release(self, ids: List[int], owner: str):
+        """Возвращает захваченные события в очередь без учета попытки"""
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE webhook_outbox SET status = 'pending', owner = NULL, claimed_until = NULL "
+                "WHERE id = ? AND owner = ? AND status = 'sending'",
+                [(id_, owner) for id_ in ids]
+            )
+
+    def give_up(self, ids: List[int], owner: str, error: str):
+        """Исчерпаны попытки: события остаются в очереди со статусом failed для разбора"""
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE webhook_outbox SET status = 'failed', owner = NULL, claimed_until = NULL, "
+                "attempts = attempts + 1, last_error = ? WHERE id = ? AND owner = ? AND status = 'sending'",
+                [(error, id_, owner) for id_ in ids]
+            )
+            excess = conn.execute(
+                "SELECT COUNT(*) FROM webhook_outbox WHERE status = 'failed'"
+            ).fetchone()[0] - self.max_failed
+            if excess > 0:
+                self._purge_failed(conn, excess)
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM webhook_outbox GROUP BY status').fetchall())
+            errors = conn.execute(
+                "SELECT callback_url, MAX(attempts) AS attempts, MIN(next_attempt_at) AS next_attempt_at, "
+                "MAX(last_error) AS last_error FROM webhook_outbox "
+                "WHERE last_error IS NOT NULL GROUP BY callback_url ORDER BY callback_url"
+            ).fetchall()
+        return {
+            'pending': counts.get('pending', 0),
+            'sending': counts.get('sending', 0),
+            'failed': counts.get('failed', 0),
+            'dropped': self.dropped,
+            'purged_failed': self.purged_failed,
+            'max_events': self.max_events,
+            'max_failed': self.max_failed,
+            'errors': [dict(row) for row in errors]
+        }
+
+
+class WebhookDispatcher:
+    """
+    Фоновая доставка событий из исходящей очереди
+
+    События одного адреса отправляются одним POST (до batch_size событий);
+    после появления первого события отправка ждет batch_wait секунд, чтобы
+    в пакет попали результаты, завершившиеся следом. Ошибка доставки
+    (сеть или ответ не 2xx) откладывает пакет с экспоненциальной паузой
+    и случайным сдвигом; после max_attempts события помечаются failed.
+    Поток запускается при первом событии или при непустой очереди после
+    перезапуска. Пакет захватывается на claim_seconds перед отправкой,
+    поэтому диспетчеры нескольких процессов с общей очередью не дублируют доставку.
+    """
+
+    def __init__(self, outbox: WebhookOutbox, secret: Optional[str] = None,
+                 batch_size: int = 100, batch_wait: float = 1.0, max_attempts: int = 8,
+                 base_backoff: float = 2.0, max_backoff: float = 600.0, timeout: float = 10.0,
+                 claim_seconds: float = 120.0, session=None):
+        self.outbox = outbox
+        self.secret = secret
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.claim_seconds = claim_seconds
+        self._session = session
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.delivered = 0
+        self.batches = 0
+        self.failures = 0
+
+    def submit(self, callback_url: str, events: List[Dict]):
+        """Ставит события в очередь и будит поток доставки"""
+        if not events:
+            return
+        self.outbox.add(callback_url, events)
+        self.start()
+        with self._condition:
+            self._condition.notify()
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name='webhook-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempts))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _post(self, url: str, events: List[Dict]) -> Optional[str]:
+        """
+        Отправляет пакет
+
+        Returns:
+            Описание ошибки или None при успешной доставке
+        """
+        import requests
+
+        body = json.dumps({'events': events, 'count': len(events)},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'SecCheck-Webhooks/1.0',
+            TIMESTAMP_HEADER: timestamp,
+            DELIVERY_HEADER: uuid.uuid4().hex
+        }
+        if self.secret:
+            headers[SIGNATURE_HEADER] = sign_payload(self.secret, timestamp, body)
+
+        session = self._session or requests
+        try:
+            response = session.post(url, data=body, headers=headers, timeout=self.timeout,
+                                    allow_redirects=False)
+        except requests.RequestException as e:
+            return f'{type(e).__name__}: {str(e)[:200]}'
+        if 200 <= response.status_code < 300:
+            return None
+        return f'HTTP {response.status_code}'
+
+    def deliver_due(self, now: float = None) -> int:
+        """
+        Отправляет все пакеты, время которых наступило
+
+        Returns:
+            Число доставленных событий
+        """
+        now = time.time() if now is None else now
+        delivered = 0
+        batches = self.outbox.claim_batches(self.owner, now, self.batch_size, self.claim_seconds)
+        for index, (url, ids, events, attempts) in enumerate(batches):
+            try:
+                error = self._post(url, events)
+            except Exception:
+                # Незавершенные пакеты возвращаются в очередь сразу, а не по истечении захвата
+                for _, pending_ids, _, _ in batches[index:]:
+                    self.outbox.release(pending_ids, self.owner)
+                raise
+            self.batches += 1
+            if error is None:
+                self.outbox.delivered(ids, self.owner)
+                delivered += len(ids)
+            elif attempts + 1 >= self.max_attempts:
+                self.failures += 1
+                self.outbox.give_up(ids, self.owner, error)
+            else:
+                self.failures += 1
+                self.outbox.retry(ids, self.owner, time.time() + self._backoff(attempts), error)
+        self.delivered += delivered
+        return delivered
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    next_due = self.outbox.next_due()
+                    if next_due is not None:
+                        # Новые события ждут batch_wait, чтобы собраться в один пакет
+                        delay = next_due + self.batch_wait - time.time()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(timeout=delay)
+                    else:
+                        self._condition.wait()
+                if self._stopping:
+                    return
+            try:
+                self.deliver_due()
+            except Exception:
+                # Ошибка очереди не должна останавливать доставку: следующая попытка после паузы
+                time.sleep(self.base_backoff)
+
+    def stats(self) -> Dict:
+        return dict(
+            self.outbox.stats(),
+            delivered=self.delivered,
+            batches=self.batches,
+            delivery_failures=self.failures,
+            signed=bool(self.secret),
+            running=self._thread is not None
+        )
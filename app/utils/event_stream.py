@@ -0,0 +1,49 @@
+"""
+Потоковые ответы API: NDJSON или Server-Sent Events по заголовку Accept
+"""
+import json
+from typing import Callable, Iterable, Optional, Tuple
+from flask import Response, request, stream_with_context
+
+NDJSON = 'application/x-ndjson'
+SSE = 'text/event-stream'
+
+
+def wants_sse() -> bool:
+    """True, если клиент предпочитает Server-Sent Events (по умолчанию NDJSON)"""
+    return request.accept_mimetypes.best_match([NDJSON, SSE]) == SSE
+
+
+def encode_event(event: str, payload: dict, sse: bool = False) -> str:
+    """
+    Одно событие потока
+
+    Имя события попадает и в JSON (поле event): в NDJSON одно JSON событие
+    в строке, в SSE - строки event/data и пустая строка
+    """
+    body = json.dumps(dict(payload, event=event), ensure_ascii=False, separators=(',', ':'))
+    return f'event: {event}\ndata: {body}\n\n' if sse else body + '\n'
+
+
+def event_stream_response(events: Iterable[Tuple[str, dict]],
+                          on_close: Optional[Callable[[], None]] = None) -> Response:
+    """
+    Потоковый ответ из событий (имя, данные) в формате, выбранном по Accept
+
+    Args:
+        events: Генератор событий; выполняется в контексте запроса
+        on_close: Вызывается, когда поток отправлен или клиент отключился
+    """
+    sse = wants_sse()
+    response = Response(
+        stream_with_context(encode_event(event, payload, sse) for event, payload in events),
+        mimetype=SSE if sse else NDJSON,
+        headers={
+            'Cache-Control': 'no-cache',
+            # Отключаем буферизацию ответа в nginx
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    if on_close is not None:
+        response.call_on_close(on_close)
+    return response
@@ -0,0 +1,151 @@
+"""
+Разбор заголовков безопасности с кэшированием по исходному значению
+"""
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from app.models.header_policies import CookieAttributes, CookieRecord, CspPolicy, HstsPolicy
+
+# Размер кэша каждого разборщика: сайты за одним CDN или фреймворком
+# присылают побайтно одинаковые значения, и повторный разбор не нужен
+HEADER_CACHE_SIZE = 4096
+
+_SAMESITE_VALUES = {'strict': 'Strict', 'lax': 'Lax', 'none': 'None'}
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def parse_csp(value: str) -> Tuple[CspPolicy, ...]:
+    """
+    Разбирает Content-Security-Policy
+
+    Несколько политик (несколько заголовков, объединенных через запятую)
+    действуют одновременно - ресурс должен разрешать каждая из них.
+
+    Args:
+        value: Значение заголовка
+
+    Returns:
+        Кортеж политик (пустой, если директив нет)
+    """
+    policies = []
+    for serialized in value.split(','):
+        directives: Dict[str, Tuple[str, ...]] = {}
+        unknown = []
+        for token in serialized.split(';'):
+            parts = token.split()
+            if not parts:
+                continue
+            name = parts[0].lower()
+            if not name.replace('-', '').isalpha():
+                unknown.append(parts[0])
+                continue
+            # Повторная директива игнорируется браузером
+            directives.setdefault(name, tuple(parts[1:]))
+        if directives or unknown:
+            policies.append(CspPolicy(directives=directives, unknown=tuple(unknown)))
+    return tuple(policies)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def parse_hsts(value: str) -> HstsPolicy:
+    """
+    Разбирает Strict-Transport-Security (RFC 6797)
+
+    Args:
+        value: Значение заголовка (при нескольких заголовках действует первый)
+
+    Returns:
+        HstsPolicy; error заполняется, если браузер проигнорирует заголовок
+    """
+    max_age = None
+    include_subdomains = False
+    preload = False
+    seen = set()
+
+    for token in value.split(',')[0].split(';'):
+        name, _, argument = token.strip().partition('=')
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name in seen:
+            return HstsPolicy(error=f'Директива {name} указана повторно')
+        seen.add(name)
+
+        if name == 'max-age':
+            argument = argument.strip().strip('"')
+            if not argument.isdigit():
+                return HstsPolicy(error='Некорректное значение max-age')
+            max_age = int(argument)
+        elif name == 'includesubdomains':
+            include_subdomains = True
+        elif name == 'preload':
+            preload = True
+
+    if max_age is None:
+        return HstsPolicy(include_subdomains=include_subdomains, preload=preload, error='Не указан max-age')
+    return HstsPolicy(max_age=max_age, include_subdomains=include_subdomains, preload=preload)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def parse_cookie_attributes(value: str) -> CookieAttributes:
+    """
+    Разбирает атрибуты Set-Cookie (RFC 6265, без учета регистра; при повторе действует последний)
+
+    Args:
+        value: Часть заголовка после первой ";"
+    """
+    attributes = {}
+    for token in value.split(';'):
+        name, has_value, argument = token.partition('=')
+        name = name.strip().lower()
+        argument = argument.strip()
+
+        if name == 'secure':
+            attributes['secure'] = True
+        elif name == 'httponly':
+            attributes['httponly'] = True
+        elif name == 'samesite' and has_value:
+            attributes['samesite'] = _SAMESITE_VALUES.get(argument.lower(), argument)
+        elif name == 'domain' and argument:
+            attributes['domain'] = argument.lstrip('.').lower()
+        elif name == 'path':
+            attributes['path'] = argument if argument.startswith('/') else None
+        elif name == 'max-age':
+            try:
+                attributes['max_age'] = int(argument)
+            except ValueError:
+                pass
+        elif name == 'expires' and argument:
+            attributes['expires'] = argument
+
+    return CookieAttributes(**attributes)
+
+
+def parse_set_cookie(value: str) -> CookieRecord:
+    """
+    Разбирает заголовок Set-Cookie
+
+    Кэшируются только атрибуты: значение cookie (идентификатор сессии и т.п.)
+    различается в каждом ответе.
+    """
+    pair, _, attributes = value.partition(';')
+    name = pair.partition('=')[0].strip()
+    return CookieRecord(name=name, attributes=parse_cookie_attributes(attributes))
+
+
+def parse_set_cookies(values: List[str]) -> List[CookieRecord]:
+    """Разбирает список заголовков Set-Cookie (без пустых)"""
+    return [parse_set_cookie(value) for value in values if value.strip()]
+
+
+def header_cache_info() -> Dict[str, Dict[str, int]]:
+    """Статистика кэшей разбора: попадания, промахи и текущий размер"""
+    result = {}
+    for name, parser in (('csp', parse_csp), ('hsts', parse_hsts), ('cookie_attributes', parse_cookie_attributes)):
+        info = parser.cache_info()
+        result[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+    return result
+
+
+def clear_header_cache():
+    for parser in (parse_csp, parse_hsts, parse_cookie_attributes):
+        parser.cache_clear()
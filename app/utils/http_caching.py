@@ -0,0 +1,95 @@
+"""
+Заголовки кэширования HTTP для ответов API: ETag, Last-Modified, Cache-Control и ответ 304
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Optional
+from flask import Response, request
+
+# Политики Cache-Control
+NO_STORE = 'no-store'
+REVALIDATE = 'no-cache'  # Клиент и прокси хранят ответ, но перед использованием сверяют ETag
+STATIC_MAX_AGE = 3600
+
+_CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+def content_etag(body: bytes) -> str:
+    """ETag по содержимому ответа (одинаковое тело - одинаковый ETag у всех процессов)"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def dumps(data) -> bytes:
+    """Сериализация JSON для заранее подготовленных ответов"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class PreparedJson:
+    """
+    Неизменный JSON ответ, сериализованный один раз
+
+    Тело, ETag и Last-Modified вычисляются при создании, поэтому запрос
+    обслуживается без сериализации, а запрос с совпавшим If-None-Match -
+    ответом 304 без тела.
+    """
+
+    def __init__(self, data, max_age: int = STATIC_MAX_AGE):
+        self.body = dumps(data)
+        self.etag = content_etag(self.body)
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.max_age = max_age
+
+    def response(self) -> Response:
+        response = Response(self.body, mimetype='application/json')
+        response.set_etag(self.etag)
+        response.last_modified = self.last_modified
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        return response.make_conditional(request)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    Ответ 304, если у клиента уже есть версия etag (проверяется до построения тела)
+
+    Returns:
+        Response 304 или None, если ответ нужно построить
+    """
+    if request.method not in _CONDITIONAL_METHODS or etag not in request.if_none_match:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+def apply_caching(response: Response) -> Response:
+    """
+    Заголовки кэширования по умолчанию (after_request)
+
+    - потоки и файлы не меняются (send_file выставляет заголовки сам);
+    - ответы на изменяющие запросы и ошибки не кэшируются (no-store) и не получают ETag;
+    - успешные GET получают ETag по содержимому и Cache-Control: no-cache,
+      запрос с совпавшим If-None-Match получает 304 без тела.
+    Обработчик может задать Cache-Control сам - тогда он не меняется.
+    """
+    if response.is_streamed or response.direct_passthrough:
+        return response
+
+    if request.method not in _CONDITIONAL_METHODS or response.status_code >= 400:
+        # ETag у ответа на POST нельзя предъявить в If-None-Match: такой ответ
+        # не соответствует ни одному GET-ресурсу, поэтому валидатор не выставляется
+        if 'Cache-Control' not in response.headers:
+            response.cache_control.no_store = True
+        return response
+
+    if response.status_code != 200 or response.cache_control.no_store:
+        return response
+    if 'Cache-Control' not in response.headers:
+        response.cache_control.no_cache = True
+    if 'ETag' not in response.headers:
+        response.set_etag(content_etag(response.get_data()))
+    return response.make_conditional(request)
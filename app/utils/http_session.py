@@ -0,0 +1,129 @@
+"""
+Общие HTTP-сессии с пулом соединений
+"""
+import socket
+import sys
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from app.services import happy_eyeballs
+from app.services.resource_budget import current_meter
+
+# Заголовки для имитации обычного браузера
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+_local = threading.local()
+
+
+def _record_connection():
+    meter = current_meter()
+    if meter is not None:
+        meter.record_connection()
+
+
+def _new_conn(connection) -> socket.socket:
+    """
+    Сокет соединения urllib3 с параллельными попытками по адресам IPv4 и IPv6
+
+    Повторяет HTTPConnection._new_conn, заменяя socket.create_connection,
+    включая преобразование ошибок в исключения urllib3.
+    """
+    # Таймаут по умолчанию urllib3 - объект-маркер: используем таймаут сокетов процесса
+    timeout = connection.timeout if isinstance(connection.timeout, (int, float)) else socket.getdefaulttimeout()
+    try:
+        sock = happy_eyeballs.create_connection(
+            (connection._dns_host, connection.port),
+            timeout,
+            source_address=connection.source_address,
+            socket_options=connection.socket_options
+        )
+    except socket.gaierror as e:
+        raise NameResolutionError(connection.host, connection, e) from e
+    except socket.timeout as e:
+        raise ConnectTimeoutError(
+            connection,
+            f'Connection to {connection.host} timed out. (connect timeout={connection.timeout})'
+        ) from e
+    except OSError as e:
+        raise NewConnectionError(connection, f'Failed to establish a new connection: {e}') from e
+
+    sys.audit('http.client.connect', connection, connection.host, connection.port)
+    return sock
+
+
+class _MeteredHTTPConnection(HTTPConnection):
+    """Соединение, которое учитывается в счетчиках текущей проверки при открытии сокета"""
+
+    def connect(self):
+        _record_connection()
+        super().connect()
+
+    def _new_conn(self) -> socket.socket:
+        return _new_conn(self)
+
+
+class _MeteredHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _record_connection()
+        super().connect()
+
+    def _new_conn(self) -> socket.socket:
+        return _new_conn(self)
+
+
+class _MeteredHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _MeteredHTTPConnection
+
+
+class _MeteredHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _MeteredHTTPSConnection
+
+
+class MeteredAdapter(HTTPAdapter):
+    """Адаптер requests, пулы которого учитывают новые соединения (keep-alive не учитывается повторно)"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _MeteredHTTPConnectionPool,
+            'https': _MeteredHTTPSConnectionPool
+        }
+
+
+def get_session() -> requests.Session:
+    """
+    Возвращает сессию текущего потока
+
+    Сессия переиспользует keep-alive соединения между проверками,
+    cookies очищаются, чтобы проверки не влияли друг на друга.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = MeteredAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    session.cookies.clear()
+    return session
+
+
+def reset_sessions():
+    """
+    Сбрасывает сессию текущего потока
+
+    Вызывается в дочернем процессе после fork: сокеты родителя
+    не закрываем, а просто перестаем их использовать.
+    """
+    _local.session = None
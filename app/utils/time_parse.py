@@ -0,0 +1,17 @@
+"""
+Разбор дат из параметров API и командной строки
+"""
+from datetime import datetime, timezone
+
+
+def parse_iso_time(value: str) -> float:
+    """
+    Дата или дата-время ISO 8601 в unix time (без часового пояса - UTC)
+
+    Raises:
+        ValueError: Строка не в формате ISO 8601
+    """
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
@@ -1,51 +1,141 @@
 """
 Утилиты для нормализации URL
 """
-from urllib.parse import urlparse, urlunparse
+import ipaddress
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+from urllib.parse import urlparse, urlsplit, urlunparse
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Подчеркивание встречается в реальных именах хостов (my_host.example.com), хотя не допускается RFC 1123
+_LABEL_RE = re.compile(r'^(?!-)[a-z0-9_-]{1,63}(?<!-)$')
+_SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://')
+
+
+@lru_cache(maxsize=65536)
+def _canonical_host(host: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Приводит имя хоста к каноническому виду: нижний регистр, без завершающей точки,
+    интернациональные имена - в punycode (IDNA)
+
+    Returns:
+        Кортеж (хост, причина_отказа)
+    """
+    if host.startswith('['):
+        try:
+            return f'[{ipaddress.IPv6Address(host[1:-1]).compressed}]', None
+        except ValueError:
+            return None, 'Некорректный IPv6 адрес'
+
+    host = host.rstrip('.').lower()
+    if not host:
+        return None, 'Не указан домен'
+
+    if host[-1].isdigit():
+        try:
+            return str(ipaddress.IPv4Address(host)), None
+        except ValueError:
+            pass
+
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None, 'Некорректное интернациональное доменное имя'
+
+    labels = host.split('.')
+    if len(host) > 253 or not all(_LABEL_RE.match(label) for label in labels):
+        return None, 'Некорректное доменное имя'
+    if labels[-1].isdigit():
+        return None, 'Некорректный IP адрес'
+
+    return host, None
+
+
+def canonicalize_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Приводит URL к каноническому виду - ключу проверки
+
+    Адреса, ведущие на одну страницу, получают один ключ: схема и хост в нижнем
+    регистре, IDNA, без завершающей точки домена, порта по умолчанию, фрагмента
+    и одиночного "/" в пути. Без протокола подставляется https://.
+
+    Args:
+        url: Исходный URL
+
+    Returns:
+        Кортеж (канонический_URL, причина_отказа) - ровно одно из значений не None
+    """
+    url = url.strip().replace(' ', '')
+    if not url:
+        return None, 'Пустая строка'
+
+    if not _SCHEME_RE.match(url):
+        url = 'https://' + url.lstrip('/')
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None, 'Некорректный порт или адрес'
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None, f'Неподдерживаемый протокол: {scheme}'
+    if parts.username is not None or parts.password is not None:
+        return None, 'URL с учетными данными не поддерживается'
+
+    netloc = parts.netloc.rpartition('@')[2]
+    if netloc.startswith('['):
+        raw_host = netloc[:netloc.find(']') + 1]
+    else:
+        raw_host = netloc.rsplit(':', 1)[0] if port is not None or netloc.endswith(':') else netloc
+
+    host, reason = _canonical_host(raw_host)
+    if reason:
+        return None, reason
+
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f'{host}:{port}'
+
+    path = '' if parts.path == '/' else parts.path
+    query = f'?{parts.query}' if parts.query else ''
+
+    return f'{scheme}://{host}{path}{query}', None
 
 
 def normalize_url(url: str) -> str:
     """
     Нормализует URL, добавляя протокол если отсутствует
-    
+
+    В отличие от canonicalize_url сохраняет регистр, порт и завершающий "/":
+    одиночные проверки и история хранятся по адресу в том виде, в каком он введен.
+
     Args:
         url: URL для нормализации
-        
+
     Returns:
-        Нормализованный URL
+        Нормализованный URL (без пробелов и фрагмента)
     """
-    url = url.strip()
-    
-    # Удаляем пробелы
-    url = url.replace(' ', '')
-    
+    url = url.strip().replace(' ', '')
+
     # Если нет протокола, добавляем https://
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
-    
-    # Парсим и собираем обратно для нормализации
+
     parsed = urlparse(url)
-    
-    # Убираем фрагмент (#)
-    normalized = urlunparse((
-        parsed.scheme,
-        parsed.netloc,
-        parsed.path,
-        parsed.params,
-        parsed.query,
-        ''  # Убираем fragment
-    ))
-    
-    return normalized
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, parsed.query, ''))
 
 
 def is_valid_url(url: str) -> bool:
     """
     Проверяет валидность URL
-    
+
     Args:
         url: URL для проверки
-        
+
     Returns:
         True если URL валиден
     """
@@ -54,5 +144,3 @@ def is_valid_url(url: str) -> bool:
         return all([parsed.scheme, parsed.netloc])
     except Exception:
         return False
-
-
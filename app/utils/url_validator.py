@@ -1,70 +1,95 @@
 """
 Валидация URL на доступность
 """
-import requests
-import warnings
+from urllib.parse import urlparse
+from app.models.scan_capture import FetchResult
+from app.services import http_fetch
+from app.services.host_health import HostHealthTracker, host_health
 
-warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
+def evaluate_availability(fetch: FetchResult) -> tuple:
+    """
+    Определяет доступность страницы по результату запроса
+
+    Args:
+        fetch: Результат запроса страницы
 
-def check_url_exists(url: str, timeout: int = 10) -> tuple:
+    Returns:
+        Кортеж (существует, статус_код, сообщение_об_ошибке)
+    """
+    if fetch.error_kind in ('connect_timeout', 'read_timeout'):
+        return False, None, 'Превышено время ожидания ответа от сервера'
+    elif fetch.error_kind == 'connection':
+        return False, None, 'Не удалось подключиться к серверу. Проверьте правильность URL'
+    elif fetch.error_kind == 'too_many_redirects':
+        return False, None, 'Слишком много редиректов'
+    elif fetch.error_kind == 'budget':
+        return False, None, fetch.error
+    elif fetch.error_kind == 'request':
+        return False, None, f'Ошибка при запросе: {fetch.error[:100]}'
+    elif not fetch.ok:
+        return False, None, f'Неожиданная ошибка: {(fetch.error or "")[:100]}'
+
+    status_code = fetch.final.status_code
+
+    # Проверяем статус код
+    if status_code >= 400:
+        # Нестандартные коды, которые могут означать блокировку, но сайт доступен
+        if status_code in [498, 499]:
+            # Коды 498/499 часто означают блокировку ботов, но сайт технически доступен
+            # Продолжаем проверку, но с предупреждением
+            return True, status_code, f'Сайт доступен, но может блокировать автоматические запросы ({status_code})'
+        elif status_code == 404:
+            return False, status_code, 'Страница не найдена (404)'
+        elif status_code == 403:
+            return False, status_code, 'Доступ запрещен (403). Сайт может блокировать автоматические запросы'
+        elif status_code >= 500:
+            return False, status_code, f'Ошибка сервера ({status_code})'
+        else:
+            # Для других 4xx кодов - считаем что сайт недоступен
+            return False, status_code, f'Ошибка доступа ({status_code})'
+
+    # Если статус код 200-399, считаем что страница существует
+    return True, status_code, 'OK'
+
+
+def check_url_exists(url: str, timeout: float = None, health: HostHealthTracker = None,
+                     fetch_page=None) -> tuple:
     """
     Проверяет существование и доступность URL
-    
+
+    Хосты, которые подряд не отвечают, временно не опрашиваются (circuit breaker),
+    а ответы 403/5xx кэшируются: повторные проверки сразу получают сохраненную ошибку.
+
     Args:
         url: URL для проверки
-        timeout: Таймаут запроса в секундах
-        
+        timeout: Таймаут запроса в секундах (по умолчанию - адаптивный по хосту, не более 10 с для новых хостов)
+        health: Трекер доступности хостов (по умолчанию общий для процесса)
+        fetch_page: Функция получения страницы (например, ScanIO.page, чтобы ответ
+            переиспользовали проверки); по умолчанию выполняется отдельный запрос
+
     Returns:
         Кортеж (существует, статус_код, сообщение_об_ошибке)
     """
-    # Заголовки для имитации обычного браузера
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
+    if health is None:
+        health = host_health
+
+    host = urlparse(url).netloc.lower()
+    cached_result = health.before_request(host)
+    if cached_result is not None:
+        return cached_result
+
     try:
-        response = requests.get(
-            url,
-            timeout=timeout,
-            verify=False,
-            allow_redirects=True,
-            headers=headers
-        )
-        
-        # Проверяем статус код
-        if response.status_code >= 400:
-            # Нестандартные коды, которые могут означать блокировку, но сайт доступен
-            if response.status_code in [498, 499]:
-                # Коды 498/499 часто означают блокировку ботов, но сайт технически доступен
-                # Продолжаем проверку, но с предупреждением
-                return True, response.status_code, f'Сайт доступен, но может блокировать автоматические запросы ({response.status_code})'
-            elif response.status_code == 404:
-                return False, response.status_code, 'Страница не найдена (404)'
-            elif response.status_code == 403:
-                return False, response.status_code, 'Доступ запрещен (403). Сайт может блокировать автоматические запросы'
-            elif response.status_code >= 500:
-                return False, response.status_code, f'Ошибка сервера ({response.status_code})'
-            else:
-                # Для других 4xx кодов - считаем что сайт недоступен
-                return False, response.status_code, f'Ошибка доступа ({response.status_code})'
-        
-        # Если статус код 200-399, считаем что страница существует
-        return True, response.status_code, 'OK'
-        
-    except requests.exceptions.Timeout:
-        return False, None, 'Превышено время ожидания ответа от сервера'
-    except requests.exceptions.ConnectionError:
-        return False, None, 'Не удалось подключиться к серверу. Проверьте правильность URL'
-    except requests.exceptions.TooManyRedirects:
-        return False, None, 'Слишком много редиректов'
-    except requests.exceptions.RequestException as e:
-        return False, None, f'Ошибка при запросе: {str(e)[:100]}'
-    except Exception as e:
-        return False, None, f'Неожиданная ошибка: {str(e)[:100]}'
+        fetch = fetch_page() if fetch_page else http_fetch.fetch(url, timeout)
+        exists, status_code, message = evaluate_availability(fetch)
+
+        if fetch.error_kind in ('connect_timeout', 'read_timeout', 'connection'):
+            health.record_failure(host, message)
+        elif status_code is not None and (status_code == 403 or status_code >= 500):
+            health.record_blocked(host, status_code, message)
+        elif status_code is not None:
+            health.record_success(host)
 
+        return exists, status_code, message
+    finally:
+        health.release_probe(host)
@@ -0,0 +1,178 @@
+"""
+Воркер распределенных проверок
+
+Запуск:
+    python -m app.worker --queue sqlite:///data/tasks.sqlite3 --concurrency 4
+    python -m app.worker --queue redis://localhost:6379/0
+
+Каждый процесс берет задачи из общей очереди, выполняет SecurityService
+и возвращает результат в очередь. Пропускная способность растет
+с количеством процессов и машин.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+from app.services.task_queue import BaseTaskQueue, open_task_queue
+from app.services.security_service import SecurityService
+
+logger = logging.getLogger(__name__)
+
+
+def _run_scan(url: str) -> Dict:
+    """Функция проверки по умолчанию"""
+    return SecurityService(url).run_all_checks().to_dict()
+
+
+class ScanWorker:
+    """Цикл обработки задач из очереди"""
+
+    def __init__(self, queue: BaseTaskQueue,
+                 concurrency: int = 1,
+                 lease_seconds: float = 60.0,
+                 poll_interval: float = 1.0,
+                 scan_func: Callable[[str], Dict] = _run_scan,
+                 requeue_interval: Optional[float] = None):
+        """
+        Args:
+            queue: Очередь задач
+            concurrency: Количество потоков обработки в процессе
+            lease_seconds: Длительность аренды задачи
+            poll_interval: Пауза между опросами пустой очереди
+            scan_func: Функция проверки, возвращающая словарь отчета
+            requeue_interval: Период возврата задач с истекшей арендой, по умолчанию lease_seconds / 2
+        """
+        self.queue = queue
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.requeue_interval = requeue_interval or lease_seconds / 2
+        self.scan_func = scan_func
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Просит потоки завершиться после текущих задач"""
+        self._stop.set()
+
+    def run(self):
+        """Запускает потоки обработки и поток возврата истекших аренд, ждет их завершения"""
+        threads = [
+            threading.Thread(target=self._process_loop, name=f'scan-worker-{i}', daemon=True)
+            for i in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self._requeue_loop, name='scan-worker-requeue', daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_once(self) -> bool:
+        """
+        Обрабатывает одну задачу
+
+        Returns:
+            True если задача была взята из очереди
+        """
+        task = self.queue.lease(self.worker_id, self.lease_seconds)
+        if task is None:
+            return False
+
+        # Продлеваем аренду, пока идет проверка
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(task.id, done), daemon=True)
+        heartbeat.start()
+
+        try:
+            result = self.scan_func(task.url)
+        except Exception as e:
+            done.set()
+            self.queue.fail(task.id, self.worker_id, str(e)[:200])
+        else:
+            done.set()
+            self.queue.complete(task.id, self.worker_id, result)
+        finally:
+            heartbeat.join()
+
+        return True
+
+    def _process_loop(self):
+        while not self._stop.is_set():
+            try:
+                if not self.run_once():
+                    self._stop.wait(self.poll_interval)
+            except Exception:
+                # Ошибка очереди (например, недоступен Redis) - пробуем позже
+                self._stop.wait(self.poll_interval)
+
+    def _requeue_loop(self):
+        # Один поток на процесс: проход по арендам не повторяется при каждом опросе очереди
+        while not self._stop.wait(self.requeue_interval):
+            try:
+                requeued = self.queue.requeue_expired()
+            except Exception:
+                logger.exception('Не удалось вернуть задачи с истекшей арендой')
+                continue
+            if requeued:
+                logger.info('Возвращено в очередь задач с истекшей арендой: %d', requeued)
+
+    def _heartbeat_loop(self, task_id: str, done: threading.Event):
+        interval = self.lease_seconds / 3
+        while not done.wait(interval):
+            if not self.queue.heartbeat(task_id, self.worker_id, self.lease_seconds):
+                return
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    default_queue = 'sqlite:///' + os.path.join(
+        os.environ.get('SECCHECK_DATA_DIR', os.path.join(base_dir, 'data')), 'tasks.sqlite3'
+    )
+
+    parser = argparse.ArgumentParser(description='Воркер распределенных проверок безопасности')
+    parser.add_argument('--queue', default=os.environ.get('SECCHECK_TASK_QUEUE', default_queue),
+                        help='Очередь: sqlite:///path или redis://host:port/db')
+    parser.add_argument('--concurrency', type=int, default=4, help='Потоков обработки в процессе')
+    parser.add_argument('--lease', type=float, default=60.0, help='Длительность аренды задачи, сек')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Пауза при пустой очереди, сек')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Максимум попыток на задачу')
+    parser.add_argument('--capture', help='Сохранять сырые ответы в файл захватов (SQLite)')
+    parser.add_argument('--cert-index', help='Индекс сроков сертификатов, по умолчанию data/certificates.sqlite3')
+    parser.add_argument('--http2', action='store_true',
+                        help='Запросы по HTTP/2 с общим соединением на источник (нужен httpx[http2])')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    # Сертификаты, полученные проверками, попадают в индекс сроков
+    from app.services.cert_index import CertificateIndex, set_default_cert_index
+    set_default_cert_index(CertificateIndex(args.cert_index or os.path.join(
+        os.environ.get('SECCHECK_DATA_DIR', os.path.join(base_dir, 'data')), 'certificates.sqlite3'
+    )))
+
+    if args.http2:
+        from app.services.http2_fetch import Http2Fetcher
+        from app.services.http_fetch import set_http2_fetcher
+        set_http2_fetcher(Http2Fetcher())
+
+    if args.capture:
+        from app.services.capture_store import CaptureStore, set_default_capture_store
+        set_default_capture_store(CaptureStore(args.capture))
+
+    queue = open_task_queue(args.queue, max_attempts=args.max_attempts)
+    worker = ScanWorker(queue, concurrency=args.concurrency,
+                        lease_seconds=args.lease, poll_interval=args.poll_interval)
+
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+
+    logger.info('Воркер %s слушает очередь %s', worker.worker_id, args.queue)
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
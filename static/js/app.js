@@ -26,23 +26,27 @@ document.getElementById('checkForm').addEventListener('submit', async (e) => {
     spinner.classList.remove('d-none');
     resultsContainer.classList.add('d-none');
     errorContainer.classList.add('d-none');
+    hideCachedNotice();
+    
+    // Сохраненный результат показывается сразу, свежий заменяет его после проверки
+    const cached = await resultCache.get(url);
+    const revalidating = Boolean(cached && cached.report);
+    if (revalidating) {
+        displayResults(cached.report);
+        showCachedNotice(cached.timestamp);
+    }
     
     try {
-        const response = await fetch('/api/check', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ url: url })
-        });
-        
-        const data = await response.json();
+        const { response, data } = await runCheck(url, { streamChecks: !revalidating });
         
         if (data.success) {
-            displayResults(data);
+            displayResults(data, { scroll: !revalidating });
+            recordResult(url, data, data);
         } else {
+            resultsContainer.classList.add('d-none');
+            
             // Проверяем, является ли это ошибкой доступности
-            if (response.status === 404 || data.error?.includes('не найден') || data.error?.includes('недоступен')) {
+            if (response.status === 404 || data.status_code === 404 || data.error?.includes('не найден') || data.error?.includes('недоступен')) {
                 showError(`❌ Сайт недоступен: ${data.error || 'Страница не существует'}. Проверьте правильность URL и убедитесь, что сайт доступен.`);
             } else {
                 showError(data.error || 'Произошла ошибка при проверке сайта');
@@ -52,13 +56,140 @@ document.getElementById('checkForm').addEventListener('submit', async (e) => {
         showError('Ошибка соединения с сервером: ' + error.message);
     } finally {
         // Скрываем загрузку
+        hideCachedNotice();
         checkButton.disabled = false;
         buttonText.classList.remove('d-none');
         spinner.classList.add('d-none');
     }
 });
 
-function displayResults(data) {
+// Выполняет проверку: результаты отдельных проверок показываются по мере готовности
+// (streamChecks: false - пока на экране сохраненный результат, он не сбрасывается до итогового отчета)
+async function runCheck(url, { streamChecks = true } = {}) {
+    const response = await fetch('/api/check/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/x-ndjson'
+        },
+        body: JSON.stringify({ url: url })
+    });
+    
+    // Ошибки запроса (400) и браузеры без потокового чтения - обычный JSON ответ
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!contentType.includes('application/x-ndjson') || !response.body) {
+        if (contentType.includes('application/json')) {
+            return { response, data: await response.json() };
+        }
+        const fallback = await fetch('/api/check', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ url: url })
+        });
+        return { response: fallback, data: await fallback.json() };
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const progress = { checks: [] };
+    let buffer = '';
+    let result = null;
+    
+    const handleLine = (line) => {
+        if (!line.trim()) {
+            return;
+        }
+        const event = JSON.parse(line);
+        if (event.event === 'check') {
+            if (streamChecks) {
+                addStreamedCheck(progress, event.check);
+            }
+        } else if (event.event === 'report' || event.event === 'error') {
+            result = event;
+        }
+    };
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Событие - одна строка JSON; неполную последнюю строку оставляем в буфере
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+    
+    if (!result) {
+        throw new Error('поток результатов прерван');
+    }
+    return { response, data: result };
+}
+
+// Показывает результат одной проверки, пока остальные еще выполняются
+function addStreamedCheck(progress, check) {
+    const resultsContainer = document.getElementById('resultsContainer');
+    
+    // Недоступность сайта показывается как ошибка после итогового события
+    if (check.name === 'Доступность сайта' && check.status === 'danger') {
+        return;
+    }
+    
+    if (progress.checks.length === 0) {
+        document.getElementById('checksAccordion').innerHTML = '';
+        document.getElementById('recommendationsCard').classList.add('d-none');
+        document.getElementById('levelText').textContent = 'Проверка выполняется...';
+        document.getElementById('checkTime').textContent = '-';
+        resultsContainer.classList.remove('d-none');
+        resultsContainer.classList.add('results-wrapper');
+    }
+    
+    progress.checks.push(check);
+    appendCheck(check);
+    
+    // Предварительная оценка по уже полученным проверкам
+    const partial = buildPartialReport(progress.checks);
+    setScore(partial.percentage);
+    document.getElementById('levelDescription').textContent =
+        `Получено результатов: ${progress.checks.length}. Оценка уточняется по мере завершения проверок.`;
+    updateCharts(partial);
+}
+
+// Оценки по полученным проверкам (как calculate_category_scores на сервере)
+function buildPartialReport(checks) {
+    const totals = {};
+    let score = 0;
+    let maxScore = 0;
+    
+    checks.forEach(check => {
+        if (!totals[check.category]) {
+            totals[check.category] = { score: 0, max: 0 };
+        }
+        totals[check.category].score += check.score;
+        totals[check.category].max += check.max_score;
+        score += check.score;
+        maxScore += check.max_score;
+    });
+    
+    const categories = {};
+    Object.keys(totals).forEach(category => {
+        const values = totals[category];
+        categories[category] = values.max > 0 ? Math.round(values.score / values.max * 1000) / 10 : 0;
+    });
+    
+    return {
+        percentage: maxScore > 0 ? score / maxScore * 100 : 0,
+        categories: categories,
+        checks: checks
+    };
+}
+
+function displayResults(data, { scroll = true } = {}) {
     const resultsContainer = document.getElementById('resultsContainer');
     
     // Обновляем счет
@@ -69,8 +200,8 @@ function displayResults(data) {
     const timestamp = new Date(data.timestamp);
     checkTime.textContent = timestamp.toLocaleString('ru-RU');
     
-    // Создаем графики
-    createCharts(data);
+    // Создаем графики (или обновляем построенные во время проверки)
+    updateCharts(data);
     
     // Отображаем проверки
     displayChecks(data.checks);
@@ -83,28 +214,19 @@ function displayResults(data) {
     resultsContainer.classList.add('results-wrapper');
     
     // Прокручиваем к результатам
-    resultsContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    if (scroll) {
+        resultsContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    }
 }
 
 function updateScore(data) {
     const scoreValue = document.getElementById('scoreValue');
     const levelText = document.getElementById('levelText');
     const levelDescription = document.getElementById('levelDescription');
-    const scoreCircle = document.getElementById('scoreCircle');
-    const scoreRing = document.getElementById('scoreRing');
     
     // Анимируем счет
     animateScore(data.percentage, scoreValue);
-    
-    // Обновляем кольцо прогресса
-    const circumference = 2 * Math.PI * 90; // радиус = 90
-    const offset = circumference - (data.percentage / 100) * circumference;
-    scoreRing.style.strokeDashoffset = offset;
-    
-    // Вычисляем цвет на основе процента (плавный переход от красного к зеленому)
-    const color = getColorByPercentage(data.percentage);
-    scoreRing.style.stroke = color.ring;
-    scoreCircle.style.background = color.circle;
+    setScoreRing(data.percentage);
     
     // Обновляем уровень
     const levelTexts = {
@@ -125,6 +247,27 @@ function updateScore(data) {
     levelDescription.textContent = descriptions[data.level] || descriptions['low'];
 }
 
+// Счет без анимации (предварительная оценка во время проверки)
+function setScore(percentage) {
+    document.getElementById('scoreValue').textContent = Math.round(percentage);
+    setScoreRing(percentage);
+}
+
+function setScoreRing(percentage) {
+    const scoreCircle = document.getElementById('scoreCircle');
+    const scoreRing = document.getElementById('scoreRing');
+    
+    // Обновляем кольцо прогресса
+    const circumference = 2 * Math.PI * 90; // радиус = 90
+    const offset = circumference - (percentage / 100) * circumference;
+    scoreRing.style.strokeDashoffset = offset;
+    
+    // Вычисляем цвет на основе процента (плавный переход от красного к зеленому)
+    const color = getColorByPercentage(percentage);
+    scoreRing.style.stroke = color.ring;
+    scoreCircle.style.background = color.circle;
+}
+
 // Функция для плавного перехода цвета от красного к зеленому
 function getColorByPercentage(percentage) {
     // Нормализуем процент от 0 до 1
@@ -172,11 +315,12 @@ function darkenColor(hex, percent) {
 }
 
 function animateScore(targetScore, element) {
-    let currentScore = 0;
-    const increment = targetScore / 50;
+    // Анимация от текущего значения (после предварительной оценки - от нее)
+    let currentScore = parseFloat(element.textContent) || 0;
+    const increment = (targetScore - currentScore) / 50;
     const timer = setInterval(() => {
         currentScore += increment;
-        if (currentScore >= targetScore) {
+        if (increment === 0 || (increment > 0 ? currentScore >= targetScore : currentScore <= targetScore)) {
             currentScore = targetScore;
             clearInterval(timer);
         }
@@ -198,16 +342,7 @@ function createCharts(data) {
     categoryChart = new Chart(categoryCtx, {
         type: 'bar',
         data: {
-            labels: categories.map(cat => {
-                const names = {
-                    'connection': 'Соединение',
-                    'headers': 'Заголовки',
-                    'cookies': 'Cookies',
-                    'server': 'Сервер',
-                    'content': 'Контент'
-                };
-                return names[cat] || cat;
-            }),
+            labels: categories.map(categoryLabel),
             datasets: [{
                 label: 'Оценка (%)',
                 data: categoryScores,
@@ -252,30 +387,12 @@ function createCharts(data) {
         statusChart.destroy();
     }
     
-    const statusCounts = {
-        success: 0,
-        warning: 0,
-        danger: 0,
-        info: 0
-    };
-    
-    data.checks.forEach(check => {
-        if (statusCounts.hasOwnProperty(check.status)) {
-            statusCounts[check.status]++;
-        }
-    });
-    
     statusChart = new Chart(statusCtx, {
         type: 'doughnut',
         data: {
             labels: ['Успешно', 'Предупреждение', 'Опасность', 'Информация'],
             datasets: [{
-                data: [
-                    statusCounts.success,
-                    statusCounts.warning,
-                    statusCounts.danger,
-                    statusCounts.info
-                ],
+                data: countStatuses(data.checks),
                 backgroundColor: [
                     'rgba(25, 135, 84, 0.8)',
                     'rgba(255, 193, 7, 0.8)',
@@ -303,6 +420,55 @@ function createCharts(data) {
     });
 }
 
+// Обновляет графики без пересоздания (при потоковой выдаче результатов)
+function updateCharts(data) {
+    if (!categoryChart || !statusChart) {
+        createCharts(data);
+        return;
+    }
+    
+    categoryChart.data.labels = Object.keys(data.categories).map(categoryLabel);
+    categoryChart.data.datasets[0].data = Object.values(data.categories);
+    categoryChart.update();
+    
+    statusChart.data.datasets[0].data = countStatuses(data.checks);
+    statusChart.update();
+}
+
+function categoryLabel(category) {
+    const names = {
+        'connection': 'Соединение',
+        'headers': 'Заголовки',
+        'cookies': 'Cookies',
+        'server': 'Сервер',
+        'content': 'Контент'
+    };
+    return names[category] || category;
+}
+
+// Количество проверок по статусам: [успешно, предупреждение, опасность, информация]
+function countStatuses(checks) {
+    const statusCounts = {
+        success: 0,
+        warning: 0,
+        danger: 0,
+        info: 0
+    };
+    
+    checks.forEach(check => {
+        if (statusCounts.hasOwnProperty(check.status)) {
+            statusCounts[check.status]++;
+        }
+    });
+    
+    return [
+        statusCounts.success,
+        statusCounts.warning,
+        statusCounts.danger,
+        statusCounts.info
+    ];
+}
+
 function displayChecks(checks) {
     const accordion = document.getElementById('checksAccordion');
     accordion.innerHTML = '';
@@ -316,58 +482,76 @@ function displayChecks(checks) {
         checksByCategory[check.category].push(check);
     });
     
-    const categoryNames = {
-        'connection': 'Соединение и SSL',
-        'headers': 'Заголовки безопасности',
-        'cookies': 'Безопасность Cookies',
-        'server': 'Информация о сервере',
-        'content': 'Контент и производительность',
-        'general': 'Общие проверки'
-    };
-    
     let accordionIndex = 0;
     
     Object.keys(checksByCategory).forEach(category => {
-        const categoryChecks = checksByCategory[category];
-        
-        const categoryCard = document.createElement('div');
-        categoryCard.className = 'accordion-item';
-        
-        const categoryHeader = document.createElement('h2');
-        categoryHeader.className = 'accordion-header';
-        categoryHeader.id = `heading${accordionIndex}`;
-        
-        const categoryButton = document.createElement('button');
-        categoryButton.className = 'accordion-button';
-        categoryButton.type = 'button';
-        categoryButton.setAttribute('data-bs-toggle', 'collapse');
-        categoryButton.setAttribute('data-bs-target', `#collapse${accordionIndex}`);
-        categoryButton.textContent = categoryNames[category] || category;
-        
-        categoryHeader.appendChild(categoryButton);
-        
-        const categoryCollapse = document.createElement('div');
-        categoryCollapse.id = `collapse${accordionIndex}`;
-        categoryCollapse.className = 'accordion-collapse collapse show';
-        categoryCollapse.setAttribute('data-bs-parent', '#checksAccordion');
+        const categoryBody = createCategoryItem(accordion, category, accordionIndex);
         
-        const categoryBody = document.createElement('div');
-        categoryBody.className = 'accordion-body';
-        
-        categoryChecks.forEach(check => {
+        checksByCategory[category].forEach(check => {
             const checkItem = createCheckItem(check);
             categoryBody.appendChild(checkItem);
         });
         
-        categoryCollapse.appendChild(categoryBody);
-        categoryCard.appendChild(categoryHeader);
-        categoryCard.appendChild(categoryCollapse);
-        accordion.appendChild(categoryCard);
-        
         accordionIndex++;
     });
 }
 
+// Добавляет результат одной проверки в ее категорию (категория создается при первом результате)
+function appendCheck(check) {
+    const accordion = document.getElementById('checksAccordion');
+    let categoryBody = accordion.querySelector(`[data-category="${check.category}"] .accordion-body`);
+    
+    if (!categoryBody) {
+        categoryBody = createCategoryItem(accordion, check.category, accordion.children.length);
+    }
+    
+    categoryBody.appendChild(createCheckItem(check));
+}
+
+// Создает раздел категории в аккордеоне и возвращает контейнер для проверок
+function createCategoryItem(accordion, category, accordionIndex) {
+    const categoryNames = {
+        'connection': 'Соединение и SSL',
+        'headers': 'Заголовки безопасности',
+        'cookies': 'Безопасность Cookies',
+        'server': 'Информация о сервере',
+        'content': 'Контент и производительность',
+        'general': 'Общие проверки'
+    };
+    
+    const categoryCard = document.createElement('div');
+    categoryCard.className = 'accordion-item';
+    categoryCard.setAttribute('data-category', category);
+    
+    const categoryHeader = document.createElement('h2');
+    categoryHeader.className = 'accordion-header';
+    categoryHeader.id = `heading${accordionIndex}`;
+    
+    const categoryButton = document.createElement('button');
+    categoryButton.className = 'accordion-button';
+    categoryButton.type = 'button';
+    categoryButton.setAttribute('data-bs-toggle', 'collapse');
+    categoryButton.setAttribute('data-bs-target', `#collapse${accordionIndex}`);
+    categoryButton.textContent = categoryNames[category] || category;
+    
+    categoryHeader.appendChild(categoryButton);
+    
+    const categoryCollapse = document.createElement('div');
+    categoryCollapse.id = `collapse${accordionIndex}`;
+    categoryCollapse.className = 'accordion-collapse collapse show';
+    categoryCollapse.setAttribute('data-bs-parent', '#checksAccordion');
+    
+    const categoryBody = document.createElement('div');
+    categoryBody.className = 'accordion-body';
+    
+    categoryCollapse.appendChild(categoryBody);
+    categoryCard.appendChild(categoryHeader);
+    categoryCard.appendChild(categoryCollapse);
+    accordion.appendChild(categoryCard);
+    
+    return categoryBody;
+}
+
 function createCheckItem(check) {
     const item = document.createElement('div');
     item.className = `check-item ${check.status}`;
@@ -496,3 +680,219 @@ function showError(message) {
     errorContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
 }
 
+
+// ============================================
+// Кэш результатов и история проверок
+// ============================================
+
+const resultCache = new ResultCache();
+let historyTable = null;
+let scoreChart = null;
+// Текущая оценка каждого URL в истории: при повторной проверке старое значение вычитается из графика
+const historyScores = new Map();
+const scoreBins = new Array(10).fill(0);
+let scoreChartFrame = null;
+
+const levelNames = {
+    'excellent': 'Отличный',
+    'good': 'Хороший',
+    'satisfactory': 'Удовлетворительный',
+    'low': 'Низкий'
+};
+
+const levelClasses = {
+    'excellent': 'success',
+    'good': 'warning',
+    'satisfactory': 'info',
+    'low': 'danger'
+};
+
+function showCachedNotice(timestamp) {
+    const notice = document.getElementById('cachedNotice');
+    document.getElementById('cachedTime').textContent = new Date(timestamp).toLocaleString('ru-RU');
+    notice.classList.remove('d-none');
+}
+
+function hideCachedNotice() {
+    document.getElementById('cachedNotice').classList.add('d-none');
+}
+
+// Сохраняет результат в кэш и добавляет строку в историю
+async function recordResult(url, summary, report = null) {
+    const entry = await resultCache.put(url, summary, report);
+    addHistoryEntries([entry]);
+}
+
+function addHistoryEntries(entries) {
+    entries.forEach(entry => {
+        countScore(entry);
+        historyTable.upsert(entry, row => row.url);
+    });
+    document.getElementById('historyCount').textContent = historyTable.rows.length;
+    scheduleScoreChartUpdate();
+}
+
+// Учитывает оценку записи в графике (прежняя оценка того же URL вычитается)
+function countScore(entry) {
+    const previous = historyScores.get(entry.url);
+    if (previous !== undefined) {
+        scoreBins[scoreBin(previous)]--;
+        historyScores.delete(entry.url);
+    }
+    if (entry.percentage !== null && entry.percentage !== undefined) {
+        historyScores.set(entry.url, entry.percentage);
+        scoreBins[scoreBin(entry.percentage)]++;
+    }
+}
+
+function scoreBin(percentage) {
+    return Math.min(9, Math.max(0, Math.floor(percentage / 10)));
+}
+
+// График обновляется по счетчикам корзин не чаще раза за кадр, без пересоздания и анимации
+function scheduleScoreChartUpdate() {
+    if (scoreChartFrame !== null) {
+        return;
+    }
+    scoreChartFrame = requestAnimationFrame(() => {
+        scoreChartFrame = null;
+        scoreChart.data.datasets[0].data = scoreBins.slice();
+        scoreChart.update('none');
+    });
+}
+
+function createScoreChart() {
+    const ctx = document.getElementById('scoreDistributionChart').getContext('2d');
+    scoreChart = new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: scoreBins.map((_, index) => `${index * 10}-${index === 9 ? 100 : index * 10 + 9}`),
+            datasets: [{
+                label: 'Сайтов',
+                data: scoreBins.slice(),
+                backgroundColor: scoreBins.map((_, index) => getColorByPercentage(index * 10 + 5)),
+                borderWidth: 0
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: false,
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    ticks: { precision: 0 }
+                }
+            },
+            plugins: {
+                legend: {
+                    display: false
+                }
+            }
+        }
+    });
+}
+
+function levelBadge(row) {
+    const badge = document.createElement('span');
+    if (row.error) {
+        badge.className = 'badge bg-secondary';
+        badge.textContent = 'Ошибка';
+        badge.title = row.error;
+    } else {
+        badge.className = `badge bg-${levelClasses[row.level] || 'secondary'}`;
+        badge.textContent = levelNames[row.level] || row.level || '-';
+    }
+    return badge;
+}
+
+function initHistory() {
+    historyTable = new VirtualTable(document.getElementById('historyTable'), {
+        columns: [
+            { title: 'URL', className: 'history-url', render: row => row.url },
+            {
+                title: 'Оценка',
+                className: 'history-score',
+                render: row => (row.percentage === null || row.percentage === undefined) ? '-' : `${Math.round(row.percentage)}%`
+            },
+            { title: 'Уровень', className: 'history-level', render: levelBadge },
+            { title: 'Проверено', className: 'history-time', render: row => new Date(row.timestamp).toLocaleString('ru-RU') }
+        ],
+        onRowClick: (row) => {
+            if (!row) {
+                return;
+            }
+            if (row.report) {
+                displayResults(row.report);
+                return;
+            }
+            // Массовая проверка сохраняет только оценку: полный отчет получаем обычной проверкой
+            document.getElementById('urlInput').value = row.url;
+            document.getElementById('checkForm').requestSubmit();
+        }
+    });
+    createScoreChart();
+    
+    document.getElementById('historyFilter').addEventListener('input', (e) => {
+        const query = e.target.value.trim().toLowerCase();
+        historyTable.setFilter(query ? row => row.url.toLowerCase().includes(query) : null);
+    });
+    document.getElementById('batchForm').addEventListener('submit', (e) => {
+        e.preventDefault();
+        runBatch();
+    });
+    
+    // Записи кэша уникальны по URL и уже отсортированы (новые первыми): таблица заполняется целиком
+    resultCache.recent().then(entries => {
+        entries.forEach(countScore);
+        historyTable.setRows(entries);
+        document.getElementById('historyCount').textContent = entries.length;
+        scheduleScoreChartUpdate();
+    });
+}
+
+// Массовая проверка порциями по 10 URL (ограничение /api/check/batch); строки добавляются по мере ответов
+async function runBatch() {
+    const input = document.getElementById('batchInput');
+    const button = document.getElementById('batchButton');
+    const status = document.getElementById('batchStatus');
+    const urls = input.value.split(/[\s,]+/).map(url => url.trim()).filter(Boolean);
+    
+    if (urls.length === 0) {
+        return;
+    }
+    
+    button.disabled = true;
+    let done = 0;
+    status.textContent = `Проверено 0 из ${urls.length}`;
+    try {
+        for (let start = 0; start < urls.length; start += 10) {
+            const chunk = urls.slice(start, start + 10);
+            const response = await fetch('/api/check/batch', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ urls: chunk })
+            });
+            const data = await response.json();
+            if (!data.success) {
+                status.textContent = data.error || 'Ошибка массовой проверки';
+                return;
+            }
+            
+            const entries = await Promise.all(data.results
+                .filter(item => item.duplicate_of === undefined)
+                .map(item => resultCache.put(item.url, item)));
+            addHistoryEntries(entries);
+            done += chunk.length;
+            status.textContent = `Проверено ${done} из ${urls.length}`;
+        }
+    } catch (error) {
+        status.textContent = 'Ошибка соединения с сервером: ' + error.message;
+    } finally {
+        button.disabled = false;
+    }
+}
+
+initHistory();
@@ -0,0 +1,131 @@
+// Кэш результатов проверок в IndexedDB: последние отчеты по каноническому URL
+
+const RESULT_CACHE_DB = 'seccheck';
+const RESULT_CACHE_VERSION = 1;
+const RESULT_CACHE_STORE = 'results';
+// Сколько последних результатов хранится (старые удаляются при записи)
+const RESULT_CACHE_MAX_ENTRIES = 5000;
+
+// Канонический URL - как canonicalize_url на сервере: https:// по умолчанию,
+// хост в нижнем регистре и punycode, без порта по умолчанию, фрагмента и одиночного "/"
+function normalizeUrl(input) {
+    let value = input.trim().replace(/\s+/g, '');
+    if (!/^[A-Za-z][A-Za-z0-9+.-]*:\/\//.test(value)) {
+        value = 'https://' + value.replace(/^\/+/, '');
+    }
+    try {
+        const url = new URL(value);
+        const host = url.hostname.replace(/\.$/, '') + (url.port ? `:${url.port}` : '');
+        const path = url.pathname === '/' ? '' : url.pathname;
+        return `${url.protocol}//${host}${path}${url.search}`;
+    } catch (error) {
+        return value;
+    }
+}
+
+class ResultCache {
+    constructor() {
+        this.dbPromise = null;
+    }
+
+    // Без IndexedDB (приватный режим, старый браузер) кэш просто пустой
+    open() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = indexedDB.open(RESULT_CACHE_DB, RESULT_CACHE_VERSION);
+                request.onupgradeneeded = () => {
+                    const store = request.result.createObjectStore(RESULT_CACHE_STORE, { keyPath: 'url' });
+                    store.createIndex('timestamp', 'timestamp');
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+                request.onblocked = () => resolve(null);
+            });
+        }
+        return this.dbPromise;
+    }
+
+    async transaction(mode, callback) {
+        const db = await this.open();
+        if (!db) {
+            return null;
+        }
+        return new Promise((resolve) => {
+            const tx = db.transaction(RESULT_CACHE_STORE, mode);
+            let result = null;
+            callback(tx.objectStore(RESULT_CACHE_STORE), (value) => { result = value; });
+            tx.oncomplete = () => resolve(result);
+            tx.onerror = () => resolve(null);
+            tx.onabort = () => resolve(null);
+        });
+    }
+
+    // Запись: { url, timestamp, percentage, level, report } (report - полный отчет или null для массовой проверки)
+    get(url) {
+        return this.transaction('readonly', (store, done) => {
+            const request = store.get(normalizeUrl(url));
+            request.onsuccess = () => done(request.result || null);
+        });
+    }
+
+    put(url, summary, report = null) {
+        const entry = {
+            url: normalizeUrl(url),
+            timestamp: Date.now(),
+            percentage: summary.percentage,
+            level: summary.level,
+            error: summary.error || null,
+            report: report
+        };
+        return this.transaction('readwrite', (store, done) => {
+            store.put(entry);
+            done(entry);
+        }).then((saved) => {
+            this.prune();
+            return saved || entry;
+        });
+    }
+
+    // Последние записи, новые первыми
+    recent(limit = RESULT_CACHE_MAX_ENTRIES) {
+        return this.transaction('readonly', (store, done) => {
+            const entries = [];
+            const request = store.index('timestamp').openCursor(null, 'prev');
+            request.onsuccess = () => {
+                const cursor = request.result;
+                if (cursor && entries.length < limit) {
+                    entries.push(cursor.value);
+                    cursor.continue();
+                } else {
+                    done(entries);
+                }
+            };
+        }).then((entries) => entries || []);
+    }
+
+    // Удаляет самые старые записи сверх RESULT_CACHE_MAX_ENTRIES
+    prune() {
+        return this.transaction('readwrite', (store) => {
+            const countRequest = store.count();
+            countRequest.onsuccess = () => {
+                let excess = countRequest.result - RESULT_CACHE_MAX_ENTRIES;
+                if (excess <= 0) {
+                    return;
+                }
+                const request = store.index('timestamp').openCursor();
+                request.onsuccess = () => {
+                    const cursor = request.result;
+                    if (cursor && excess > 0) {
+                        cursor.delete();
+                        excess--;
+                        cursor.continue();
+                    }
+                };
+            };
+        });
+    }
+}
@@ -0,0 +1,137 @@
+// Таблица с оконной отрисовкой: в DOM только видимые строки, поэтому тысячи строк прокручиваются плавно
+
+class VirtualTable {
+    // columns: [{ title, className, render(row) -> строка или узел }], onRowClick(row)
+    constructor(container, { columns, rowHeight = 44, overscan = 8, onRowClick = null }) {
+        this.container = container;
+        this.columns = columns;
+        this.rowHeight = rowHeight;
+        this.overscan = overscan;
+        this.onRowClick = onRowClick;
+        this.rows = [];
+        this.visible = this.rows;
+        this.filter = null;
+        this.pool = [];
+        this.frame = null;
+
+        container.classList.add('virtual-table');
+        container.innerHTML = '';
+
+        const header = document.createElement('div');
+        header.className = 'virtual-table-row virtual-table-header';
+        columns.forEach(column => {
+            const cell = document.createElement('div');
+            cell.className = `virtual-table-cell ${column.className || ''}`;
+            cell.textContent = column.title;
+            header.appendChild(cell);
+        });
+
+        this.viewport = document.createElement('div');
+        this.viewport.className = 'virtual-table-viewport';
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-table-spacer';
+        this.body = document.createElement('div');
+        this.body.className = 'virtual-table-body';
+        this.spacer.appendChild(this.body);
+        this.viewport.appendChild(this.spacer);
+        container.appendChild(header);
+        container.appendChild(this.viewport);
+
+        this.viewport.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender());
+        this.body.addEventListener('click', (e) => {
+            const rowElement = e.target.closest('.virtual-table-row');
+            if (rowElement && this.onRowClick) {
+                this.onRowClick(this.visible[Number(rowElement.dataset.index)]);
+            }
+        });
+    }
+
+    setRows(rows) {
+        this.rows = rows;
+        this.applyFilter();
+    }
+
+    // Добавляет или заменяет строку с тем же ключом (key(row)) и поднимает ее наверх
+    upsert(row, key) {
+        const id = key(row);
+        const index = this.rows.findIndex(existing => key(existing) === id);
+        if (index >= 0) {
+            this.rows.splice(index, 1);
+        }
+        this.rows.unshift(row);
+        this.applyFilter();
+    }
+
+    setFilter(predicate) {
+        this.filter = predicate;
+        this.applyFilter();
+    }
+
+    applyFilter() {
+        this.visible = this.filter ? this.rows.filter(this.filter) : this.rows;
+        this.spacer.style.height = `${this.visible.length * this.rowHeight}px`;
+        this.scheduleRender();
+    }
+
+    // Перерисовка не чаще одного раза за кадр
+    scheduleRender() {
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => {
+                this.frame = null;
+                this.render();
+            });
+        }
+    }
+
+    render() {
+        const height = this.viewport.clientHeight;
+        const first = Math.max(0, Math.floor(this.viewport.scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(this.visible.length, Math.ceil((this.viewport.scrollTop + height) / this.rowHeight) + this.overscan);
+
+        this.body.style.transform = `translateY(${first * this.rowHeight}px)`;
+
+        // Элементы строк переиспользуются: создаются только при увеличении окна
+        while (this.pool.length < last - first) {
+            this.pool.push(this.createRowElement());
+        }
+        this.pool.forEach((element, offset) => {
+            const index = first + offset;
+            if (index >= last) {
+                if (element.parentNode) {
+                    element.remove();
+                }
+                return;
+            }
+            this.fillRow(element, this.visible[index], index);
+            if (!element.parentNode) {
+                this.body.appendChild(element);
+            }
+        });
+    }
+
+    createRowElement() {
+        const element = document.createElement('div');
+        element.className = 'virtual-table-row';
+        element.style.height = `${this.rowHeight}px`;
+        this.columns.forEach(column => {
+            const cell = document.createElement('div');
+            cell.className = `virtual-table-cell ${column.className || ''}`;
+            element.appendChild(cell);
+        });
+        return element;
+    }
+
+    fillRow(element, row, index) {
+        element.dataset.index = index;
+        this.columns.forEach((column, columnIndex) => {
+            const cell = element.children[columnIndex];
+            const content = column.render(row);
+            if (content instanceof Node) {
+                cell.replaceChildren(content);
+            } else {
+                cell.textContent = content;
+            }
+        });
+    }
+}
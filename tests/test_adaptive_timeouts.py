@@ -0,0 +1,48 @@
+"""
+Сохранение адаптивных таймаутов в хранилище
+"""
+from app.services import adaptive_timeouts as module
+from app.services.adaptive_timeouts import AdaptiveTimeouts
+
+
+class MemoryStore:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.saved = []
+
+    def load_latency_estimates(self):
+        return self.rows
+
+    def save_latency_estimates(self, rows):
+        self.saved.extend(rows)
+
+
+def test_exit_handler_registered_once_and_flushes_attached_store(monkeypatch):
+    handlers = []
+    monkeypatch.setattr(module.atexit, 'register', lambda func, *args, **kwargs: handlers.append((func, kwargs)))
+    timeouts = AdaptiveTimeouts(flush_interval=3600)
+    first, second = MemoryStore(), MemoryStore()
+
+    timeouts.attach_store(first)
+    timeouts.observe('a.example', 'read', 0.5)
+    timeouts.attach_store(second)
+    timeouts.observe('b.example', 'read', 0.7)
+
+    assert len(handlers) == 1
+    # Оценки, накопленные до переключения, ушли в прежнее хранилище
+    assert [row[0] for row in first.saved] == ['a.example']
+
+    func, kwargs = handlers[0]
+    func(**kwargs)
+    assert [row[0] for row in second.saved] == ['b.example']
+    assert [row[0] for row in first.saved] == ['a.example']
+
+
+def test_attach_store_loads_saved_estimates(monkeypatch):
+    monkeypatch.setattr(module.atexit, 'register', lambda *args, **kwargs: None)
+    timeouts = AdaptiveTimeouts()
+
+    timeouts.attach_store(MemoryStore([{'host': 'a.example', 'kind': 'read', 'srtt': 1.0, 'rttvar': 0.25,
+                                        'samples': 3}]))
+
+    assert timeouts.timeout('a.example', 'read', 10.0) == 2.0
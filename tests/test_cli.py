@@ -0,0 +1,21 @@
+"""
+Командная строка: индекс сертификатов при проверке списка
+"""
+import os
+from app import cli
+from app.services.cert_index import get_default_cert_index, set_default_cert_index
+
+
+def test_scan_opens_cert_index_only_when_given(tmp_path):
+    urls = tmp_path / 'urls.txt'
+    urls.write_text('', encoding='utf-8')
+    index_path = tmp_path / 'certificates.sqlite3'
+    try:
+        assert cli.main(['scan', '--input', str(urls)]) == 0
+        assert get_default_cert_index() is None
+
+        assert cli.main(['scan', '--input', str(urls), '--cert-index', str(index_path)]) == 0
+        assert get_default_cert_index().path == str(index_path)
+        assert os.path.exists(index_path)
+    finally:
+        set_default_cert_index(None)
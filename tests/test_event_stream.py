@@ -0,0 +1,40 @@
+"""
+Потоковые ответы NDJSON / Server-Sent Events
+"""
+import json
+from flask import Flask
+from app.utils.event_stream import event_stream_response
+
+
+def _client(closed):
+    app = Flask(__name__)
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            yield 'start', {'url': 'https://example.com'}
+            yield 'done', {'pages': 1}
+        return event_stream_response(generate(), on_close=lambda: closed.append(True))
+
+    return app.test_client()
+
+
+def test_ndjson_by_default():
+    closed = []
+    response = _client(closed).get('/stream')
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [{'url': 'https://example.com', 'event': 'start'}, {'pages': 1, 'event': 'done'}]
+    response.close()
+    assert closed == [True]
+
+
+def test_sse_when_preferred():
+    response = _client([]).get('/stream', headers={'Accept': 'text/event-stream'})
+
+    assert response.mimetype == 'text/event-stream'
+    events = response.get_data(as_text=True).split('\n\n')[:-1]
+    assert events[0] == 'event: start\ndata: {"url":"https://example.com","event":"start"}'
+    assert events[1].startswith('event: done\n')
@@ -0,0 +1,116 @@
+"""
+Проверки SecurityService без сети: FakeTransport, запись ответов и повторная оценка захвата
+"""
+import json
+from app.models.scan_capture import ScanCapture
+from app.services.security_service import SecurityService, rescore_capture
+from app.services.transport import FakeTransport, RecordingTransport
+
+HTML = ('Content-Type', 'text/html; charset=utf-8')
+HSTS = 'max-age=31536000; includeSubDomains'
+
+
+def _checks(report):
+    return {check.name: check for check in report.checks}
+
+
+def _https_site(days_valid: int = 90, cookies=()) -> FakeTransport:
+    transport = FakeTransport()
+    transport.add('https://example.com', headers=[HTML, ('Strict-Transport-Security', HSTS)],
+                  cookies=list(cookies), body='<html><body>ok</body></html>')
+    transport.add('https://example.com/robots.txt', body='User-agent: *\nDisallow:\n')
+    transport.certificate('example.com', days_valid=days_valid)
+    return transport
+
+
+def test_http_to_https_redirect_and_hsts_over_http():
+    transport = FakeTransport()
+    transport.redirect('http://example.com', 'https://example.com/',
+                       headers=[('Strict-Transport-Security', 'max-age=31536000')])
+    transport.add('https://example.com/', headers=[HTML, ('Strict-Transport-Security', HSTS)])
+
+    report = SecurityService('http://example.com', transport=transport).run_all_checks()
+    checks = _checks(report)
+
+    redirects = report.extra['redirects']
+    assert redirects['redirects'] == 1
+    assert [hop['secure'] for hop in redirects['hops']] == [False, True]
+    assert any('HSTS' in issue and 'http://example.com' in issue for issue in redirects['issues'])
+
+    # HSTS засчитывается по ответу HTTPS, заголовок из ответа HTTP отмечен как игнорируемый
+    hsts = checks['Принудительное использование HTTPS (HSTS)']
+    assert hsts.status == 'success'
+    assert hsts.details['header_value'] == HSTS
+    assert hsts.details['ignored_on'] == ['http://example.com']
+
+
+def test_hsts_only_over_http_is_not_counted():
+    transport = FakeTransport()
+    transport.redirect('http://example.com', 'https://example.com/',
+                       headers=[('Strict-Transport-Security', 'max-age=31536000')])
+    transport.add('https://example.com/', headers=[HTML])
+
+    report = SecurityService('http://example.com', transport=transport).run_all_checks()
+
+    hsts = _checks(report)['Принудительное использование HTTPS (HSTS)']
+    assert hsts.status != 'success'
+    assert hsts.score < hsts.max_score
+
+
+def test_cookie_flags():
+    transport = _https_site(cookies=['sid=1; Secure; HttpOnly; SameSite=Lax', 'tracking=2'])
+
+    report = SecurityService('https://example.com', transport=transport).run_all_checks()
+
+    cookies = _checks(report)['Безопасность файлов cookies']
+    assert cookies.status == 'warning'
+    assert (cookies.details['total'], cookies.details['secure'],
+            cookies.details['httponly'], cookies.details['samesite']) == (2, 1, 1, 1)
+
+
+def test_certificate_expiry():
+    statuses = {}
+    for days_valid in (90, 10, -3):
+        report = SecurityService('https://example.com', transport=_https_site(days_valid)).run_all_checks()
+        certificate = _checks(report)['Сертификат безопасности']
+        statuses[days_valid] = certificate.status
+        assert certificate.details['days_left'] in (days_valid - 1, days_valid)
+
+    assert statuses == {90: 'success', 10: 'warning', -3: 'danger'}
+
+
+def test_fake_transport_makes_no_network_requests():
+    transport = _https_site()
+
+    SecurityService('https://example.com', transport=transport).run_all_checks()
+
+    assert set(transport.requests) <= {'https://example.com', 'https://example.com/robots.txt'}
+
+
+def test_recorded_capture_rescores_to_same_report(tmp_path):
+    """Регрессия: захват проверки, сохраненный в JSON, оценивается повторно без сети с тем же результатом"""
+    recording = RecordingTransport(_https_site(days_valid=20, cookies=['sid=1; HttpOnly']))
+    service = SecurityService('https://example.com', transport=recording)
+    original = service.run_all_checks()
+
+    path = tmp_path / 'capture.json'
+    path.write_text(json.dumps(service.io.capture.to_dict()), encoding='utf-8')
+    capture = ScanCapture.from_dict(json.loads(path.read_text(encoding='utf-8')))
+    rescored = rescore_capture(capture)
+
+    assert [check.to_dict() for check in rescored.checks] == [check.to_dict() for check in original.checks]
+    assert rescored.percentage == original.percentage
+    assert rescored.level == original.level
+
+
+def test_recording_replays_through_fake_transport(tmp_path):
+    recording = RecordingTransport(_https_site(cookies=['sid=1; Secure; HttpOnly; SameSite=Strict']))
+    original = SecurityService('https://example.com', transport=recording).run_all_checks()
+
+    path = tmp_path / 'recording.json'
+    recording.save(str(path))
+    replayed = SecurityService('https://example.com', transport=FakeTransport.load(str(path))).run_all_checks()
+
+    assert replayed.percentage == original.percentage
+    assert [(check.name, check.status, check.score) for check in replayed.checks] == \
+        [(check.name, check.status, check.score) for check in original.checks]
@@ -0,0 +1,33 @@
+"""
+Заголовки кэширования ответов API
+"""
+from flask import Flask, jsonify
+from app.utils.http_caching import apply_caching
+
+
+def _client():
+    app = Flask(__name__)
+    app.after_request(apply_caching)
+
+    @app.route('/report', methods=['GET', 'POST'])
+    def report():
+        return jsonify({'url': 'https://example.com', 'score': 10})
+
+    return app.test_client()
+
+
+def test_get_has_etag_and_revalidates():
+    client = _client()
+
+    response = client.get('/report')
+    assert response.headers['ETag']
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert client.get('/report', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_post_has_no_etag():
+    response = _client().post('/report')
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert response.headers['Cache-Control'] == 'no-store'
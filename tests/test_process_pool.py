@@ -0,0 +1,25 @@
+"""
+Пул процессов проверок: запуск без fork и передача настроек процессам
+"""
+from app.services.cert_index import CertificateIndex, get_default_cert_index, set_default_cert_index
+from app.services.process_pool import ProcessScanPool
+
+
+def _child_settings():
+    import multiprocessing
+    index = get_default_cert_index()
+    return multiprocessing.get_start_method(), index.path if index else None
+
+
+def test_pool_does_not_fork_and_passes_cert_index(tmp_path):
+    path = str(tmp_path / 'certificates.sqlite3')
+    set_default_cert_index(CertificateIndex(path))
+    pool = ProcessScanPool(1)
+    try:
+        start_method, index_path = pool._executor.submit(_child_settings).result(timeout=60)
+    finally:
+        pool.shutdown()
+        set_default_cert_index(None)
+
+    assert start_method in ('forkserver', 'spawn')
+    assert index_path == path
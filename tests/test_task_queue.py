@@ -0,0 +1,131 @@
+"""
+Очередь задач RedisTaskQueue поверх FakeRedis (memory://)
+"""
+import threading
+import time
+from app.services.task_queue import open_task_queue
+from app.worker import ScanWorker
+
+
+def _expire_leases(queue):
+    """Переносит все аренды в прошлое, как если бы воркер перестал отвечать"""
+    for raw_id in queue.client.zrangebyscore(queue._key('leases'), '-inf', '+inf'):
+        queue.client.zadd(queue._key('leases'), {raw_id: time.time() - 1})
+
+
+def test_lease_moves_task_to_processing_with_lease():
+    queue = open_task_queue('memory://')
+    task_id = queue.enqueue('https://example.com')
+
+    task = queue.lease('w1', 30)
+
+    assert task.id == task_id
+    assert (task.status, task.worker_id, task.attempts) == ('leased', 'w1', 1)
+    assert task.lease_until > time.time()
+    assert queue.client.lrange(queue._key('processing'), 0, -1) == [task_id]
+    assert queue.client.zscore(queue._key('leases'), task_id) == task.lease_until
+    assert queue.lease('w2', 30) is None
+
+
+def test_lease_is_fifo():
+    queue = open_task_queue('memory://')
+    first = queue.enqueue('https://a.example')
+    second = queue.enqueue('https://b.example')
+
+    assert queue.lease('w1', 30).id == first
+    assert queue.lease('w1', 30).id == second
+
+
+def test_concurrent_leases_take_each_task_once():
+    queue = open_task_queue('memory://')
+    task_ids = {queue.enqueue(f'https://{i}.example') for i in range(50)}
+    leased, lock = [], threading.Lock()
+
+    def take(worker_id):
+        while True:
+            task = queue.lease(worker_id, 30)
+            if task is None:
+                return
+            with lock:
+                leased.append(task.id)
+
+    threads = [threading.Thread(target=take, args=(f'w{i}',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(leased) == sorted(task_ids)
+    assert queue.client.zcard(queue._key('leases')) == len(task_ids)
+
+
+def test_heartbeat_extends_only_own_lease():
+    queue = open_task_queue('memory://')
+    queue.enqueue('https://example.com')
+    task = queue.lease('w1', 1)
+
+    assert queue.heartbeat(task.id, 'w1', 60)
+    assert queue.get(task.id).lease_until > task.lease_until
+    assert not queue.heartbeat(task.id, 'w2', 60)
+
+
+def test_expired_lease_is_requeued_and_stale_worker_rejected():
+    queue = open_task_queue('memory://')
+    queue.enqueue('https://example.com')
+    task = queue.lease('w1', 30)
+    _expire_leases(queue)
+
+    assert queue.requeue_expired() == 1
+    assert queue.get(task.id).status == 'pending'
+    assert queue.stats()['pending'] == 1
+
+    again = queue.lease('w2', 30)
+    assert (again.id, again.attempts) == (task.id, 2)
+    # Устаревший воркер не может ни продлить, ни завершить чужую аренду
+    assert not queue.heartbeat(task.id, 'w1', 30)
+    assert not queue.complete(task.id, 'w1', {'ok': True})
+    assert queue.complete(task.id, 'w2', {'ok': True})
+    assert queue.get(task.id).result == {'ok': True}
+    assert queue.stats() == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_requeue_keeps_live_leases():
+    queue = open_task_queue('memory://')
+    queue.enqueue('https://example.com')
+    task = queue.lease('w1', 60)
+
+    assert queue.requeue_expired() == 0
+    assert queue.get(task.id).status == 'leased'
+
+
+def test_expired_lease_fails_after_max_attempts():
+    queue = open_task_queue('memory://', max_attempts=1)
+    queue.enqueue('https://example.com')
+    task = queue.lease('w1', 30)
+    _expire_leases(queue)
+
+    assert queue.requeue_expired() == 0
+    assert queue.get(task.id).status == 'failed'
+    assert queue.stats() == {'pending': 0, 'leased': 0, 'done': 0, 'failed': 1}
+
+
+def test_worker_processes_tasks_and_sweeps_on_timer():
+    queue = open_task_queue('memory://')
+    calls = []
+    queue.requeue_expired = lambda: calls.append(time.time()) or 0
+    task_id = queue.enqueue('https://example.com')
+    worker = ScanWorker(queue, concurrency=2, lease_seconds=30, poll_interval=0.01,
+                        scan_func=lambda url: {'url': url}, requeue_interval=0.05)
+
+    runner = threading.Thread(target=worker.run)
+    runner.start()
+    deadline = time.time() + 2
+    while (queue.get(task_id).status != 'done' or len(calls) < 2) and time.time() < deadline:
+        time.sleep(0.01)
+    worker.stop()
+    runner.join(timeout=2)
+
+    assert queue.get(task_id).result == {'url': 'https://example.com'}
+    # Проход по арендам идет по таймеру, а не при каждом опросе очереди
+    assert 2 <= len(calls) <= 2 / 0.05 + 1
+    assert not runner.is_alive()
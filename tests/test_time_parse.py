@@ -0,0 +1,20 @@
+"""
+Разбор дат ISO 8601
+"""
+import pytest
+from app.utils.time_parse import parse_iso_time
+
+
+def test_date_and_datetime_without_zone_are_utc():
+    assert parse_iso_time('2024-01-01') == 1704067200
+    assert parse_iso_time('2024-01-01T12:00:00') == 1704067200 + 12 * 3600
+
+
+def test_explicit_zone():
+    assert parse_iso_time('2024-01-01T03:00:00+03:00') == 1704067200
+    assert parse_iso_time('2024-01-01T00:00:00Z') == 1704067200
+
+
+def test_invalid_value():
+    with pytest.raises(ValueError):
+        parse_iso_time('01.01.2024')
@@ -0,0 +1,51 @@
+"""
+Тесты исходящей очереди webhooks
+"""
+import time
+from app.services.webhooks import WebhookOutbox
+
+URL = 'http://127.0.0.1:9/hook'
+
+
+def _fail_all(outbox: WebhookOutbox, owner: str = 'test'):
+    for _, ids, _, _ in outbox.claim_batches(owner, time.time(), batch_size=1000, claim_seconds=60):
+        outbox.give_up(ids, owner, 'HTTP 500')
+
+
+def test_overflow_evicts_failed_before_pending(tmp_path):
+    outbox = WebhookOutbox(str(tmp_path / 'outbox.sqlite3'), max_events=10, max_failed=100)
+    outbox.add(URL, [{'id': f'dead-{i}'} for i in range(8)])
+    _fail_all(outbox)
+
+    outbox.add(URL, [{'id': 'waiting-1'}, {'id': 'waiting-2'}])
+    dropped = outbox.add(URL, [{'id': f'new-{i}'} for i in range(6)])
+
+    stats = outbox.stats()
+    assert dropped == 0
+    assert stats['dropped'] == 0
+    assert stats['pending'] == 8
+    assert stats['failed'] == 2
+    assert stats['purged_failed'] == 6
+
+    batches = outbox.claim_batches('check', time.time(), batch_size=100, claim_seconds=60)
+    kept = [event['id'] for _, _, events, _ in batches for event in events]
+    assert kept[:2] == ['waiting-1', 'waiting-2']
+
+
+def test_overflow_drops_oldest_pending_without_failed(tmp_path):
+    outbox = WebhookOutbox(str(tmp_path / 'outbox.sqlite3'), max_events=3)
+    outbox.add(URL, [{'id': str(i)} for i in range(5)])
+
+    batches = outbox.claim_batches('check', time.time(), batch_size=100, claim_seconds=60)
+    assert [event['id'] for _, _, events, _ in batches for event in events] == ['2', '3', '4']
+    assert outbox.stats()['dropped'] == 2
+
+
+def test_failed_rows_are_capped(tmp_path):
+    outbox = WebhookOutbox(str(tmp_path / 'outbox.sqlite3'), max_failed=3)
+    outbox.add(URL, [{'id': str(i)} for i in range(5)])
+    _fail_all(outbox)
+
+    stats = outbox.stats()
+    assert stats['failed'] == 3
+    assert stats['purged_failed'] == 2